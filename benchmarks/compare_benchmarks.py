@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# Compares two results files written by run_benchmarks.py. Benchmarks are matched by name and parameters and their
+# median times compared. Exits with a non-zero status if anything got slower by more than the threshold.
+#
+# Example:
+#     python3 compare_benchmarks.py baseline.json results.json --threshold 1.15
+
+import argparse
+import json
+import sys
+
+
+def key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def label(result):
+    if not result["params"]:
+        return result["name"]
+    return "{}[{}]".format(result["name"], ",".join("{}={}".format(k, v) for k, v in result["params"].items()))
+
+
+def load(path):
+    with open(path, "r") as f:
+        report = json.load(f)
+    return report["environment"], {key(r): r for r in report["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the median times of two benchmark runs")
+    parser.add_argument("baseline", help="Results from the reference version")
+    parser.add_argument("current", help="Results from the version being checked")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="current/baseline ratio above which a benchmark is a regression. Default: %(default)s")
+    args = parser.parse_args()
+
+    env_a, baseline = load(args.baseline)
+    env_b, current = load(args.current)
+    print("baseline: {} {}".format(env_a["pyboof_version"], env_a.get("git_commit")))
+    print("current:  {} {}".format(env_b["pyboof_version"], env_b.get("git_commit")))
+    print()
+
+    regressions = 0
+    for k, b in current.items():
+        a = baseline.get(k)
+        if a is None:
+            print("{:70s} {:>10s} {:10.3f} ms".format(label(b), "new", b["median_ms"]))
+            continue
+        ratio = b["median_ms"] / a["median_ms"] if a["median_ms"] > 0 else float("inf")
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print("{:70s} {:10.3f} {:10.3f} ms {:6.2f}x{}".format(label(b), a["median_ms"], b["median_ms"], ratio, flag))
+
+    for k, a in baseline.items():
+        if k not in current:
+            print("{:70s} {:10.3f} {:>10s}".format(label(a), a["median_ms"], "missing"))
+
+    if regressions > 0:
+        print("\n{} benchmark(s) slower than {:.2f}x the baseline".format(regressions, args.threshold))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
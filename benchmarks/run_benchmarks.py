@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+
+# Benchmarks for moving data between Python and Java and for the algorithm wrappers. Results are written as JSON so
+# that runs from different versions can be compared with compare_benchmarks.py
+#
+# Examples:
+#     python3 run_benchmarks.py --output results.json
+#     python3 run_benchmarks.py --filter image --warmup 20 --repeat 100
+#     python3 run_benchmarks.py --quick --output quick.json
+#
+# Each benchmark is called --warmup times, which lets the JIT compile the code paths being measured, before
+# --repeat timed calls are made. Inputs are generated from a fixed seed so runs are reproducible.
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import pyboof as pb
+from pyboof import pbg
+
+FORMAT_VERSION = 1
+
+bench_dir = os.path.dirname(os.path.realpath(__file__))
+
+# (name, family, num_bands, dtype) of every image type which has a fast path through the mmap file
+IMAGE_TYPES = [(prefix + data_type, family, num_bands, dtype)
+               for prefix, family, num_bands in (("Gray", pb.Family.SINGLE_BAND, 1),
+                                                 ("Planar", pb.Family.PLANAR, 3),
+                                                 ("Interleaved", pb.Family.INTERLEAVED, 3))
+               for data_type, dtype in pb.image._data_type_dtypes.items()]
+
+IMAGE_SIZES = [(320, 240), (640, 480), (1920, 1080)]
+LIST_SIZES = [100, 1000, 10000]
+
+QUICK_IMAGE_SIZES = [(320, 240)]
+QUICK_LIST_SIZES = [100, 1000]
+
+
+class Benchmark:
+    """
+    A single measurement. setup() is called once and returns the function which is timed
+    """
+
+    def __init__(self, group, name, params, setup):
+        self.group = group
+        self.name = name
+        self.params = params
+        self.setup = setup
+
+    def full_name(self):
+        if not self.params:
+            return self.name
+        return "{}[{}]".format(self.name, ",".join("{}={}".format(k, v) for k, v in self.params.items()))
+
+
+def random_image(rng, width, height, num_bands, dtype):
+    shape = (height, width) if num_bands == 1 else (height, width, num_bands)
+    if np.issubdtype(dtype, np.integer):
+        return rng.integers(max(0, np.iinfo(dtype).min), 256, size=shape, dtype=dtype)
+    return rng.uniform(0, 255, size=shape).astype(dtype)
+
+
+def image_benchmarks(rng, sizes):
+    for type_name, family, num_bands, dtype in IMAGE_TYPES:
+        for width, height in sizes:
+            params = {"type": type_name, "width": width, "height": height}
+
+            def setup_to_boof(width=width, height=height, family=family, num_bands=num_bands, dtype=dtype):
+                image = random_image(rng, width, height, num_bands, dtype)
+                # Writing into the same Java image each time is what a video loop would do
+                boof = pb.ndarray_to_boof(image, family=family)
+                return lambda: pb.ndarray_to_boof(image, boof)
+
+            def setup_to_ndarray(width=width, height=height, family=family, num_bands=num_bands, dtype=dtype,
+                                 copy=True):
+                boof = pb.ndarray_to_boof(random_image(rng, width, height, num_bands, dtype), family=family)
+                return lambda: pb.boof_to_ndarray(boof, copy=copy)
+
+            def setup_to_view(**kwargs):
+                return setup_to_ndarray(copy=False, **kwargs)
+
+            yield Benchmark("image", "ndarray_to_boof", params, setup_to_boof)
+            yield Benchmark("image", "boof_to_ndarray", params, setup_to_ndarray)
+            yield Benchmark("image", "boof_to_ndarray_view", params, setup_to_view)
+
+
+def list_benchmarks(rng, sizes):
+    for n in sizes:
+        for dtype_name, dtype, nptype in (("F64", np.double, np.float64), ("F32", float, np.float32)):
+            params = {"type": "Point2D_" + dtype_name, "n": n}
+
+            def setup_p2b(n=n, nptype=nptype):
+                points = rng.uniform(0, 1000, size=(n, 2)).astype(nptype)
+                return lambda: pb.p2b_list_point2D(points)
+
+            def setup_b2p(n=n, dtype=dtype, nptype=nptype):
+                java_list = pb.p2b_list_point2D(rng.uniform(0, 1000, size=(n, 2)).astype(nptype))
+                return lambda: pb.b2p_list_point2D(java_list, dtype, as_ndarray=True)
+
+            yield Benchmark("list", "p2b_list_point2D", params, setup_p2b)
+            yield Benchmark("list", "b2p_list_point2D", params, setup_b2p)
+
+        params = {"type": "AssociatedPair", "n": n}
+
+        def setup_pair_p2b(n=n):
+            pairs = rng.uniform(0, 1000, size=(n, 4))
+            return lambda: pb.p2b_list_AssociatedPair(pairs)
+
+        def setup_pair_b2p(n=n):
+            java_list = pb.p2b_list_AssociatedPair(rng.uniform(0, 1000, size=(n, 4)))
+            return lambda: pb.b2p_list_AssociatedPair(java_list, as_ndarray=True)
+
+        yield Benchmark("list", "p2b_list_AssociatedPair", params, setup_pair_p2b)
+        yield Benchmark("list", "b2p_list_AssociatedPair", params, setup_pair_b2p)
+
+        # Descriptor lengths match SURF (64 floats) and ORB/BRIEF (256 bits)
+        descriptors = [
+            ("TupleDesc_F64", lambda n: rng.uniform(-1, 1, size=(n, 64))),
+            ("TupleDesc_F32", lambda n: rng.uniform(-1, 1, size=(n, 64)).astype(np.float32)),
+            ("TupleDesc_B", lambda n: rng.integers(0, 256, size=(n, 32), dtype=np.uint8)),
+        ]
+        for desc_name, create in descriptors:
+            params = {"type": desc_name, "n": n}
+
+            def setup_desc_p2b(n=n, create=create):
+                descs = create(n)
+                return lambda: pb.p2b_list_desc(descs)
+
+            def setup_desc_b2p(n=n, create=create, desc_name=desc_name):
+                java_list = pb.p2b_list_desc(create(n))
+                desc_type = getattr(pbg.gateway.jvm.boofcv.struct.feature, desc_name)
+                return lambda: pb.b2p_list_desc(java_list, desc_type)
+
+            yield Benchmark("list", "p2b_list_desc", params, setup_desc_p2b)
+            yield Benchmark("list", "b2p_list_desc", params, setup_desc_b2p)
+
+
+def algorithm_benchmarks(data_dir):
+    example = os.path.join(data_dir, "example")
+
+    def load(relative):
+        path = os.path.join(example, relative)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return pb.load_single_band(path, np.uint8)
+
+    def setup_qrcode():
+        image = load("fiducial/qrcode/image03.jpg")
+        detector = pb.FactoryFiducial(np.uint8).qrcode()
+        return lambda: detector.detect(image)
+
+    def setup_detect_describe():
+        image = pb.boof_to_ndarray(load("outdoors01.jpg"))
+        detector = pb.FactoryDetectDescribe(np.uint8).createSurf()
+        return lambda: detector.detect(image, as_ndarray=True)
+
+    def setup_stereo():
+        # The images aren't rectified, which doesn't matter when only the processing time is of interest
+        left = load("stereo/chair01_left.jpg")
+        right = load("stereo/chair01_right.jpg")
+        config = pb.ConfigDisparityBMBest5()
+        config.disparityMin = 10
+        config.disparityRange = 50
+        config.errorType = pb.DisparityError.CENSUS
+        disparity = pb.FactoryStereoDisparity(np.uint8).block_match_best5(config)
+        return lambda: disparity.process(left, right)
+
+    def setup_threshold(create):
+        def setup():
+            image = load("fiducial/image/examples/image00.jpg")
+            binary = pb.create_single_band(image.getWidth(), image.getHeight(), np.uint8)
+            algorithm = create(pb.FactoryThresholdBinary(np.uint8))
+            return lambda: algorithm.process(image, binary)
+        return setup
+
+    yield Benchmark("algorithm", "QrCodeDetector.detect", {}, setup_qrcode)
+    yield Benchmark("algorithm", "DetectDescribePointFeatures.detect", {"type": "SURF"}, setup_detect_describe)
+    yield Benchmark("algorithm", "StereoDisparity.process", {"type": "BMBest5"}, setup_stereo)
+    yield Benchmark("algorithm", "InputToBinary.process", {"type": "localGaussian"},
+                    setup_threshold(lambda f: f.localGaussian(region_width=11)))
+    yield Benchmark("algorithm", "InputToBinary.process", {"type": "globalOtsu"},
+                    setup_threshold(lambda f: f.globalOtsu()))
+
+
+def measure(benchmark, warmup, repeat, collect_stats):
+    fn = benchmark.setup()
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        time0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - time0)
+
+    result = {
+        "group": benchmark.group,
+        "name": benchmark.name,
+        "params": benchmark.params,
+        "repeat": repeat,
+        "min_ms": 1000 * min(samples),
+        "median_ms": 1000 * statistics.median(samples),
+        "mean_ms": 1000 * statistics.mean(samples),
+        "stdev_ms": 1000 * statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "max_ms": 1000 * max(samples),
+    }
+
+    if collect_stats:
+        # Done in its own call so that instrumentation doesn't affect the timing
+        with pb.collect_stats() as collector:
+            fn()
+        s = collector.to_dict()
+        result["gateway_calls"] = s["gateway_calls"]
+        result["bytes_to_java"] = sum(s["bytes_to_java"].values())
+        result["bytes_from_java"] = sum(s["bytes_from_java"].values())
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=bench_dir,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(args):
+    jvm = pbg.gateway.jvm
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "pyboof_version": pb.__version__.strip(),
+        "pyboof_build_date": pb.build_date.strip(),
+        "git_commit": git_commit(),
+        "boofcv_version": jvm.boofcv.BoofVersion.VERSION,
+        "java_version": jvm.java.lang.System.getProperty("java.version"),
+        "python_version": platform.python_version(),
+        "numpy_version": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "mmap_size_mb": args.size_mb,
+        "max_threads": args.threads,
+        "warmup": args.warmup,
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks PyBoof's data transport and algorithm wrappers")
+    parser.add_argument("--output", help="Where the JSON results are written. Printed to stdout if not specified")
+    parser.add_argument("--filter", help="Only run benchmarks whose name matches this regular expression")
+    parser.add_argument("--groups", default="image,list,algorithm",
+                        help="Comma separated groups to run. Default: %(default)s")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed calls before measuring. Default: %(default)s")
+    parser.add_argument("--repeat", type=int, default=30, help="Timed calls. Default: %(default)s")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest image and list sizes")
+    parser.add_argument("--seed", type=int, default=0xBEEF, help="Seed for generated inputs")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Maximum number of threads BoofCV can use. Default is BoofCV's default")
+    parser.add_argument("--size-mb", type=int, default=20, help="Size of the memory mapped slots")
+    parser.add_argument("--data", default=os.path.join(bench_dir, "..", "data"),
+                        help="Location of PyBoof's example data. Default: %(default)s")
+    parser.add_argument("--stats", action="store_true",
+                        help="Also record the number of gateway calls and bytes transferred by each benchmark")
+    args = parser.parse_args()
+
+    pb.init_pyboof(java_port=int(os.environ.get('PYBOOF_JAVA_PORT', 25333)),
+                   python_port=int(os.environ.get('PYBOOF_PYTHON_PORT', 25334)), size_mb=args.size_mb)
+    if args.threads is not None:
+        pb.set_max_threads(args.threads)
+
+    rng = np.random.default_rng(args.seed)
+    groups = set(args.groups.split(","))
+    benchmarks = []
+    if "image" in groups:
+        benchmarks += image_benchmarks(rng, QUICK_IMAGE_SIZES if args.quick else IMAGE_SIZES)
+    if "list" in groups:
+        benchmarks += list_benchmarks(rng, QUICK_LIST_SIZES if args.quick else LIST_SIZES)
+    if "algorithm" in groups:
+        benchmarks += algorithm_benchmarks(args.data)
+    if args.filter:
+        pattern = re.compile(args.filter)
+        benchmarks = [b for b in benchmarks if pattern.search(b.full_name())]
+
+    results = []
+    skipped = []
+    for benchmark in benchmarks:
+        try:
+            result = measure(benchmark, args.warmup, args.repeat, args.stats)
+        except FileNotFoundError as e:
+            print("Skipping {}: missing {}".format(benchmark.full_name(), e), file=sys.stderr)
+            skipped.append(benchmark.full_name())
+            continue
+        print("{:70s} {:10.3f} ms".format(benchmark.full_name(), result["median_ms"]), file=sys.stderr)
+        results.append(result)
+
+    report = {"format_version": FORMAT_VERSION, "environment": environment(args),
+              "results": results, "skipped": skipped}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,13 @@ boof_cv = pb.ndarray_to_boof(ndarray_img)
 boof_gray = pb.load_single_band(image_path, np.uint8)
 boof_color = pb.load_planar(image_path, np.uint8)
 
+# Many images can be loaded in background threads while they are being processed. Here every image in a directory
+# is converted to gray scale and resized as it's loaded
+image_type = pb.create_ImageType(pb.Family.SINGLE_BAND, np.uint8)
+with pb.BatchImageLoader('../data/example/recognition/scene/*.jpg', image_type, resize=(320, 240)) as loader:
+    for ndarray_small in loader.ndarrays():
+        print("Loaded shape={}".format(ndarray_small.shape))
+
 # Let's display all 3 of them in Java
 # display the results in a single window as a list
 image_list = [(boof_cv, "OpenCV"),
@@ -16,17 +16,14 @@ point_tracker = pb.FactoryPointTracker(np.uint8).generic(config_tracker)
 
 image_input = point_tracker.get_image_type().create_boof_image(0, 0)
 
-boof_color = None
 while True:
     # Capture sequence frame-by-frame
     ret, frame = cap.read()
     if not frame.any():
         break
 
-    # Convert it into a boofcv image
-    boof_color = pb.ndarray_to_boof(frame, boof_color)
-    # Convert it into the image type required by the tracker
-    pb.convert_boof_image(boof_color, image_input)
+    # Convert it into the image type required by the tracker while it's being sent to Java
+    pb.ndarray_to_boof_converted(frame, image_input, channel_order="BGR")
 
     # Track the point objects
     point_tracker.process(image_input)
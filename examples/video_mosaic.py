@@ -6,8 +6,6 @@ import cv2
 
 import pyboof as pb
 
-# Use OpenCV to capture images
-cap = cv2.VideoCapture('../data/example/mosaic/airplane01.mjpeg')
 window_name = "Video Mosaic"
 
 # Configure it to use KLT. There are a ton of options. We will stick the defaults that should work well at 640x480
@@ -20,23 +18,13 @@ video_mosaic = pb.FactoryVideoMosaic(np.uint8).mosaic(config_tracker)
 
 video_mosaic.configure(1000, 500, scale=0.5)
 
-image_input = video_mosaic.get_image_type().create_boof_image(0, 0)
-
-boof_color = None
-while True:
-    # Capture sequence frame-by-frame
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    # Convert it into a boofcv image
-    boof_color = pb.ndarray_to_boof(frame, boof_color)
-    # Convert it into the image type required by the tracker
-    pb.convert_boof_image(boof_color, image_input)
+# Decode the video inside of Java. Frames are already the type the mosaic needs and never get copied into Python
+source = pb.open_frame_source('../data/example/mosaic/airplane01.mjpeg', video_mosaic.get_image_type())
 
+for frame in source:
     # Track the point objects
     time0 = time.time() * 1000.0
-    if not video_mosaic.process(image_input):
+    if not video_mosaic.process(frame):
         print("mosaic failed!")
         video_mosaic.reset()
         continue
@@ -46,13 +34,14 @@ while True:
     boof_mosaic = video_mosaic.get_stitched_image()
     ndarray_mosaic = pb.boof_to_ndarray(boof_mosaic)
 
-    cv2.imshow("Video Mosaic", ndarray_mosaic)
+    # BoofCV decodes frames as RGB and OpenCV displays BGR
+    cv2.imshow("Video Mosaic", ndarray_mosaic[:, :, ::-1])
 
     print("mosaic: {:6.2f} ms".format(time1 - time0))
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
 
-# When everything done, release the capture
-cap.release()
+# When everything done, release the video
+source.close()
 cv2.destroyAllWindows()
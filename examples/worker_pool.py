@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+
+# Processes a batch of images in parallel. Each worker in the pool is a separate Python process with its own JVM,
+# so this scales across cores even when the algorithm itself is single threaded. Compare to launch_multiple_jvm.py
+# where ports had to be assigned by hand.
+import glob
+
+import numpy as np
+import pyboof as pb
+
+
+# Jobs must be defined at the top level of a module so that they can be sent to the workers
+def detect_qr(path):
+    detector = pb.FactoryFiducial(np.uint8).qrcode()
+    detector.detect(pb.load_single_band(path, np.uint8))
+    return [qr.message for qr in detector.detections]
+
+
+if __name__ == '__main__':
+    paths = sorted(glob.glob("../data/example/fiducial/qrcode/*.jpg"))
+
+    with pb.JvmPool(num_workers=4) as pool:
+        for path, messages in zip(paths, pool.map(detect_qr, paths)):
+            print("{}: {}".format(path, messages))
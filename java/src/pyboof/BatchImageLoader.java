@@ -0,0 +1,163 @@
+package pyboof;
+
+import boofcv.alg.distort.DistortImageOps;
+import boofcv.alg.interpolate.InterpolationType;
+import boofcv.io.image.UtilImageIO;
+import boofcv.struct.border.BorderType;
+import boofcv.struct.image.ImageBase;
+import boofcv.struct.image.ImageType;
+
+import java.util.ArrayDeque;
+import java.util.ArrayList;
+import java.util.Iterator;
+import java.util.List;
+import java.util.NoSuchElementException;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+
+/**
+ * Loads a list of images in background threads so that decoding overlaps with processing. Images are returned in
+ * the same order as the paths. At most 'prefetch' images are decoded ahead of the consumer, which bounds how much
+ * memory is used. Images can optionally be resized as they're loaded.
+ *
+ * Implements {@link Iterator} so it can be passed directly to algorithms which take an iterator of images.
+ *
+ * @author Peter Abeles
+ */
+public class BatchImageLoader implements Iterator<ImageBase<?>> {
+	final List<String> paths;
+	final ImageType<?> imageType;
+	final int targetWidth;
+	final int targetHeight;
+	final int prefetch;
+
+	final ExecutorService executor;
+	/** Images which are being loaded, or have been loaded, in the order they will be returned */
+	final ArrayDeque<Future<ImageBase<?>>> pending = new ArrayDeque<>();
+	/** Index of the next path which will be submitted */
+	int nextSubmit;
+	/** Index of the next image which will be returned */
+	int nextReturn;
+
+	/**
+	 * @param paths Paths to the images
+	 * @param imageType Type of the returned images
+	 * @param numThreads Number of threads which decode images. If <= 0 then the number of processors
+	 * @param prefetch Maximum number of images loaded ahead of the consumer
+	 * @param targetWidth Width the images are resized to. If <= 0 they are not resized
+	 * @param targetHeight Height the images are resized to. If <= 0 they are not resized
+	 */
+	public BatchImageLoader( List<String> paths , ImageType<?> imageType , int numThreads , int prefetch ,
+							 int targetWidth , int targetHeight ) {
+		if( prefetch < 1 )
+			throw new IllegalArgumentException("prefetch must be at least 1");
+		this.paths = new ArrayList<>(paths);
+		this.imageType = imageType;
+		this.prefetch = prefetch;
+		this.targetWidth = targetWidth;
+		this.targetHeight = targetHeight;
+
+		if( numThreads <= 0 )
+			numThreads = Runtime.getRuntime().availableProcessors();
+		executor = Executors.newFixedThreadPool(Math.min(numThreads, prefetch), r -> {
+			Thread thread = new Thread(r, "pyboof-image-loader");
+			thread.setDaemon(true);
+			return thread;
+		});
+		fill();
+	}
+
+	public BatchImageLoader( List<String> paths , ImageType<?> imageType ) {
+		this(paths, imageType, 0, 8, 0, 0);
+	}
+
+	/** Submits paths until the queue is full */
+	synchronized void fill() {
+		while( pending.size() < prefetch && nextSubmit < paths.size() ) {
+			String path = paths.get(nextSubmit++);
+			pending.add(executor.submit(() -> load(path)));
+		}
+	}
+
+	ImageBase<?> load( String path ) {
+		ImageBase<?> image = UtilImageIO.loadImage(path, true, (ImageType)imageType);
+		if( image == null )
+			throw new RuntimeException("Failed to load "+path);
+		if( targetWidth <= 0 || targetHeight <= 0 || (image.width == targetWidth && image.height == targetHeight) )
+			return image;
+		ImageBase resized = imageType.createImage(targetWidth, targetHeight);
+		DistortImageOps.scale((ImageBase)image, resized, BorderType.EXTENDED, InterpolationType.BILINEAR);
+		return resized;
+	}
+
+	@Override
+	public synchronized boolean hasNext() {
+		return nextReturn < paths.size();
+	}
+
+	/**
+	 * Returns the next image, waiting for it to be decoded if needed
+	 */
+	@Override
+	public ImageBase<?> next() {
+		Future<ImageBase<?>> future;
+		String path;
+		synchronized( this ) {
+			if( nextReturn >= paths.size() )
+				throw new NoSuchElementException();
+			future = pending.poll();
+			path = paths.get(nextReturn++);
+			fill();
+		}
+		try {
+			return future.get();
+		} catch( InterruptedException e ) {
+			Thread.currentThread().interrupt();
+			throw new RuntimeException(e);
+		} catch( ExecutionException e ) {
+			throw new RuntimeException("Failed to load "+path, e.getCause());
+		}
+	}
+
+	/**
+	 * Returns the next image or null if there are no more. Saves Python a call to {@link #hasNext()}
+	 */
+	public ImageBase<?> nextOrNull() {
+		return hasNext() ? next() : null;
+	}
+
+	/**
+	 * Writes the next image into the mmap slot
+	 *
+	 * @return false if there are no more images
+	 */
+	public boolean writeNext( BoofMemoryMapped mmap , int slot ) {
+		ImageBase<?> image = nextOrNull();
+		if( image == null )
+			return false;
+		mmap.writeImage(slot, image);
+		return true;
+	}
+
+	/**
+	 * Index of the image which will be returned next
+	 */
+	public synchronized int getIndex() {
+		return nextReturn;
+	}
+
+	public int size() {
+		return paths.size();
+	}
+
+	/**
+	 * Stops loading images. Images which are being decoded are discarded
+	 */
+	public synchronized void close() {
+		executor.shutdownNow();
+		pending.clear();
+		nextReturn = paths.size();
+	}
+}
@@ -1,9 +1,17 @@
 package pyboof;
 
+import boofcv.abst.feature.dense.DescribeImageDense;
+import boofcv.abst.feature.detdesc.DetectDescribePoint;
+import boofcv.struct.feature.TupleDesc;
+import boofcv.struct.feature.TupleDesc_B;
+import boofcv.struct.feature.TupleDesc_F32;
 import boofcv.struct.feature.TupleDesc_F64;
-import boofcv.struct.image.GrayU8;
-import boofcv.struct.image.GrayF32;
-import boofcv.struct.image.InterleavedU8;
+import boofcv.core.image.GConvertImage;
+import boofcv.struct.image.ImageBase;
+import boofcv.struct.image.ImageGray;
+import boofcv.struct.image.ImageInterleaved;
+import boofcv.struct.image.ImageMultiBand;
+import boofcv.struct.image.ImageType;
 import boofcv.struct.image.Planar;
 import georegression.struct.point.*;
 import boofcv.struct.geo.AssociatedPair;
@@ -14,21 +22,92 @@ import java.io.RandomAccessFile;
 import java.lang.reflect.Array;
 import java.nio.ByteBuffer;
 import java.nio.ByteOrder;
-import java.nio.MappedByteBuffer;
+import java.nio.DoubleBuffer;
+import java.nio.FloatBuffer;
+import java.nio.IntBuffer;
+import java.nio.LongBuffer;
+import java.nio.ShortBuffer;
 import java.nio.channels.FileChannel;
 import java.util.List;
+import java.util.function.IntFunction;
 
 /**
+ * Memory mapped file which is shared with Python. Everything is encoded using the host's native byte order so that
+ * arrays can be copied in bulk on both sides. The file starts with a region header, which Python uses to verify
+ * that both sides are speaking the same protocol, and is followed by fixed size slots. Each slot holds one
+ * payload, so a new input can be written while the output of a previous call is still being read. Slots grow on
+ * demand, up to a limit, so that large payloads can be sent in a single transfer. Every payload header is padded to
+ * a multiple of 8 bytes so that the data after it is aligned.
+ *
+ * If shared files aren't allowed the same layout is kept in a heap buffer instead and each payload is copied
+ * across as a byte array in a single call. See {@link #setPayload}.
+ *
  * @author Peter Abeles
  */
 public class BoofMemoryMapped {
-	MappedByteBuffer mmf;
+	/** Version of the encoding. Must match MMAP_PROTOCOL_VERSION in Python */
+	public static final int PROTOCOL_VERSION = 8;
+	/** Identifies the file as a PyBoof memory mapped file. "PBMM" */
+	public static final int MAGIC = 0x50424D4D;
+	/** Written in native order so that the reader can verify the byte order */
+	public static final int BYTE_ORDER_MARK = 0xFEFF;
+	/** Number of bytes reserved for the region header. Slots start after it */
+	public static final int REGION_BYTES = 64;
+	/** Largest payload header. Used when computing how large a slot needs to be */
+	public static final int MAX_HEADER_BYTES = 16;
+	/** Location in the region header of the total nanoseconds spent computing inside of entry points */
+	public static final int COMPUTE_NANOS_OFFSET = 24;
+	/** Location in the region header of the total number of payload bytes written by Java */
+	public static final int WRITTEN_BYTES_OFFSET = 32;
+	/** Location in the region header of the type of the last payload written by Java */
+	public static final int LAST_TYPE_OFFSET = 40;
+	/** Location in an image payload's header of the image family */
+	public static final int FAMILY_OFFSET = 2;
+
+	/** Null if the slots are stored in the JVM's heap instead of a file */
+	RandomAccessFile file;
+	/** Either the memory mapped file or a heap buffer with the same layout */
+	volatile ByteBuffer mmf;
+
+	/** Number of slots the file has been split into */
+	int numSlots;
+	/** Size of each slot in bytes */
+	volatile int slotBytes;
+	/** Slots are not allowed to grow larger than this */
+	int maxSlotBytes;
+
+	/** Size in bytes of the last payload Java wrote into each slot */
+	int[] payloadBytes;
+
+	/** Used to convert between planar images and the interleaved encoding */
+	ImageInterleaved<?> work;
 
 	public BoofMemoryMapped( String filePath , int sizeMB ) {
+		this(filePath, sizeMB, 1, sizeMB);
+	}
+
+	/**
+	 * @param filePath Path to the file which is memory mapped
+	 * @param slotSizeMB Initial size of each slot in megabytes
+	 * @param numSlots Number of slots. Each slot can hold one payload
+	 * @param maxSlotSizeMB Slots will grow on demand up to this size in megabytes
+	 */
+	public BoofMemoryMapped( String filePath , int slotSizeMB , int numSlots , int maxSlotSizeMB ) {
+		if( numSlots < 1 )
+			throw new IllegalArgumentException("Must have at least one slot");
+		if( maxSlotSizeMB < slotSizeMB )
+			throw new IllegalArgumentException("Maximum slot size is less than the initial size");
+		long size = fileSize(numSlots, (long)slotSizeMB*1024*1024);
+
+		this.numSlots = numSlots;
+		this.slotBytes = slotSizeMB*1024*1024;
+		this.maxSlotBytes = (int)Math.min((Integer.MAX_VALUE-REGION_BYTES)/numSlots, (long)maxSlotSizeMB*1024*1024);
+		this.payloadBytes = new int[numSlots];
 		try {
-			int size = sizeMB*1024*1024;
-			mmf = new RandomAccessFile(filePath, "rw")
-					.getChannel().map(FileChannel.MapMode.READ_WRITE, 0, size );
+			file = new RandomAccessFile(filePath, "rw");
+			mmf = file.getChannel().map(FileChannel.MapMode.READ_WRITE, 0, size );
+			mmf.order(ByteOrder.nativeOrder());
+			writeRegionHeader();
 //			System.out.println("Created mmap file "+filePath+" size "+sizeMB+" MB");
 //			System.out.println("limit.  Requested "+size+"  found "+mmf.limit());
 		} catch (IOException e) {
@@ -36,47 +115,317 @@ public class BoofMemoryMapped {
 		}
 	}
 
+	/**
+	 * Stores the slots in the JVM's heap instead of a shared file. Payloads are copied to and from Python as byte
+	 * arrays with {@link #setPayload} and {@link #getPayload}. Used when shared files aren't allowed.
+	 *
+	 * @param slotBytes Initial size of each slot in bytes
+	 * @param numSlots Number of slots. Each slot can hold one payload
+	 * @param maxSlotSizeMB Slots will grow on demand up to this size in megabytes
+	 */
+	public BoofMemoryMapped( int slotBytes , int numSlots , int maxSlotSizeMB ) {
+		if( numSlots < 1 )
+			throw new IllegalArgumentException("Must have at least one slot");
+		this.numSlots = numSlots;
+		this.maxSlotBytes = (int)Math.min((Integer.MAX_VALUE-REGION_BYTES)/numSlots, (long)maxSlotSizeMB*1024*1024);
+		this.slotBytes = Math.min(maxSlotBytes, (slotBytes+7)/8*8);
+		this.payloadBytes = new int[numSlots];
+		mmf = ByteBuffer.allocate((int)fileSize(numSlots, this.slotBytes)).order(ByteOrder.nativeOrder());
+		writeRegionHeader();
+	}
+
+	static long fileSize( int numSlots , long slotBytes ) {
+		long size = REGION_BYTES + numSlots*slotBytes;
+		if( size > Integer.MAX_VALUE )
+			throw new IllegalArgumentException("Memory mapped file can't be larger than 2 GB. size="+size);
+		return size;
+	}
+
+	void writeRegionHeader() {
+		mmf.putInt(0, MAGIC);
+		mmf.putShort(4, (short)PROTOCOL_VERSION);
+		mmf.putShort(6, (short)BYTE_ORDER_MARK);
+		mmf.putInt(8, numSlots);
+		mmf.putInt(12, slotBytes);
+	}
+
+	/**
+	 * Closes the file. The mapping itself is released once it's garbage collected
+	 */
+	public synchronized void close() {
+		if( file == null )
+			return;
+		try {
+			file.close();
+		} catch (IOException e) {
+			throw new RuntimeException(e);
+		}
+	}
+
+	public int getNumSlots() {
+		return numSlots;
+	}
+
+	public int getSlotBytes() {
+		return slotBytes;
+	}
+
+	public int getMaxSlotBytes() {
+		return maxSlotBytes;
+	}
+
+	/**
+	 * Makes sure every slot can hold at least the requested number of bytes. If not, the file is enlarged and
+	 * remapped, and then the contents of each slot are moved to their new location. The new slot size is written
+	 * into the region header so that Python knows it needs to remap too. Transfers should not be in progress
+	 * while a resize is happening.
+	 *
+	 * @param requiredBytes Number of bytes a slot needs to hold
+	 * @return Size of each slot in bytes after resizing
+	 */
+	public synchronized int ensureCapacity( long requiredBytes ) {
+		if( requiredBytes <= slotBytes )
+			return slotBytes;
+		if( requiredBytes > maxSlotBytes )
+			throw new IllegalArgumentException("Payload of "+requiredBytes+" bytes exceeds the maximum slot size of "+
+					maxSlotBytes+" bytes. Increase max_size_mb in init_pyboof()");
+
+		// Grow geometrically so that a slowly increasing payload doesn't cause a resize every call
+		long desired = Math.max(requiredBytes, Math.min(maxSlotBytes, 2L*slotBytes));
+		// Keep slots aligned to 8 bytes
+		int larger = (int)Math.min(maxSlotBytes, (desired+7)/8*8);
+
+		try {
+			long size = fileSize(numSlots, larger);
+			ByteBuffer resized;
+			if( file == null ) {
+				// Heap buffers can't grow in place. Copy the old contents to the start then move slots like a file
+				resized = ByteBuffer.allocate((int)size);
+				resized.put(mmf.array(), 0, mmf.capacity());
+			} else {
+				file.setLength(size);
+				resized = file.getChannel().map(FileChannel.MapMode.READ_WRITE, 0, size);
+			}
+			resized.order(ByteOrder.nativeOrder());
+
+			// Move slots from last to first so that a slot is never overwritten before it has been moved
+			byte[] work = new byte[slotBytes];
+			for (int slot = numSlots - 1; slot > 0; slot--) {
+				ByteBuffer src = resized.duplicate();
+				src.position(REGION_BYTES + slot*slotBytes);
+				src.get(work);
+				ByteBuffer dst = resized.duplicate();
+				dst.position(REGION_BYTES + slot*larger);
+				dst.put(work);
+			}
+
+			mmf = resized;
+			slotBytes = larger;
+			writeRegionHeader();
+		} catch (IOException e) {
+			throw new RuntimeException(e);
+		}
+		return slotBytes;
+	}
+
+	/**
+	 * Adds to the compute time in the region header. Python reads it to tell how long a call spent computing
+	 * versus communicating
+	 */
+	public synchronized void addComputeNanos( long nanos ) {
+		ByteBuffer mmf = this.mmf;
+		mmf.putLong(COMPUTE_NANOS_OFFSET, mmf.getLong(COMPUTE_NANOS_OFFSET) + nanos);
+	}
+
+	/**
+	 * Keeps track of how much data Java has written in the region header
+	 */
+	synchronized void recordWrite( Type type , long payloadBytes ) {
+		ByteBuffer mmf = this.mmf;
+		mmf.putLong(WRITTEN_BYTES_OFFSET, mmf.getLong(WRITTEN_BYTES_OFFSET) + payloadBytes);
+		mmf.putShort(LAST_TYPE_OFFSET, (short)type.ordinal());
+	}
+
+	/**
+	 * Returns a buffer which only covers the specified slot. Every call gets its own position so that
+	 * different slots can be accessed at the same time
+	 */
+	ByteBuffer slot( int slot ) {
+		if( slot < 0 || slot >= numSlots )
+			throw new IllegalArgumentException("Invalid slot "+slot+" num_slots="+numSlots);
+		ByteBuffer mmf = this.mmf;
+		int slotBytes = this.slotBytes;
+		int offset = REGION_BYTES + slot*slotBytes;
+		ByteBuffer buffer = mmf.duplicate();
+		buffer.position(offset);
+		buffer.limit(offset+slotBytes);
+		return buffer.slice().order(ByteOrder.nativeOrder());
+	}
+
+	/**
+	 * Moves to the start of the slot and makes sure the payload is of the expected type
+	 */
+	ByteBuffer startRead( int slot , Type expected ) {
+		ByteBuffer buffer = slot(slot);
+		int found = buffer.getShort();
+		buffer.getShort(); // padding
+		if( found != expected.ordinal() ) {
+			throw new RuntimeException("Memmap not of type "+expected+" found "+found);
+		}
+		return buffer;
+	}
+
+	/**
+	 * Grows the slots if needed, moves to the start of the slot, and writes the payload type
+	 *
+	 * @param payloadBytes Number of bytes which will be written after the header
+	 */
+	ByteBuffer startWrite( int slot , Type type , long payloadBytes ) {
+		ensureCapacity(MAX_HEADER_BYTES + payloadBytes);
+		recordWrite(type, payloadBytes);
+		ByteBuffer buffer = slot(slot);
+		this.payloadBytes[slot] = (int)(MAX_HEADER_BYTES + payloadBytes);
+		buffer.putShort((short)type.ordinal());
+		buffer.putShort((short)0); // padding
+		return buffer;
+	}
+
+	/**
+	 * Copies a payload which Python encoded into a byte array into the slot. Used instead of writing to the shared
+	 * file when there isn't one
+	 */
+	public void setPayload( int slot , byte[] payload ) {
+		ensureCapacity(payload.length);
+		slot(slot).put(payload);
+	}
+
+	/**
+	 * Returns a copy of the last payload Java wrote into the slot. The copy can be a few bytes longer than the
+	 * payload since headers vary in size. See {@link #setPayload}
+	 */
+	public byte[] getPayload( int slot ) {
+		ByteBuffer buffer = slot(slot);
+		byte[] payload = new byte[Math.min(payloadBytes[slot], buffer.remaining())];
+		buffer.get(payload);
+		return payload;
+	}
+
 	/**
 	 * Reads elements from the memory map file and appends them to the current list
 	 * @param list List in which the elements are appended into
 	 */
-	public void read_List_TupleF64(List<TupleDesc_F64> list ) {
-		mmf.position(0);
-		if( mmf.getShort() != Type.LIST_TUPLE_F64.ordinal() ) {
-			throw new RuntimeException("Not a list of tuples!");
-		}
-		int numElements = mmf.getInt();
-		int dof = mmf.getInt();
+	public void read_List_TupleF64( int slot , List<TupleDesc_F64> list ) {
+		ByteBuffer buffer = startRead(slot, Type.LIST_TUPLE_F64);
+		int numElements = buffer.getInt();
+		int dof = buffer.getInt();
+		buffer.getInt(); // padding
 
-		byte data[] = new byte[8*dof];
-		ByteBuffer bb = ByteBuffer.wrap(data);
+		DoubleBuffer data = buffer.asDoubleBuffer();
 		for (int i = 0; i < numElements; i++) {
-			mmf.get(data,0,data.length);
 			TupleDesc_F64 desc = new TupleDesc_F64(dof);
-			for (int j = 0; j < dof; j++) {
-				desc.data[j] = bb.getDouble(j*8);
-			}
+			data.get(desc.data, 0, dof);
 			list.add( desc );
 		}
 	}
 
-	public void write_List_TupleF64(List<TupleDesc_F64> list , int startIndex ) {
+	public void write_List_TupleF64( int slot , List<TupleDesc_F64> list , int startIndex ) {
 		int DOF = list.size()>0?list.get(0).size() : 0;
 
-		int maxElements = (mmf.limit()-100)/(8*DOF);
-		int numElements = Math.min(list.size(),maxElements);
+		int numElements = list.size()-startIndex;
 
-		mmf.position(0);
-		mmf.putShort((short)Type.LIST_TUPLE_F64.ordinal());
-		mmf.putInt(numElements);
-		mmf.putInt(DOF);
+		ByteBuffer buffer = startWrite(slot, Type.LIST_TUPLE_F64, 8L*DOF*numElements);
+		buffer.putInt(numElements);
+		buffer.putInt(DOF);
+		buffer.putInt(0); // padding
 
+		DoubleBuffer data = buffer.asDoubleBuffer();
 		for (int i = 0; i < numElements; i++) {
-			TupleDesc_F64 desc = list.get(startIndex+i);
+			data.put(list.get(startIndex+i).data, 0, DOF);
+		}
+	}
+
+	/**
+	 * Reads elements from the memory map file and appends them to the current list
+	 * @param list List in which the elements are appended into
+	 */
+	public void read_List_TupleF32( int slot , List<TupleDesc_F32> list ) {
+		ByteBuffer buffer = startRead(slot, Type.LIST_TUPLE_F32);
+		int numElements = buffer.getInt();
+		int dof = buffer.getInt();
+		buffer.getInt(); // padding
+
+		FloatBuffer data = buffer.asFloatBuffer();
+		for (int i = 0; i < numElements; i++) {
+			TupleDesc_F32 desc = new TupleDesc_F32(dof);
+			data.get(desc.data, 0, dof);
+			list.add( desc );
+		}
+	}
+
+	public void write_List_TupleF32( int slot , List<TupleDesc_F32> list , int startIndex ) {
+		int DOF = list.size()>0?list.get(0).size() : 0;
 
-			for (int j = 0; j < DOF; j++) {
-				mmf.putDouble(desc.data[j]);
+		int numElements = list.size()-startIndex;
+
+		ByteBuffer buffer = startWrite(slot, Type.LIST_TUPLE_F32, 4L*DOF*numElements);
+		buffer.putInt(numElements);
+		buffer.putInt(DOF);
+		buffer.putInt(0); // padding
+
+		FloatBuffer data = buffer.asFloatBuffer();
+		for (int i = 0; i < numElements; i++) {
+			data.put(list.get(startIndex+i).data, 0, DOF);
+		}
+	}
+
+	/**
+	 * Number of bytes needed to store a binary descriptor with packed bits
+	 */
+	static int packedBytes( int numBits ) {
+		return (numBits+7)/8;
+	}
+
+	/**
+	 * Reads binary descriptors from the memory map file and appends them to the current list. Each descriptor
+	 * is stored as packed bits, little endian, with bit 'i' in byte 'i/8'.
+	 * @param list List in which the elements are appended into
+	 */
+	public void read_List_TupleB( int slot , List<TupleDesc_B> list ) {
+		ByteBuffer buffer = startRead(slot, Type.LIST_TUPLE_B);
+		int numElements = buffer.getInt();
+		int numBits = buffer.getInt();
+		buffer.getInt(); // padding
+
+		int numBytes = packedBytes(numBits);
+		byte[] row = new byte[numBytes];
+		for (int i = 0; i < numElements; i++) {
+			TupleDesc_B desc = new TupleDesc_B(numBits);
+			buffer.get(row, 0, numBytes);
+			for (int j = 0; j < numBytes; j++) {
+				desc.data[j/4] |= (row[j] & 0xFF) << (8*(j%4));
 			}
+			list.add( desc );
+		}
+	}
+
+	public void write_List_TupleB( int slot , List<TupleDesc_B> list , int startIndex ) {
+		int numBits = list.size()>0?list.get(0).numBits : 0;
+		int numBytes = packedBytes(numBits);
+
+		int numElements = list.size()-startIndex;
+
+		ByteBuffer buffer = startWrite(slot, Type.LIST_TUPLE_B, (long)numBytes*numElements);
+		buffer.putInt(numElements);
+		buffer.putInt(numBits);
+		buffer.putInt(0); // padding
+
+		byte[] row = new byte[numBytes];
+		for (int i = 0; i < numElements; i++) {
+			int[] data = list.get(startIndex+i).data;
+			for (int j = 0; j < numBytes; j++) {
+				row[j] = (byte)(data[j/4] >>> (8*(j%4)));
+			}
+			buffer.put(row, 0, numBytes);
 		}
 	}
 
@@ -84,445 +433,685 @@ public class BoofMemoryMapped {
 	 * Reads elements from the memory map file and appends them to the current list
 	 * @param list List in which the elements are appended into
 	 */
-	public void read_List_Point2D(List list, int type_ordinal ) {
-	    Type type = Type.values()[type_ordinal];
-	    mmf.position(0);
-		if( mmf.getShort() != type.ordinal() ) {
-			throw new RuntimeException("Memmap not of type "+type);
-		}
-		int numBytes = type.getDataType().getNumBits()/8;
-		int numElements = mmf.getInt();
-		byte data[] = new byte[numBytes*2];
-		ByteBuffer bb = ByteBuffer.wrap(data);
-
-       switch( type ) {
-            case LIST_POINT2D_U16:
-            case LIST_POINT2D_S16: {
-                    for (int i = 0; i < numElements; i++) {
-                        mmf.get(data,0,data.length);
-                        Point2D_I16 p = new Point2D_I16();
-                        p.x = bb.getShort(0);
-                        p.y = bb.getShort(2);
-                        list.add( p );
-                    }
-                } break;
-
-            case LIST_POINT2D_S32: {
-                    for (int i = 0; i < numElements; i++) {
-                        mmf.get(data,0,data.length);
-                        Point2D_I32 p = new Point2D_I32();
-                        p.x = bb.getInt(0);
-                        p.y = bb.getInt(4);
-                        list.add( p );
-                    }
-                } break;
-
-            case LIST_POINT2D_F32: {
-                    for (int i = 0; i < numElements; i++) {
-                        mmf.get(data,0,data.length);
-                        Point2D_F32 p = new Point2D_F32();
-                        p.x = bb.getFloat(0);
-                        p.y = bb.getFloat(4);
-                        list.add( p );
-                    }
-                } break;
-
-            case LIST_POINT2D_F64: {
-                for (int i = 0; i < numElements; i++) {
-                    mmf.get(data,0,data.length);
-                    Point2D_F64 p = new Point2D_F64();
-                    p.x = bb.getDouble(0);
-                    p.y = bb.getDouble(8);
-                    list.add( p );
-                }
-            } break;
-        }
-	}
-
-    public void write_List_Point2D(List<?> list , int type_ordinal , int startIndex ) {
-        Type type = Type.values()[type_ordinal];
-
-        int numBytes = type.getDataType().getNumBits()/8;
-
-        int maxElements = (mmf.limit()-100)/(numBytes*2);
-		int numElements = Math.min(list.size(),maxElements);
-
-		mmf.position(0);
-		mmf.putShort((short)type.ordinal());
-		mmf.putInt(numElements);
-
-        switch( type ) {
-            case LIST_POINT2D_U16:
-            case LIST_POINT2D_S16: {
-                    for (int i = 0; i < numElements; i++) {
-                        Point2D_I16 p = (Point2D_I16)list.get(startIndex+i);
-
-                        mmf.putShort(p.x);
-                        mmf.putShort(p.y);
-                    }
-                } break;
-
-            case LIST_POINT2D_S32: {
-                    for (int i = 0; i < numElements; i++) {
-                        Point2D_I32 p = (Point2D_I32)list.get(startIndex+i);
-
-                        mmf.putInt(p.x);
-                        mmf.putInt(p.y);
-                    }
-                } break;
-
-            case LIST_POINT2D_F32: {
-                    for (int i = 0; i < numElements; i++) {
-                        Point2D_F32 p = (Point2D_F32)list.get(startIndex+i);
-
-                        mmf.putFloat(p.x);
-                        mmf.putFloat(p.y);
-                    }
-                } break;
-
-            case LIST_POINT2D_F64: {
-                for (int i = 0; i < numElements; i++) {
-                    Point2D_F64 p = (Point2D_F64)list.get(startIndex+i);
-
-                    mmf.putDouble(p.x);
-                    mmf.putDouble(p.y);
-                }
-            } break;
-        }
-    }
-
-	public void read_List_Point3D(List list, int type_ordinal ) {
+	public void read_List_Point2D( int slot , List list, int type_ordinal ) {
 		Type type = Type.values()[type_ordinal];
-		mmf.position(0);
-		if( mmf.getShort() != type.ordinal() ) {
-			throw new RuntimeException("Memmap not of type "+type);
+		ByteBuffer buffer = startRead(slot, type);
+		int numElements = buffer.getInt();
+
+		switch( type ) {
+			case LIST_POINT2D_U16:
+			case LIST_POINT2D_S16: {
+				ShortBuffer data = buffer.asShortBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_I16 p = new Point2D_I16();
+					p.x = data.get();
+					p.y = data.get();
+					list.add( p );
+				}
+			} break;
+
+			case LIST_POINT2D_S32: {
+				IntBuffer data = buffer.asIntBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_I32 p = new Point2D_I32();
+					p.x = data.get();
+					p.y = data.get();
+					list.add( p );
+				}
+			} break;
+
+			case LIST_POINT2D_F32: {
+				FloatBuffer data = buffer.asFloatBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_F32 p = new Point2D_F32();
+					p.x = data.get();
+					p.y = data.get();
+					list.add( p );
+				}
+			} break;
+
+			case LIST_POINT2D_F64: {
+				DoubleBuffer data = buffer.asDoubleBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_F64 p = new Point2D_F64();
+					p.x = data.get();
+					p.y = data.get();
+					list.add( p );
+				}
+			} break;
+
+			default:
+				throw new RuntimeException("Not a 2D point list type "+type);
 		}
+	}
+
+	public void write_List_Point2D( int slot , List<?> list , int type_ordinal , int startIndex ) {
+		Type type = Type.values()[type_ordinal];
+
 		int numBytes = type.getDataType().getNumBits()/8;
-		int numElements = mmf.getInt();
-		byte[] data = new byte[numBytes*3];
-		ByteBuffer bb = ByteBuffer.wrap(data);
+		int numElements = list.size()-startIndex;
+
+		ByteBuffer buffer = startWrite(slot, type, (long)numBytes*2*numElements);
+		buffer.putInt(numElements);
+
+		switch( type ) {
+			case LIST_POINT2D_U16:
+			case LIST_POINT2D_S16: {
+				ShortBuffer data = buffer.asShortBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_I16 p = (Point2D_I16)list.get(startIndex+i);
+					data.put(p.x);
+					data.put(p.y);
+				}
+			} break;
+
+			case LIST_POINT2D_S32: {
+				IntBuffer data = buffer.asIntBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_I32 p = (Point2D_I32)list.get(startIndex+i);
+					data.put(p.x);
+					data.put(p.y);
+				}
+			} break;
+
+			case LIST_POINT2D_F32: {
+				FloatBuffer data = buffer.asFloatBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_F32 p = (Point2D_F32)list.get(startIndex+i);
+					data.put(p.x);
+					data.put(p.y);
+				}
+			} break;
+
+			case LIST_POINT2D_F64: {
+				DoubleBuffer data = buffer.asDoubleBuffer();
+				for (int i = 0; i < numElements; i++) {
+					Point2D_F64 p = (Point2D_F64)list.get(startIndex+i);
+					data.put(p.x);
+					data.put(p.y);
+				}
+			} break;
+
+			default:
+				throw new RuntimeException("Not a 2D point list type "+type);
+		}
+	}
+
+	public void read_List_Point3D( int slot , List list, int type_ordinal ) {
+		Type type = Type.values()[type_ordinal];
+		ByteBuffer buffer = startRead(slot, type);
+		int numElements = buffer.getInt();
 
 		switch( type ) {
 			case LIST_POINT3D_F32: {
+				FloatBuffer data = buffer.asFloatBuffer();
 				for (int i = 0; i < numElements; i++) {
-					mmf.get(data,0,data.length);
 					Point3D_F32 p = new Point3D_F32();
-					p.x = bb.getFloat(0);
-					p.y = bb.getFloat(4);
-					p.z = bb.getFloat(8);
+					p.x = data.get();
+					p.y = data.get();
+					p.z = data.get();
 					list.add( p );
 				}
 			} break;
 
 			case LIST_POINT3D_F64: {
+				DoubleBuffer data = buffer.asDoubleBuffer();
 				for (int i = 0; i < numElements; i++) {
-					mmf.get(data,0,data.length);
 					Point3D_F64 p = new Point3D_F64();
-					p.x = bb.getDouble(0 );
-					p.y = bb.getDouble(8 );
-					p.z = bb.getDouble(16);
+					p.x = data.get();
+					p.y = data.get();
+					p.z = data.get();
 					list.add( p );
 				}
 			} break;
+
+			default:
+				throw new RuntimeException("Not a 3D point list type "+type);
 		}
 	}
 
-	public void write_List_Point3D(List<?> list , int type_ordinal , int startIndex ) {
+	public void write_List_Point3D( int slot , List<?> list , int type_ordinal , int startIndex ) {
 		Type type = Type.values()[type_ordinal];
 
 		int numBytes = type.getDataType().getNumBits()/8;
+		int numElements = list.size()-startIndex;
 
-		int maxElements = (mmf.limit()-100)/(numBytes*3);
-		int numElements = Math.min(list.size(),maxElements);
-
-		mmf.position(0);
-		mmf.putShort((short)type.ordinal());
-		mmf.putInt(numElements);
+		ByteBuffer buffer = startWrite(slot, type, (long)numBytes*3*numElements);
+		buffer.putInt(numElements);
 
 		switch( type ) {
 			case LIST_POINT3D_F32: {
+				FloatBuffer data = buffer.asFloatBuffer();
 				for (int i = 0; i < numElements; i++) {
 					Point3D_F32 p = (Point3D_F32)list.get(startIndex+i);
-
-					mmf.putFloat(p.x);
-					mmf.putFloat(p.y);
-					mmf.putFloat(p.z);
+					data.put(p.x);
+					data.put(p.y);
+					data.put(p.z);
 				}
 			} break;
 
 			case LIST_POINT3D_F64: {
+				DoubleBuffer data = buffer.asDoubleBuffer();
 				for (int i = 0; i < numElements; i++) {
 					Point3D_F64 p = (Point3D_F64)list.get(startIndex+i);
-
-					mmf.putDouble(p.x);
-					mmf.putDouble(p.y);
-					mmf.putDouble(p.z);
+					data.put(p.x);
+					data.put(p.y);
+					data.put(p.z);
 				}
 			} break;
+
+			default:
+				throw new RuntimeException("Not a 3D point list type "+type);
 		}
 	}
 
 
-	public void read_List_AssociatedPair_F64(List<AssociatedPair> list ) {
-		mmf.position(0);
-		if( mmf.getShort() != Type.LIST_ASSOCIATED_PAIR_F64.ordinal() ) {
-			throw new RuntimeException("Not a list of AssociatedPair!");
-		}
-		int numElements = mmf.getInt();
+	public void read_List_AssociatedPair_F64( int slot , List<AssociatedPair> list ) {
+		ByteBuffer buffer = startRead(slot, Type.LIST_ASSOCIATED_PAIR_F64);
+		int numElements = buffer.getInt();
 
-		byte data[] = new byte[8*4];
-		ByteBuffer bb = ByteBuffer.wrap(data);
+		DoubleBuffer data = buffer.asDoubleBuffer();
 		for (int i = 0; i < numElements; i++) {
-			mmf.get(data,0,data.length);
 			AssociatedPair p = new AssociatedPair();
-			p.p1.x = bb.getDouble(0);
-			p.p1.y = bb.getDouble(8);
-			p.p2.x = bb.getDouble(16);
-			p.p2.y = bb.getDouble(24);
+			p.p1.x = data.get();
+			p.p1.y = data.get();
+			p.p2.x = data.get();
+			p.p2.y = data.get();
 			list.add( p );
 		}
 	}
 
-	public void write_List_AssociatedPair_F64(List<AssociatedPair> list , int startIndex ) {
+	public void write_List_AssociatedPair_F64( int slot , List<AssociatedPair> list , int startIndex ) {
+		int numElements = list.size()-startIndex;
 
-		int maxElements = (mmf.limit()-100)/(8*4);
-		int numElements = Math.min(list.size(),maxElements);
-
-		mmf.position(0);
-		mmf.putShort((short)Type.LIST_ASSOCIATED_PAIR_F64.ordinal());
-		mmf.putInt(numElements);
+		ByteBuffer buffer = startWrite(slot, Type.LIST_ASSOCIATED_PAIR_F64, 8L*4*numElements);
+		buffer.putInt(numElements);
 
+		DoubleBuffer data = buffer.asDoubleBuffer();
 		for (int i = 0; i < numElements; i++) {
 			AssociatedPair p = list.get(startIndex+i);
 
-			mmf.putDouble(p.p1.x);
-			mmf.putDouble(p.p1.y);
-			mmf.putDouble(p.p2.x);
-			mmf.putDouble(p.p2.y);
+			data.put(p.p1.x);
+			data.put(p.p1.y);
+			data.put(p.p2.x);
+			data.put(p.p2.y);
 		}
 	}
 
-	public void writeImage_U8(GrayU8 image ) {
-		mmf.position(0);
-		mmf.putShort((short)Type.IMAGE_U8.ordinal());
-		mmf.putInt(image.getWidth());
-		mmf.putInt(image.getHeight());
-		mmf.putInt(1);
-		for (int y = 0; y < image.height; y++) {
-			int start = y*image.stride + image.startIndex;
-			mmf.put(image.data,start,image.width);
+	/**
+	 * Writes an image of any supported type. The header stores the image's family and pixels are written row by
+	 * row with the bands of each pixel next to each other, i.e. the same as an ndarray with shape
+	 * (height, width, bands). Planar images are interleaved first.
+	 */
+	public void writeImage( int slot , ImageBase<?> image ) {
+		ImageType<?> imageType = image.getImageType();
+		Type type = imageType(imageType.getDataType());
+		int numBands = numBands(image);
+		int width = image.width;
+		int height = image.height;
+
+		ByteBuffer buffer = startWrite(slot, type,
+				(long)width*height*numBands*imageType.getDataType().getNumBits()/8);
+		buffer.put(FAMILY_OFFSET, (byte)imageType.getFamily().ordinal());
+		buffer.putInt(width);
+		buffer.putInt(height);
+		buffer.putInt(numBands);
+
+		if( image instanceof Planar ) {
+			synchronized( this ) {
+				ImageInterleaved<?> work = workInterleaved(imageType.getDataType(), width, height, numBands);
+				GConvertImage.convert(image, work);
+				putRows(buffer, work._getData(), 0, work.stride, width*numBands, height);
+			}
+		} else if( image instanceof ImageGray ) {
+			ImageGray<?> gray = (ImageGray<?>)image;
+			putRows(buffer, gray._getData(), gray.startIndex, gray.stride, width, height);
+		} else {
+			ImageInterleaved<?> inter = (ImageInterleaved<?>)image;
+			putRows(buffer, inter._getData(), inter.startIndex, inter.stride, width*numBands, height);
 		}
 	}
 
-	public void writeImage_PU8_as_IU8( Planar<GrayU8> image ) {
-		mmf.position(0);
-		mmf.putShort((short)Type.IMAGE_U8.ordinal());
-		mmf.putInt(image.getWidth());
-		mmf.putInt(image.getHeight());
-		mmf.putInt(image.getNumBands());
+	/**
+	 * Reads an image of any supported type. See {@link #writeImage}
+	 *
+	 * @param image (Optional) Storage for the image. Must have the same data type as the image in the slot, but
+	 *              can be of any family. If null a new image is created using the family in the header
+	 */
+	public ImageBase<?> readImage( int slot , ImageBase<?> image ) {
+		ByteBuffer buffer = slot(slot);
+		int found = buffer.getShort();
+		ImageType.Family family = ImageType.Family.values()[buffer.get()];
+		buffer.get(); // padding
+		int width = buffer.getInt();
+		int height = buffer.getInt();
+		int numBands = buffer.getInt();
+
+		if( found < 0 || found >= Type.values().length || !Type.values()[found].isImage() )
+			throw new RuntimeException("Memmap does not contain an image. found "+found);
+		ImageDataType dataType = Type.values()[found].getDataType();
+
+		if( image == null ) {
+			image = new ImageType<>(family, dataType, numBands).createImage(width, height);
+		} else if( image.getImageType().getDataType() != dataType ) {
+			throw new IllegalArgumentException("Image is "+image.getImageType().getDataType()+" not "+dataType);
+		} else if( image.width != width || image.height != height || numBands(image) != numBands ) {
+			// Subimages can't be reshaped, so only reshape when needed
+			if( image instanceof ImageMultiBand )
+				((ImageMultiBand<?>)image).reshape(width, height, numBands);
+			else if( numBands != 1 )
+				throw new IllegalArgumentException("Expected single band image not "+numBands);
+			else
+				image.reshape(width, height);
+		}
 
-		int pixelIndex = 0;
-		for (int y = 0; y < image.height; y++) {
-		    for (int x = 0; x < image.width; x++, pixelIndex++) {
-		        for( int band = 0; band < image.bands.length; band++ ) {
-		            mmf.put(image.bands[band].data[pixelIndex]);
-		        }
-		    }
+		if( image instanceof Planar ) {
+			synchronized( this ) {
+				ImageInterleaved<?> work = workInterleaved(dataType, width, height, numBands);
+				getRows(buffer, work._getData(), 0, work.stride, width*numBands, height);
+				GConvertImage.convert(work, image);
+			}
+		} else if( image instanceof ImageGray ) {
+			ImageGray<?> gray = (ImageGray<?>)image;
+			getRows(buffer, gray._getData(), gray.startIndex, gray.stride, width, height);
+		} else {
+			ImageInterleaved<?> inter = (ImageInterleaved<?>)image;
+			getRows(buffer, inter._getData(), inter.startIndex, inter.stride, width*numBands, height);
 		}
+		return image;
 	}
 
-	public void writeImage_F32(GrayF32 image ) {
-		mmf.position(0);
-		mmf.putShort((short)Type.IMAGE_F32.ordinal());
-		mmf.putInt(image.getWidth());
-		mmf.putInt(image.getHeight());
-		mmf.putInt(1);
+	/**
+	 * Writes a rectangular region of the image. The region is a subimage, so pixels are only copied once
+	 *
+	 * @param band If >= 0 then only this band of a planar image is written, otherwise all the bands
+	 */
+	public void writeRegion( int slot , ImageBase<?> image , int x0 , int y0 , int x1 , int y1 , int band ) {
+		writeImage(slot, region(image, x0, y0, x1, y1, band));
+	}
 
-		ByteBuffer buffer = ByteBuffer.allocate(4 * image.width);
+	/**
+	 * Reads the image in the slot into a rectangular region of the image. The region's size is the size of the
+	 * image in the slot
+	 *
+	 * @param band If >= 0 then only this band of a planar image is read into, otherwise all the bands
+	 */
+	public void readRegion( int slot , ImageBase<?> image , int x0 , int y0 , int band ) {
+		ByteBuffer buffer = slot(slot);
+		int width = buffer.getInt(4);
+		int height = buffer.getInt(8);
+		readImage(slot, region(image, x0, y0, x0 + width, y0 + height, band));
+	}
 
-		for (int y = 0; y < image.height; y++) {
-			int start = y*image.stride + image.startIndex;
-			buffer.clear();
-			for (int x = 0; x < image.width; x++ ) {
-				buffer.putFloat(image.data[start+x]);
-			}
-			mmf.put(buffer.array(),0,image.width*4);
+	static ImageBase<?> region( ImageBase<?> image , int x0 , int y0 , int x1 , int y1 , int band ) {
+		if( band >= 0 ) {
+			if( !(image instanceof Planar) )
+				throw new IllegalArgumentException("A band can only be selected in planar images");
+			image = ((Planar<?>)image).getBand(band);
 		}
+		return image.subimage(x0, y0, x1, y1);
 	}
 
-	public GrayU8 readImage_U8(GrayU8 image ) {
-		mmf.position(0);
-		if( mmf.getShort() != Type.IMAGE_U8.ordinal() ) {
-			throw new RuntimeException("Not an image!");
-		}
-		int width = mmf.getInt();
-		int height = mmf.getInt();
-		int numBands = mmf.getInt();
-		if( numBands != 1 )
-			throw new RuntimeException("Expected single band image not "+numBands);
+	/**
+	 * Reads a single band image of whatever type is in the slot.
+	 *
+	 * @param image (Optional) Storage for the image. Must match the type in the slot. If null a new one is created
+	 */
+	public ImageGray<?> readImage_Gray( int slot , ImageGray<?> image ) {
+		ImageBase<?> found = readImage(slot, image);
+		if( !(found instanceof ImageGray) )
+			throw new RuntimeException("Memmap does not contain a gray image");
+		return (ImageGray<?>)found;
+	}
 
-        if( image == null )
-            image = new GrayU8(width,height);
-        else
-    		image.reshape(width,height);
-		mmf.get(image.data,0,width*height);
+	/**
+	 * Returns an interleaved image which is used when converting planar images. Must be called while synchronized
+	 */
+	ImageInterleaved<?> workInterleaved( ImageDataType dataType , int width , int height , int numBands ) {
+		if( work == null || work.getImageType().getDataType() != dataType )
+			work = (ImageInterleaved<?>)new ImageType<>(ImageType.Family.INTERLEAVED, dataType, numBands).
+					createImage(width, height);
+		else
+			work.reshape(width, height, numBands);
+		return work;
+	}
 
-		return image;
+	static int numBands( ImageBase<?> image ) {
+		if( image instanceof ImageMultiBand )
+			return ((ImageMultiBand<?>)image).getNumBands();
+		return 1;
 	}
 
-	public GrayF32 readImage_F32(GrayF32 image ) {
-		mmf.position(0);
-		if( mmf.getShort() != Type.IMAGE_F32.ordinal() ) {
-			throw new RuntimeException("Not an image!");
+	/**
+	 * Copies rows from a primitive array into the buffer and advances the buffer's position
+	 */
+	static void putRows( ByteBuffer buffer , Object data , int startIndex , int stride , int rowLength , int height ) {
+		if( data instanceof byte[] ) {
+			for (int y = 0; y < height; y++)
+				buffer.put((byte[])data, startIndex + y*stride, rowLength);
+			return;
 		}
-		int width = mmf.getInt();
-		int height = mmf.getInt();
-		int numBands = mmf.getInt();
-		if( numBands != 1 )
-			throw new RuntimeException("Expected single band image not "+numBands);
-
-        if( image == null )
-            image = new GrayF32(width,height);
-        else
-    		image.reshape(width,height);
-
-		byte[] tmp = new byte[ width*height*4 ];
-		mmf.get(tmp,0,width*height);
-		image.data = new float[width*height];
-		ByteBuffer.wrap(tmp).order(ByteOrder.LITTLE_ENDIAN).asFloatBuffer().get(image.data);
-
-		return image;
+		int elementBytes;
+		if( data instanceof short[] ) {
+			ShortBuffer view = buffer.asShortBuffer();
+			for (int y = 0; y < height; y++)
+				view.put((short[])data, startIndex + y*stride, rowLength);
+			elementBytes = 2;
+		} else if( data instanceof int[] ) {
+			IntBuffer view = buffer.asIntBuffer();
+			for (int y = 0; y < height; y++)
+				view.put((int[])data, startIndex + y*stride, rowLength);
+			elementBytes = 4;
+		} else if( data instanceof long[] ) {
+			LongBuffer view = buffer.asLongBuffer();
+			for (int y = 0; y < height; y++)
+				view.put((long[])data, startIndex + y*stride, rowLength);
+			elementBytes = 8;
+		} else if( data instanceof float[] ) {
+			FloatBuffer view = buffer.asFloatBuffer();
+			for (int y = 0; y < height; y++)
+				view.put((float[])data, startIndex + y*stride, rowLength);
+			elementBytes = 4;
+		} else if( data instanceof double[] ) {
+			DoubleBuffer view = buffer.asDoubleBuffer();
+			for (int y = 0; y < height; y++)
+				view.put((double[])data, startIndex + y*stride, rowLength);
+			elementBytes = 8;
+		} else {
+			throw new IllegalArgumentException("Unsupported array type "+data.getClass().getSimpleName());
+		}
+		buffer.position(buffer.position() + elementBytes*rowLength*height);
 	}
 
-	public InterleavedU8 readImage_IU8( InterleavedU8 image ) {
-		mmf.position(0);
-		if( mmf.getShort() != Type.IMAGE_U8.ordinal() ) {
-			throw new RuntimeException("Not an image!");
+	/**
+	 * Copies rows from the buffer into a primitive array and advances the buffer's position
+	 */
+	static void getRows( ByteBuffer buffer , Object data , int startIndex , int stride , int rowLength , int height ) {
+		if( data instanceof byte[] ) {
+			for (int y = 0; y < height; y++)
+				buffer.get((byte[])data, startIndex + y*stride, rowLength);
+			return;
+		}
+		int elementBytes;
+		if( data instanceof short[] ) {
+			ShortBuffer view = buffer.asShortBuffer();
+			for (int y = 0; y < height; y++)
+				view.get((short[])data, startIndex + y*stride, rowLength);
+			elementBytes = 2;
+		} else if( data instanceof int[] ) {
+			IntBuffer view = buffer.asIntBuffer();
+			for (int y = 0; y < height; y++)
+				view.get((int[])data, startIndex + y*stride, rowLength);
+			elementBytes = 4;
+		} else if( data instanceof long[] ) {
+			LongBuffer view = buffer.asLongBuffer();
+			for (int y = 0; y < height; y++)
+				view.get((long[])data, startIndex + y*stride, rowLength);
+			elementBytes = 8;
+		} else if( data instanceof float[] ) {
+			FloatBuffer view = buffer.asFloatBuffer();
+			for (int y = 0; y < height; y++)
+				view.get((float[])data, startIndex + y*stride, rowLength);
+			elementBytes = 4;
+		} else if( data instanceof double[] ) {
+			DoubleBuffer view = buffer.asDoubleBuffer();
+			for (int y = 0; y < height; y++)
+				view.get((double[])data, startIndex + y*stride, rowLength);
+			elementBytes = 8;
+		} else {
+			throw new IllegalArgumentException("Unsupported array type "+data.getClass().getSimpleName());
 		}
-		int width = mmf.getInt();
-		int height = mmf.getInt();
-		int numBands = mmf.getInt();
-		if( image == null )
-    		image = new InterleavedU8(width, height, numBands);
-        else {
-            image.numBands = numBands;
-            image.reshape(width,height);
-        }
-		mmf.get(image.data,0,width*height*numBands);
+		buffer.position(buffer.position() + elementBytes*rowLength*height);
+	}
 
-		return image;
+	/**
+	 * Returns the payload type used to encode images with the data type
+	 */
+	static Type imageType( ImageDataType dataType ) {
+		switch( dataType ) {
+			case U8: return Type.IMAGE_U8;
+			case S8: return Type.IMAGE_S8;
+			case U16: return Type.IMAGE_U16;
+			case S16: return Type.IMAGE_S16;
+			case S32: return Type.IMAGE_S32;
+			case S64: return Type.IMAGE_S64;
+			case F32: return Type.IMAGE_F32;
+			case F64: return Type.IMAGE_F64;
+			default: throw new IllegalArgumentException("Unsupported image data type "+dataType);
+		}
 	}
 
 	/**
 	 * Reads elements from the memory map file and appends them to the current list
 	 */
-	public Object read_primitive_array(int type_ordinal ) {
-	    Type type = Type.values()[type_ordinal];
-	    mmf.position(0);
-		if( mmf.getShort() != type.ordinal() ) {
-			throw new RuntimeException("Memmap not of type "+type);
-		}
-		int numBytes = type.getDataType().getNumBits()/8;
-		int numElements = mmf.getInt();
-		byte data[] = new byte[numBytes];
-		ByteBuffer bb = ByteBuffer.wrap(data);
+	public Object read_primitive_array( int slot , int type_ordinal ) {
+		Type type = Type.values()[type_ordinal];
+		ByteBuffer buffer = startRead(slot, type);
+		int numElements = buffer.getInt();
 
 		switch( type ) {
 			case ARRAY_S8:
 			case ARRAY_U8: {
 				byte[] output = new byte[numElements];
-				mmf.get(output,0,output.length);
+				buffer.get(output,0,output.length);
 				return output;
 			}
 
 			case ARRAY_S16:
 			case ARRAY_U16: {
 				short[] output = new short[numElements];
-				for (int i = 0; i < numElements; i++) {
-					mmf.get(data,0,data.length);
-					output[i] = bb.getShort(0);
-				}
+				buffer.asShortBuffer().get(output);
 				return output;
 			}
 
 			case ARRAY_S32: {
 				int[] output = new int[numElements];
-				for (int i = 0; i < numElements; i++) {
-					mmf.get(data,0,data.length);
-					output[i] = bb.getInt(0);
-				}
+				buffer.asIntBuffer().get(output);
 				return output;
 			}
 
 			case ARRAY_F32: {
 				float[] output = new float[numElements];
-				for (int i = 0; i < numElements; i++) {
-					mmf.get(data,0,data.length);
-					output[i] = bb.getFloat(0);
-				}
+				buffer.asFloatBuffer().get(output);
 				return output;
 			}
 
 			case ARRAY_F64: {
 				double[] output = new double[numElements];
-				for (int i = 0; i < numElements; i++) {
-					mmf.get(data,0,data.length);
-					output[i] = bb.getFloat(0);
-				}
+				buffer.asDoubleBuffer().get(output);
 				return output;
 			}
 		}
 		throw new RuntimeException("Unknown type "+type);
 	}
 
-	public void write_primitive_array(Object data , int type_ordinal , int startIndex ) {
+	public void write_primitive_array( int slot , Object data , int type_ordinal , int startIndex ) {
 		Type type = Type.values()[type_ordinal];
 
 		int numBytes = type.getDataType().getNumBits()/8;
+		int numElements = Array.getLength(data)-startIndex;
 
-		int maxElements = (mmf.limit()-100)/(numBytes*2);
-		int numElements = Math.min(Array.getLength(data),maxElements);
-
-		mmf.position(0);
-		mmf.putShort((short)type.ordinal());
-		mmf.putInt(numElements);
+		ByteBuffer buffer = startWrite(slot, type, (long)numBytes*numElements);
+		buffer.putInt(numElements);
 
 		switch( type ) {
 			case ARRAY_S8:
-			case ARRAY_U8: {
-				byte[] array = (byte[])data;
-				for (int i = 0; i < numElements; i++) {
-					mmf.put(array[i+startIndex]);
-				}
-			} break;
+			case ARRAY_U8:
+				buffer.put((byte[])data, startIndex, numElements);
+				break;
+
 			case ARRAY_S16:
-			case ARRAY_U16: {
-				short[] array = (short[])data;
-				for (int i = 0; i < numElements; i++) {
-					mmf.putShort(array[i+startIndex]);
-				}
-			} break;
+			case ARRAY_U16:
+				buffer.asShortBuffer().put((short[])data, startIndex, numElements);
+				break;
 
-			case ARRAY_S32: {
-				int[] array = (int[])data;
+			case ARRAY_S32:
+				buffer.asIntBuffer().put((int[])data, startIndex, numElements);
+				break;
+
+			case ARRAY_F32:
+				buffer.asFloatBuffer().put((float[])data, startIndex, numElements);
+				break;
+
+			case ARRAY_F64:
+				buffer.asDoubleBuffer().put((double[])data, startIndex, numElements);
+				break;
+
+			default:
+				throw new RuntimeException("Not a primitive array type "+type);
+		}
+	}
+
+	/**
+	 * Writes everything found by the detector into a single payload. After the header come the locations
+	 * as (x,y) doubles, the radius and orientation of each feature as doubles, then the descriptors
+	 * encoded the same as the descriptor lists.
+	 */
+	public void write_DetectDescribe( int slot , DetectDescribePoint<?,?> alg ) {
+		int numElements = alg.getNumberOfFeatures();
+		Type descType = descriptionType(alg.getDescriptionType());
+		int dof = numElements > 0 ? descriptionDOF(alg.getDescription(0)) : 0;
+
+		ByteBuffer buffer = startWrite(slot, Type.DETECT_DESCRIBE,
+				32L*numElements + (long)descriptionBytes(descType, dof)*numElements);
+		buffer.putInt(numElements);
+		buffer.putInt(dof);
+		buffer.putInt(descType.ordinal());
+
+		DoubleBuffer data = buffer.asDoubleBuffer();
+		for (int i = 0; i < numElements; i++) {
+			Point2D_F64 p = alg.getLocation(i);
+			data.put(p.x);
+			data.put(p.y);
+		}
+		for (int i = 0; i < numElements; i++) {
+			data.put(alg.getRadius(i));
+		}
+		for (int i = 0; i < numElements; i++) {
+			data.put(alg.getOrientation(i));
+		}
+		buffer.position(buffer.position() + 8*data.position());
+
+		putDescriptions(buffer, descType, dof, numElements, alg::getDescription);
+	}
+
+	/**
+	 * Writes the locations and descriptors from a dense describer into a single payload. After the header come
+	 * the locations as (x,y) ints, then the descriptors encoded the same as the descriptor lists.
+	 */
+	public void write_DescribeDense( int slot , DescribeImageDense<?,?> alg ) {
+		List<Point2D_I32> locations = alg.getLocations();
+		List<? extends TupleDesc> descriptions = alg.getDescriptions();
+		int numElements = descriptions.size();
+		Type descType = descriptionType(alg.getDescriptionType());
+		int dof = numElements > 0 ? descriptionDOF(descriptions.get(0)) : 0;
+
+		ByteBuffer buffer = startWrite(slot, Type.DESCRIBE_DENSE,
+				8L*numElements + (long)descriptionBytes(descType, dof)*numElements);
+		buffer.putInt(numElements);
+		buffer.putInt(dof);
+		buffer.putInt(descType.ordinal());
+
+		IntBuffer data = buffer.asIntBuffer();
+		for (int i = 0; i < numElements; i++) {
+			Point2D_I32 p = locations.get(i);
+			data.put(p.x);
+			data.put(p.y);
+		}
+		buffer.position(buffer.position() + 4*data.position());
+
+		putDescriptions(buffer, descType, dof, numElements, descriptions::get);
+	}
+
+	/**
+	 * Writes primitive fields from every object in the list. After the header comes the layout description,
+	 * padded to a multiple of 8 bytes, then one packed record for each object. See {@link FieldSnapshot}
+	 *
+	 * @param objects A List or FastAccess
+	 * @param paths Comma separated field paths. If empty then all public primitive fields
+	 */
+	public void write_FieldSnapshot( int slot , Object objects , String paths ) {
+		FieldSnapshot.Layout layout = FieldSnapshot.layout(objects, paths);
+		int numElements = FieldSnapshot.size(objects);
+		byte[] description = layout.descriptionBytes();
+
+		ByteBuffer buffer = startWrite(slot, Type.FIELD_SNAPSHOT,
+				description.length + (long)layout.getRecordBytes()*numElements);
+		buffer.putInt(numElements);
+		buffer.putInt(layout.getRecordBytes());
+		buffer.putInt(description.length);
+		buffer.put(description);
+		layout.write(objects, buffer);
+	}
+
+	/**
+	 * Writes descriptors one after another using the same encoding as the descriptor lists
+	 */
+	void putDescriptions( ByteBuffer buffer , Type type , int dof , int numElements , IntFunction<? extends TupleDesc> lookup ) {
+		switch( type ) {
+			case LIST_TUPLE_F64: {
+				DoubleBuffer data = buffer.asDoubleBuffer();
 				for (int i = 0; i < numElements; i++) {
-					mmf.putInt(array[i+startIndex]);
+					data.put(((TupleDesc_F64)lookup.apply(i)).data, 0, dof);
 				}
 			} break;
 
-			case ARRAY_F32: {
-				float[] array = (float[])data;
+			case LIST_TUPLE_F32: {
+				FloatBuffer data = buffer.asFloatBuffer();
 				for (int i = 0; i < numElements; i++) {
-					mmf.putFloat(array[i+startIndex]);
+					data.put(((TupleDesc_F32)lookup.apply(i)).data, 0, dof);
 				}
 			} break;
 
-			case ARRAY_F64: {
-				double[] array = (double[])data;
+			case LIST_TUPLE_B: {
+				int numBytes = packedBytes(dof);
+				byte[] row = new byte[numBytes];
 				for (int i = 0; i < numElements; i++) {
-					mmf.putDouble(array[i+startIndex]);
+					int[] data = ((TupleDesc_B)lookup.apply(i)).data;
+					for (int j = 0; j < numBytes; j++) {
+						row[j] = (byte)(data[j/4] >>> (8*(j%4)));
+					}
+					buffer.put(row, 0, numBytes);
 				}
 			} break;
+
+			default:
+				throw new RuntimeException("Not a descriptor type "+type);
+		}
+	}
+
+	/**
+	 * Returns the list type which is used to encode the descriptor class
+	 */
+	static Type descriptionType( Class<?> type ) {
+		if( type == TupleDesc_F64.class )
+			return Type.LIST_TUPLE_F64;
+		else if( type == TupleDesc_F32.class )
+			return Type.LIST_TUPLE_F32;
+		else if( type == TupleDesc_B.class )
+			return Type.LIST_TUPLE_B;
+		else
+			throw new RuntimeException("Unsupported descriptor type "+type.getSimpleName());
+	}
+
+	/**
+	 * Degrees of freedom as it's stored in the header. For binary descriptors this is the number of bits
+	 */
+	static int descriptionDOF( TupleDesc<?> desc ) {
+		if( desc instanceof TupleDesc_B )
+			return ((TupleDesc_B)desc).numBits;
+		return desc.size();
+	}
+
+	/**
+	 * Number of bytes a single encoded descriptor takes up
+	 */
+	static int descriptionBytes( Type type , int dof ) {
+		switch( type ) {
+			case LIST_TUPLE_F64: return 8*dof;
+			case LIST_TUPLE_F32: return 4*dof;
+			case LIST_TUPLE_B: return packedBytes(dof);
+			default: throw new RuntimeException("Not a descriptor type "+type);
 		}
 	}
 
@@ -547,7 +1136,17 @@ public class BoofMemoryMapped {
 		ARRAY_U16(ImageDataType.U16),
 		ARRAY_S32(ImageDataType.S32),
 		ARRAY_F32(ImageDataType.F32),
-		ARRAY_F64(ImageDataType.F64);
+		ARRAY_F64(ImageDataType.F64),
+		LIST_TUPLE_B(ImageDataType.U8),
+		DETECT_DESCRIBE(ImageDataType.F64),
+		DESCRIBE_DENSE(ImageDataType.S32),
+		FIELD_SNAPSHOT(ImageDataType.U8),
+		IMAGE_S8(ImageDataType.S8),
+		IMAGE_U16(ImageDataType.U16),
+		IMAGE_S16(ImageDataType.S16),
+		IMAGE_S32(ImageDataType.S32),
+		IMAGE_S64(ImageDataType.S64),
+		IMAGE_F64(ImageDataType.F64);
 
 		ImageDataType dataType;
 
@@ -558,5 +1157,15 @@ public class BoofMemoryMapped {
 		public ImageDataType getDataType() {
 			return dataType;
 		}
+
+		public boolean isImage() {
+			switch( this ) {
+				case IMAGE_U8: case IMAGE_S8: case IMAGE_U16: case IMAGE_S16:
+				case IMAGE_S32: case IMAGE_S64: case IMAGE_F32: case IMAGE_F64:
+					return true;
+				default:
+					return false;
+			}
+		}
 	}
 }
@@ -0,0 +1,272 @@
+package pyboof;
+
+import boofcv.struct.Configuration;
+import org.yaml.snakeyaml.DumperOptions;
+import org.yaml.snakeyaml.Yaml;
+
+import java.lang.reflect.Array;
+import java.lang.reflect.Field;
+import java.lang.reflect.Modifier;
+import java.lang.reflect.ParameterizedType;
+import java.lang.reflect.Type;
+import java.util.ArrayList;
+import java.util.LinkedHashMap;
+import java.util.List;
+import java.util.Map;
+
+/**
+ * Converts configuration classes to and from text so that Python can read or modify every field of a config in a
+ * single call. Configs are converted into nested maps where primitives and strings are stored as is, enums by
+ * name, arrays and lists as lists, and nested configs as maps. Fields of any other type are skipped. Text can be
+ * read as YAML or JSON, since JSON is valid YAML, and is written as either.
+ *
+ * @author Peter Abeles
+ */
+public class ConfigSerialization {
+	/**
+	 * Creates a config with its default values
+	 *
+	 * @param classPath Class path. Nested classes can be separated by '$' or '.'
+	 */
+	public static Object create( String classPath ) {
+		try {
+			return PyBoofEntryPoint.classForPath(classPath).getConstructor().newInstance();
+		} catch( ReflectiveOperationException e ) {
+			throw new IllegalArgumentException("Can't create config "+classPath, e);
+		}
+	}
+
+	/**
+	 * Creates a config then changes its fields to the values in the text
+	 */
+	public static Object create( String classPath , String text ) {
+		Object config = create(classPath);
+		apply(config, text);
+		return config;
+	}
+
+	/**
+	 * Changes the config's fields to the values in the text. Fields which aren't in the text are left as is
+	 */
+	public static void apply( Object config , String text ) {
+		Object values = new Yaml().load(text);
+		if( values == null )
+			return;
+		if( !(values instanceof Map) )
+			throw new IllegalArgumentException("Expected a map of field names to values");
+		applyMap(config, (Map<?,?>)values);
+	}
+
+	public static String toJson( Object config ) {
+		StringBuilder out = new StringBuilder();
+		writeJson(toMap(config), out);
+		return out.toString();
+	}
+
+	public static String toYaml( Object config ) {
+		DumperOptions options = new DumperOptions();
+		options.setDefaultFlowStyle(DumperOptions.FlowStyle.BLOCK);
+		return new Yaml(options).dump(toMap(config));
+	}
+
+	/**
+	 * Returns the names of the public fields which are configs themselves, comma separated
+	 */
+	public static String getConfigFieldNames( String classPath ) {
+		List<String> names = new ArrayList<>();
+		for( Field f : PyBoofEntryPoint.classForPath(classPath).getFields() ) {
+			if( Configuration.class.isAssignableFrom(f.getType()) )
+				names.add(f.getName());
+		}
+		return String.join(",", names);
+	}
+
+	static Map<String,Object> toMap( Object config ) {
+		Map<String,Object> map = new LinkedHashMap<>();
+		try {
+			for( Field f : config.getClass().getFields() ) {
+				if( !isSettable(f) )
+					continue;
+				Object value = encode(f.get(config));
+				if( value != UNSUPPORTED )
+					map.put(f.getName(), value);
+			}
+		} catch( IllegalAccessException e ) {
+			throw new RuntimeException(e);
+		}
+		return map;
+	}
+
+	/** Marks values which can't be encoded */
+	static final Object UNSUPPORTED = new Object();
+
+	static Object encode( Object value ) {
+		if( value == null || value instanceof Number || value instanceof Boolean || value instanceof String )
+			return value;
+		if( value instanceof Character )
+			return value.toString();
+		if( value instanceof Enum )
+			return ((Enum<?>)value).name();
+		if( value instanceof Configuration )
+			return toMap(value);
+		if( value.getClass().isArray() && value.getClass().getComponentType().isPrimitive() ) {
+			List<Object> list = new ArrayList<>();
+			for (int i = 0; i < Array.getLength(value); i++) {
+				list.add(encode(Array.get(value, i)));
+			}
+			return list;
+		}
+		if( value instanceof List ) {
+			List<Object> list = new ArrayList<>();
+			for( Object o : (List<?>)value ) {
+				Object encoded = encode(o);
+				if( encoded == UNSUPPORTED )
+					return UNSUPPORTED;
+				list.add(encoded);
+			}
+			return list;
+		}
+		return UNSUPPORTED;
+	}
+
+	static void applyMap( Object target , Map<?,?> values ) {
+		for( Map.Entry<?,?> entry : values.entrySet() ) {
+			String name = entry.getKey().toString();
+			Field f;
+			try {
+				f = target.getClass().getField(name);
+			} catch( NoSuchFieldException e ) {
+				throw new IllegalArgumentException("Unknown field '"+name+"' in "+target.getClass().getSimpleName());
+			}
+			if( !isSettable(f) )
+				throw new IllegalArgumentException("Field '"+name+"' can't be modified");
+			try {
+				f.set(target, decode(f.getType(), f.getGenericType(), entry.getValue(), f.get(target)));
+			} catch( IllegalAccessException e ) {
+				throw new RuntimeException(e);
+			} catch( RuntimeException e ) {
+				throw new IllegalArgumentException("Bad value for '"+name+"'. "+e.getMessage(), e);
+			}
+		}
+	}
+
+	@SuppressWarnings({"unchecked", "rawtypes"})
+	static Object decode( Class<?> type , Type genericType , Object value , Object current ) {
+		if( value == null ) {
+			if( type.isPrimitive() )
+				throw new IllegalArgumentException("Primitives can't be null");
+			return null;
+		}
+		if( type == boolean.class || type == Boolean.class )
+			return value instanceof Boolean ? value : Boolean.parseBoolean(value.toString());
+		if( type == int.class || type == Integer.class )
+			return value instanceof Number ? ((Number)value).intValue() : Integer.parseInt(value.toString());
+		if( type == long.class || type == Long.class )
+			return value instanceof Number ? ((Number)value).longValue() : Long.parseLong(value.toString());
+		if( type == short.class || type == Short.class )
+			return value instanceof Number ? ((Number)value).shortValue() : Short.parseShort(value.toString());
+		if( type == byte.class || type == Byte.class )
+			return value instanceof Number ? ((Number)value).byteValue() : Byte.parseByte(value.toString());
+		if( type == double.class || type == Double.class )
+			return value instanceof Number ? ((Number)value).doubleValue() : Double.parseDouble(value.toString());
+		if( type == float.class || type == Float.class )
+			return value instanceof Number ? ((Number)value).floatValue() : Float.parseFloat(value.toString());
+		if( type == char.class || type == Character.class )
+			return value.toString().charAt(0);
+		if( type == String.class )
+			return value.toString();
+		if( type.isEnum() )
+			return Enum.valueOf((Class<Enum>)type, value.toString());
+		if( Configuration.class.isAssignableFrom(type) ) {
+			if( !(value instanceof Map) )
+				throw new IllegalArgumentException("Expected a map for config "+type.getSimpleName());
+			Object target = current != null ? current : create(type.getName());
+			applyMap(target, (Map<?,?>)value);
+			return target;
+		}
+		if( type.isArray() && value instanceof List ) {
+			List<?> list = (List<?>)value;
+			Class<?> component = type.getComponentType();
+			Object array = Array.newInstance(component, list.size());
+			for (int i = 0; i < list.size(); i++) {
+				Array.set(array, i, decode(component, component, list.get(i), null));
+			}
+			return array;
+		}
+		if( List.class.isAssignableFrom(type) && value instanceof List &&
+				genericType instanceof ParameterizedType ) {
+			Type elementType = ((ParameterizedType)genericType).getActualTypeArguments()[0];
+			if( elementType instanceof Class ) {
+				List<Object> list = new ArrayList<>();
+				for( Object o : (List<?>)value ) {
+					list.add(decode((Class<?>)elementType, elementType, o, null));
+				}
+				return list;
+			}
+		}
+		throw new IllegalArgumentException("Unsupported field type "+type.getSimpleName());
+	}
+
+	static boolean isSettable( Field f ) {
+		int modifiers = f.getModifiers();
+		return !Modifier.isStatic(modifiers) && !Modifier.isFinal(modifiers);
+	}
+
+	static void writeJson( Object value , StringBuilder out ) {
+		if( value == null ) {
+			out.append("null");
+		} else if( value instanceof String ) {
+			out.append('"');
+			String s = (String)value;
+			for (int i = 0; i < s.length(); i++) {
+				char c = s.charAt(i);
+				switch( c ) {
+					case '"': out.append("\\\""); break;
+					case '\\': out.append("\\\\"); break;
+					case '\n': out.append("\\n"); break;
+					case '\r': out.append("\\r"); break;
+					case '\t': out.append("\\t"); break;
+					default:
+						if( c < 0x20 )
+							out.append(String.format("\\u%04x", (int)c));
+						else
+							out.append(c);
+				}
+			}
+			out.append('"');
+		} else if( value instanceof Double || value instanceof Float ) {
+			// Python's json module understands NaN and Infinity even though they aren't standard JSON
+			double d = ((Number)value).doubleValue();
+			if( Double.isNaN(d) )
+				out.append("NaN");
+			else if( Double.isInfinite(d) )
+				out.append(d > 0 ? "Infinity" : "-Infinity");
+			else
+				out.append(value);
+		} else if( value instanceof Map ) {
+			out.append('{');
+			boolean first = true;
+			for( Map.Entry<?,?> entry : ((Map<?,?>)value).entrySet() ) {
+				if( !first )
+					out.append(',');
+				first = false;
+				writeJson(entry.getKey().toString(), out);
+				out.append(':');
+				writeJson(entry.getValue(), out);
+			}
+			out.append('}');
+		} else if( value instanceof List ) {
+			out.append('[');
+			boolean first = true;
+			for( Object o : (List<?>)value ) {
+				if( !first )
+					out.append(',');
+				first = false;
+				writeJson(o, out);
+			}
+			out.append(']');
+		} else {
+			out.append(value);
+		}
+	}
+}
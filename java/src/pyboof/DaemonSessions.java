@@ -0,0 +1,194 @@
+package pyboof;
+
+import java.io.File;
+import java.util.ArrayList;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.Executors;
+import java.util.concurrent.ScheduledExecutorService;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.atomic.AtomicInteger;
+
+/**
+ * Keeps track of the Python processes which are sharing a single long lived JVM. Each client opens a session and
+ * gets its own memory mapped file, plus any additional files it creates for other threads. Clients send a heartbeat
+ * while they are alive. If a client goes quiet for too long, e.g. it crashed before it could close its session,
+ * then the session is reclaimed and all of its memory mapped files deleted.
+ *
+ * @author Peter Abeles
+ */
+public class DaemonSessions {
+	/** Sessions which haven't sent a heartbeat in this amount of time are reclaimed */
+	public static final int DEFAULT_TIMEOUT_SECONDS = 60;
+
+	final Map<Integer, Session> sessions = new ConcurrentHashMap<>();
+	final AtomicInteger nextId = new AtomicInteger(1);
+	final long timeoutMillis;
+
+	ScheduledExecutorService reaper;
+
+	public DaemonSessions( int timeoutSeconds ) {
+		this.timeoutMillis = timeoutSeconds*1000L;
+		reaper = Executors.newSingleThreadScheduledExecutor(r -> {
+			Thread t = new Thread(r, "PyBoof Session Reaper");
+			t.setDaemon(true);
+			return t;
+		});
+		long period = Math.max(1, timeoutSeconds/4);
+		reaper.scheduleAtFixedRate(this::reapIdle, period, period, TimeUnit.SECONDS);
+	}
+
+	/**
+	 * Opens a new session. The client's build date must match the build date of the JVM, otherwise the Python
+	 * and Java code could disagree on how data is encoded.
+	 *
+	 * @param buildDate Build date of the Python client
+	 * @return ID of the new session
+	 */
+	public int open( String buildDate ) {
+		synchronized (PyBoofEntryPoint.class) {
+			if( PyBoofEntryPoint.buildDate == null )
+				PyBoofEntryPoint.buildDate = buildDate;
+			else if( !PyBoofEntryPoint.buildDate.equals(buildDate) )
+				throw new IllegalStateException("Build dates do not match. client="+buildDate+
+						" daemon="+PyBoofEntryPoint.buildDate);
+		}
+
+		Session session = new Session(nextId.getAndIncrement());
+		sessions.put(session.id, session);
+		return session.id;
+	}
+
+	/**
+	 * Creates the memory mapped file used by a session. Any previous file the session had is discarded
+	 */
+	public BoofMemoryMapped initializeMmap( int id , String filePath, int slotSizeMB, int numSlots, int maxSlotSizeMB ) {
+		Session session = lookup(id);
+		session.discardMmap();
+		session.mmap = new BoofMemoryMapped(filePath, slotSizeMB, numSlots, maxSlotSizeMB);
+		session.mmapPath = filePath;
+		return session.mmap;
+	}
+
+	/**
+	 * Creates an additional memory mapped file which belongs to the session, e.g. for another Python thread. It's
+	 * released when the session is closed or reclaimed, or by {@link #releaseChannel}
+	 */
+	public BoofMemoryMapped createChannel( int id , String filePath, int slotSizeMB, int numSlots, int maxSlotSizeMB ) {
+		Session session = lookup(id);
+		BoofMemoryMapped mmap = new BoofMemoryMapped(filePath, slotSizeMB, numSlots, maxSlotSizeMB);
+		synchronized (session) {
+			session.channels.add(new Channel(mmap, filePath));
+		}
+		// The session could have been closed while the file was being created
+		if( !sessions.containsKey(id) ) {
+			session.discardAll();
+			throw new IllegalArgumentException("Unknown or reclaimed session "+id);
+		}
+		return mmap;
+	}
+
+	/**
+	 * Releases a file created by {@link #createChannel} once the client is done with it. Does nothing if the
+	 * session or the file is already gone
+	 */
+	public void releaseChannel( int id , String filePath ) {
+		Session session = sessions.get(id);
+		if( session == null )
+			return;
+		synchronized (session) {
+			for (int i = 0; i < session.channels.size(); i++) {
+				Channel c = session.channels.get(i);
+				if( c.path.equals(filePath) ) {
+					session.channels.remove(i);
+					c.discard();
+					return;
+				}
+			}
+		}
+	}
+
+	/**
+	 * Lets the daemon know the client is still alive. Fails if the session has already been reclaimed
+	 */
+	public void heartbeat( int id ) {
+		lookup(id).lastHeartbeat = System.currentTimeMillis();
+	}
+
+	public void close( int id ) {
+		Session session = sessions.remove(id);
+		if( session != null )
+			session.discardAll();
+	}
+
+	public int getNumSessions() {
+		return sessions.size();
+	}
+
+	/**
+	 * Closes sessions which haven't sent a heartbeat recently
+	 */
+	void reapIdle() {
+		long now = System.currentTimeMillis();
+		for( Session session : sessions.values() ) {
+			if( now - session.lastHeartbeat > timeoutMillis ) {
+				System.err.println("Reclaiming idle PyBoof session "+session.id);
+				close(session.id);
+			}
+		}
+	}
+
+	Session lookup( int id ) {
+		Session session = sessions.get(id);
+		if( session == null )
+			throw new IllegalArgumentException("Unknown or reclaimed session "+id);
+		return session;
+	}
+
+	static class Session {
+		final int id;
+		volatile long lastHeartbeat = System.currentTimeMillis();
+		BoofMemoryMapped mmap;
+		String mmapPath;
+		/** Files created for other threads */
+		final List<Channel> channels = new ArrayList<>();
+
+		Session( int id ) {
+			this.id = id;
+		}
+
+		void discardMmap() {
+			if( mmap == null )
+				return;
+			new Channel(mmap, mmapPath).discard();
+			mmap = null;
+			mmapPath = null;
+		}
+
+		/** Releases the main file and all the files created for other threads */
+		synchronized void discardAll() {
+			discardMmap();
+			for( Channel c : channels ) {
+				c.discard();
+			}
+			channels.clear();
+		}
+	}
+
+	static class Channel {
+		final BoofMemoryMapped mmap;
+		final String path;
+
+		Channel( BoofMemoryMapped mmap , String path ) {
+			this.mmap = mmap;
+			this.path = path;
+		}
+
+		void discard() {
+			mmap.close();
+			// Clients normally unlink the file as soon as it's mapped. This is for when they can't, e.g. Windows
+			new File(path).delete();
+		}
+	}
+}
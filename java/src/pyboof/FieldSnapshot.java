@@ -0,0 +1,364 @@
+package pyboof;
+
+import org.ddogleg.struct.FastAccess;
+
+import java.lang.reflect.Array;
+import java.lang.reflect.Field;
+import java.lang.reflect.Modifier;
+import java.nio.ByteBuffer;
+import java.nio.ByteOrder;
+import java.nio.charset.StandardCharsets;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.List;
+import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+
+/**
+ * Copies primitive fields out of a list of objects into a single packed buffer, so that Python can read the fields
+ * of N objects in one call instead of one call per field per object. Each record holds the requested fields one
+ * after another with no padding. The layout is described by a string "name:code,name:code,..." where the codes are
+ * numpy dtype codes, so Python can view the records as a structured array.
+ *
+ * Fields are specified by paths, e.g. "pixel.x" reads the field 'x' of the object in the field 'pixel'. An element
+ * of an array, {@link List}, or {@link FastAccess} is selected with an index, e.g. "bounds.vertexes[2].x". If no
+ * paths are given then all public primitive fields are used. Layouts are cached by class and paths, so reflection
+ * is only done the first time. Classes are found using the first object, so every object must have the same
+ * structure.
+ *
+ * Fields which aren't primitives, e.g. strings, enums, and byte arrays, are read with {@link #snapshotValues}.
+ *
+ * @author Peter Abeles
+ */
+public class FieldSnapshot {
+	static final Map<String, Layout> layouts = new ConcurrentHashMap<>();
+	static final Map<String, Step[][]> valueChains = new ConcurrentHashMap<>();
+
+	/**
+	 * Returns the layout for the objects' class. If there are no objects then the layout is empty
+	 *
+	 * @param objects A {@link List} or {@link FastAccess}
+	 * @param paths Comma separated field paths. If empty then all public primitive fields
+	 */
+	public static Layout layout( Object objects , String paths ) {
+		if( size(objects) == 0 )
+			return new Layout(new Step[0][], new char[0], "");
+		Object sample = get(objects, 0);
+		return layouts.computeIfAbsent(sample.getClass().getName() + "|" + paths, k -> createLayout(sample, paths));
+	}
+
+	/**
+	 * Packs the layout followed by the records into a byte array. The layout string is padded to a multiple of
+	 * 8 bytes. Used when there isn't a memory mapped file. Numbers are in native byte order
+	 */
+	public static byte[] snapshot( Object objects , String paths ) {
+		Layout layout = layout(objects, paths);
+		int numObjects = size(objects);
+		byte[] description = layout.descriptionBytes();
+		ByteBuffer buffer = ByteBuffer.allocate(12 + description.length + layout.recordBytes*numObjects);
+		buffer.order(ByteOrder.nativeOrder());
+		buffer.putInt(numObjects);
+		buffer.putInt(layout.recordBytes);
+		buffer.putInt(description.length);
+		buffer.put(description);
+		layout.write(objects, buffer);
+		return buffer.array();
+	}
+
+	/**
+	 * Reads fields of any type from every object. For each object, and each path in order, the value is written
+	 * as its length in bytes followed by the bytes. Byte arrays are copied as is and everything else is converted
+	 * with {@link String#valueOf(Object)} and encoded as UTF-8. A null value has a length of -1. Lengths are in
+	 * native byte order.
+	 *
+	 * @param objects A {@link List} or {@link FastAccess}
+	 * @param paths Comma separated field paths
+	 */
+	public static byte[] snapshotValues( Object objects , String paths ) {
+		int numObjects = size(objects);
+		if( numObjects == 0 )
+			return new byte[0];
+		Object sample = get(objects, 0);
+		Step[][] chains = valueChains.computeIfAbsent(sample.getClass().getName() + "|" + paths, k -> {
+			String[] split = paths.split(",");
+			Step[][] found = new Step[split.length][];
+			for (int i = 0; i < split.length; i++) {
+				found[i] = resolve(sample, split[i], false);
+			}
+			return found;
+		});
+
+		List<byte[]> values = new ArrayList<>();
+		int total = 0;
+		for (int i = 0; i < numObjects; i++) {
+			Object o = get(objects, i);
+			for( Step[] chain : chains ) {
+				Object value = read(o, chain);
+				byte[] encoded = value == null ? null : value instanceof byte[] ? (byte[])value :
+						String.valueOf(value).getBytes(StandardCharsets.UTF_8);
+				values.add(encoded);
+				total += 4 + (encoded == null ? 0 : encoded.length);
+			}
+		}
+
+		ByteBuffer buffer = ByteBuffer.allocate(total);
+		buffer.order(ByteOrder.nativeOrder());
+		for( byte[] encoded : values ) {
+			if( encoded == null ) {
+				buffer.putInt(-1);
+			} else {
+				buffer.putInt(encoded.length);
+				buffer.put(encoded);
+			}
+		}
+		return buffer.array();
+	}
+
+	public static int size( Object objects ) {
+		if( objects instanceof List )
+			return ((List<?>)objects).size();
+		else if( objects instanceof FastAccess )
+			return ((FastAccess<?>)objects).size;
+		throw new IllegalArgumentException("Expected a List or FastAccess not "+objects.getClass().getSimpleName());
+	}
+
+	public static Object get( Object objects , int index ) {
+		if( objects instanceof List )
+			return ((List<?>)objects).get(index);
+		return ((FastAccess<?>)objects).get(index);
+	}
+
+	/** Returns an element from an array, {@link List}, or {@link FastAccess} */
+	static Object element( Object container , int index ) {
+		if( container.getClass().isArray() )
+			return Array.get(container, index);
+		return get(container, index);
+	}
+
+	static Layout createLayout( Object sample , String paths ) {
+		List<Step[]> chains = new ArrayList<>();
+		List<String> names = new ArrayList<>();
+		if( paths.isEmpty() ) {
+			for( Field f : sample.getClass().getFields() ) {
+				if( f.getType().isPrimitive() && !Modifier.isStatic(f.getModifiers()) ) {
+					chains.add(new Step[]{new Step(f, -1)});
+					names.add(f.getName());
+				}
+			}
+		} else {
+			for( String path : paths.split(",") ) {
+				chains.add(resolve(sample, path, true));
+				names.add(path);
+			}
+		}
+
+		char[] kinds = new char[chains.size()];
+		StringBuilder description = new StringBuilder();
+		for (int i = 0; i < chains.size(); i++) {
+			Step last = chains.get(i)[chains.get(i).length-1];
+			kinds[i] = kind(last.index < 0 ? last.field.getType() : last.field.getType().getComponentType());
+			if( i > 0 )
+				description.append(',');
+			description.append(names.get(i)).append(':').append(dtypeCode(kinds[i]));
+		}
+		return new Layout(chains.toArray(new Step[0][]), kinds, description.toString());
+	}
+
+	/**
+	 * Converts a path into the fields which are read to reach it. The sample is used to find the class of elements
+	 * inside of lists.
+	 *
+	 * @param primitive If true the path must end at a primitive
+	 */
+	static Step[] resolve( Object sample , String path , boolean primitive ) {
+		String[] names = path.split("\\.");
+		Step[] chain = new Step[names.length];
+		Class<?> current = sample.getClass();
+		Object value = sample;
+		for (int i = 0; i < names.length; i++) {
+			String name = names[i];
+			int index = -1;
+			int bracket = name.indexOf('[');
+			if( bracket >= 0 ) {
+				if( !name.endsWith("]") )
+					throw new IllegalArgumentException("Bad index in '"+path+"'");
+				index = Integer.parseInt(name.substring(bracket+1, name.length()-1));
+				name = name.substring(0, bracket);
+			}
+			Field f;
+			try {
+				f = current.getField(name);
+			} catch( NoSuchFieldException e ) {
+				throw new IllegalArgumentException("No public field '"+name+"' in "+current.getSimpleName());
+			}
+			chain[i] = new Step(f, index);
+			value = value == null ? null : chain[i].read(value);
+			if( index < 0 )
+				current = f.getType();
+			else if( f.getType().isArray() )
+				current = f.getType().getComponentType();
+			else if( value != null )
+				current = value.getClass();
+			else
+				throw new IllegalArgumentException("Can't find the element type of '"+name+"' in '"+path+"'");
+		}
+		if( primitive && !current.isPrimitive() )
+			throw new IllegalArgumentException("Field '"+path+"' is not a primitive");
+		return chain;
+	}
+
+	static Object read( Object o , Step[] chain ) {
+		Object value = o;
+		for (int i = 0; i < chain.length && value != null; i++) {
+			value = chain[i].read(value);
+		}
+		return value;
+	}
+
+	/** Single character which identifies the primitive type */
+	static char kind( Class<?> type ) {
+		if( type == boolean.class ) return 'Z';
+		if( type == byte.class ) return 'B';
+		if( type == char.class ) return 'C';
+		if( type == short.class ) return 'S';
+		if( type == int.class ) return 'I';
+		if( type == long.class ) return 'J';
+		if( type == float.class ) return 'F';
+		if( type == double.class ) return 'D';
+		throw new IllegalArgumentException("Not a primitive "+type);
+	}
+
+	static String dtypeCode( char kind ) {
+		switch( kind ) {
+			case 'Z': return "?";
+			case 'B': return "i1";
+			case 'C': return "u2";
+			case 'S': return "i2";
+			case 'I': return "i4";
+			case 'J': return "i8";
+			case 'F': return "f4";
+			case 'D': return "f8";
+			default: throw new IllegalArgumentException("Unknown kind "+kind);
+		}
+	}
+
+	static int bytes( char kind ) {
+		switch( kind ) {
+			case 'Z': case 'B': return 1;
+			case 'C': case 'S': return 2;
+			case 'I': case 'F': return 4;
+			default: return 8;
+		}
+	}
+
+	/**
+	 * One field in a path and, if it's a container, which element is selected
+	 */
+	static class Step {
+		final Field field;
+		/** Index of the element. -1 if the field isn't indexed */
+		final int index;
+
+		Step( Field field , int index ) {
+			this.field = field;
+			this.index = index;
+		}
+
+		Object read( Object owner ) {
+			try {
+				Object value = field.get(owner);
+				return index < 0 || value == null ? value : element(value, index);
+			} catch( IllegalAccessException e ) {
+				throw new RuntimeException(e);
+			}
+		}
+	}
+
+	/**
+	 * How the fields of one class are read and packed
+	 */
+	public static class Layout {
+		final Step[][] chains;
+		final char[] kinds;
+		final String description;
+		final int recordBytes;
+
+		Layout( Step[][] chains , char[] kinds , String description ) {
+			this.chains = chains;
+			this.kinds = kinds;
+			this.description = description;
+			int total = 0;
+			for( char k : kinds )
+				total += bytes(k);
+			this.recordBytes = total;
+		}
+
+		public String getDescription() {
+			return description;
+		}
+
+		public int getRecordBytes() {
+			return recordBytes;
+		}
+
+		/** The description as ASCII padded with spaces to a multiple of 8 bytes */
+		public byte[] descriptionBytes() {
+			byte[] text = description.getBytes(StandardCharsets.US_ASCII);
+			byte[] padded = new byte[(text.length + 7)/8*8];
+			Arrays.fill(padded, (byte)' ');
+			System.arraycopy(text, 0, padded, 0, text.length);
+			return padded;
+		}
+
+		/**
+		 * Writes one record for each object into the buffer starting at its current position
+		 */
+		public void write( Object objects , ByteBuffer buffer ) {
+			int numObjects = size(objects);
+			try {
+				for (int i = 0; i < numObjects; i++) {
+					Object o = get(objects, i);
+					for (int fieldIdx = 0; fieldIdx < chains.length; fieldIdx++) {
+						Step[] chain = chains[fieldIdx];
+						Object owner = o;
+						for (int j = 0; j < chain.length-1; j++) {
+							owner = chain[j].read(owner);
+						}
+						Step last = chain[chain.length-1];
+						if( last.index >= 0 ) {
+							putBoxed(buffer, kinds[fieldIdx], last.read(owner));
+							continue;
+						}
+						Field f = last.field;
+						switch( kinds[fieldIdx] ) {
+							case 'Z': buffer.put((byte)(f.getBoolean(owner) ? 1 : 0)); break;
+							case 'B': buffer.put(f.getByte(owner)); break;
+							case 'C': buffer.putChar(f.getChar(owner)); break;
+							case 'S': buffer.putShort(f.getShort(owner)); break;
+							case 'I': buffer.putInt(f.getInt(owner)); break;
+							case 'J': buffer.putLong(f.getLong(owner)); break;
+							case 'F': buffer.putFloat(f.getFloat(owner)); break;
+							case 'D': buffer.putDouble(f.getDouble(owner)); break;
+						}
+					}
+				}
+			} catch( IllegalAccessException e ) {
+				throw new RuntimeException(e);
+			}
+		}
+
+		/** Writes an element of a primitive array */
+		static void putBoxed( ByteBuffer buffer , char kind , Object value ) {
+			switch( kind ) {
+				case 'Z': buffer.put((byte)((Boolean)value ? 1 : 0)); break;
+				case 'B': buffer.put((Byte)value); break;
+				case 'C': buffer.putChar((Character)value); break;
+				case 'S': buffer.putShort((Short)value); break;
+				case 'I': buffer.putInt((Integer)value); break;
+				case 'J': buffer.putLong((Long)value); break;
+				case 'F': buffer.putFloat((Float)value); break;
+				case 'D': buffer.putDouble((Double)value); break;
+			}
+		}
+	}
+}
@@ -0,0 +1,95 @@
+package pyboof;
+
+import boofcv.io.image.SimpleImageSequence;
+import boofcv.io.wrapper.DefaultMediaManager;
+import boofcv.struct.image.ImageBase;
+import boofcv.struct.image.ImageType;
+
+import java.util.Iterator;
+import java.util.List;
+
+/**
+ * Frames from a video or a sequence of images which are decoded inside the JVM. Lets Python pass each frame
+ * straight to a tracker or detector so that the pixels never cross over to Python. Videos are read using
+ * {@link DefaultMediaManager}, which handles MJPEG. Image sequences are decoded in background threads by
+ * {@link BatchImageLoader}.
+ *
+ * Video readers can reuse the same image for every frame, so a frame is only valid until the next one is read.
+ *
+ * @author Peter Abeles
+ */
+public class FrameSource {
+	/** Video which is being read. null if it's an image sequence */
+	final SimpleImageSequence<?> sequence;
+	/** Images which are being read. null if it's a video */
+	final BatchImageLoader loader;
+
+	final Iterator<? extends ImageBase<?>> frames;
+
+	/** Index of the most recently read frame */
+	int frameNumber = -1;
+
+	FrameSource( SimpleImageSequence<?> sequence , BatchImageLoader loader ) {
+		this.sequence = sequence;
+		this.loader = loader;
+		this.frames = sequence != null ? new Iterator<ImageBase<?>>() {
+			@Override public boolean hasNext() {return sequence.hasNext();}
+			@Override public ImageBase<?> next() {return sequence.next();}
+		} : loader;
+	}
+
+	/**
+	 * Opens a video file, e.g. MJPEG
+	 */
+	public static FrameSource openVideo( String path , ImageType<?> imageType ) {
+		SimpleImageSequence<?> sequence = DefaultMediaManager.INSTANCE.openVideo(path, (ImageType)imageType);
+		if( sequence == null )
+			throw new IllegalArgumentException("Can't open video "+path);
+		return new FrameSource(sequence, null);
+	}
+
+	/**
+	 * Reads the images in the order they are listed
+	 *
+	 * @see BatchImageLoader#BatchImageLoader(List, ImageType, int, int, int, int)
+	 */
+	public static FrameSource openImages( List<String> paths , ImageType<?> imageType ,
+										  int numThreads , int prefetch ) {
+		return new FrameSource(null, new BatchImageLoader(paths, imageType, numThreads, prefetch, 0, 0));
+	}
+
+	/**
+	 * Returns the next frame or null if there are no more
+	 */
+	public ImageBase<?> nextOrNull() {
+		if( !frames.hasNext() )
+			return null;
+		ImageBase<?> frame = frames.next();
+		frameNumber++;
+		return frame;
+	}
+
+	/**
+	 * Writes the next frame into the mmap slot
+	 *
+	 * @return false if there are no more frames
+	 */
+	public boolean writeNext( BoofMemoryMapped mmap , int slot ) {
+		ImageBase<?> frame = nextOrNull();
+		if( frame == null )
+			return false;
+		mmap.writeImage(slot, frame);
+		return true;
+	}
+
+	public int getFrameNumber() {
+		return frameNumber;
+	}
+
+	public void close() {
+		if( sequence != null )
+			sequence.close();
+		else
+			loader.close();
+	}
+}
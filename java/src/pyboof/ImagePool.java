@@ -0,0 +1,131 @@
+package pyboof;
+
+import boofcv.struct.image.ImageBase;
+import boofcv.struct.image.ImageDataType;
+import boofcv.struct.image.ImageType;
+
+import java.nio.ByteBuffer;
+import java.util.ArrayDeque;
+import java.util.HashMap;
+import java.util.Map;
+
+/**
+ * Images which are reused instead of being created for every frame, which keeps the garbage collector out of
+ * video loops. Images are grouped by their type and shape. An image which is acquired is removed from the pool
+ * until it's released. If nothing of the requested type and shape is available then a new image is created.
+ *
+ * @author Peter Abeles
+ */
+public class ImagePool {
+	/** Images which are available, keyed by type and shape */
+	final Map<String, ArrayDeque<ImageBase<?>>> available = new HashMap<>();
+
+	/** Maximum number of images of the same type and shape which are kept */
+	int maxIdle;
+
+	long allocated;
+	long reused;
+	long released;
+	long discarded;
+
+	/**
+	 * @param maxIdle Maximum number of images of the same type and shape which are kept. Extra images which are
+	 *                released are left for the garbage collector.
+	 */
+	public ImagePool( int maxIdle ) {
+		this.maxIdle = maxIdle;
+	}
+
+	/**
+	 * Returns an image of the specified type and shape. Its contents are whatever they were when it was released
+	 */
+	public synchronized ImageBase<?> acquire( ImageType<?> type , int width , int height ) {
+		ArrayDeque<ImageBase<?>> queue = available.get(
+				key(type.getFamily(), type.getDataType(), type.getNumBands(), width, height));
+		if( queue != null && !queue.isEmpty() ) {
+			reused++;
+			return queue.pop();
+		}
+		allocated++;
+		return type.createImage(width, height);
+	}
+
+	/**
+	 * Returns the image to the pool. It must not be used after it has been released
+	 */
+	public synchronized void release( ImageBase<?> image ) {
+		if( image.isSubimage() )
+			throw new IllegalArgumentException("Subimages can't be added to the pool");
+		ImageType<?> type = image.getImageType();
+		ArrayDeque<ImageBase<?>> queue = available.computeIfAbsent(key(type.getFamily(), type.getDataType(),
+				BoofMemoryMapped.numBands(image), image.width, image.height), k -> new ArrayDeque<>());
+		for( ImageBase<?> found : queue ) {
+			if( found == image )
+				throw new IllegalArgumentException("Image has already been released");
+		}
+		released++;
+		if( queue.size() >= maxIdle ) {
+			discarded++;
+			return;
+		}
+		queue.push(image);
+	}
+
+	/**
+	 * Reads the image in the mmap slot into an image from the pool. Lets Python fill a pooled image with a single
+	 * call
+	 */
+	public ImageBase<?> upload( BoofMemoryMapped mmap , int slot ) {
+		ByteBuffer buffer = mmap.slot(slot);
+		int found = buffer.getShort(0);
+		if( found < 0 || found >= BoofMemoryMapped.Type.values().length ||
+				!BoofMemoryMapped.Type.values()[found].isImage() )
+			throw new RuntimeException("Memmap does not contain an image. found "+found);
+		ImageDataType dataType = BoofMemoryMapped.Type.values()[found].getDataType();
+		ImageType.Family family = ImageType.Family.values()[buffer.get(BoofMemoryMapped.FAMILY_OFFSET)];
+		int width = buffer.getInt(4);
+		int height = buffer.getInt(8);
+		int numBands = buffer.getInt(12);
+
+		ImageBase<?> image = acquire(new ImageType<>(family, dataType, numBands), width, height);
+		return mmap.readImage(slot, image);
+	}
+
+	/**
+	 * Discards every available image
+	 */
+	public synchronized void clear() {
+		available.clear();
+	}
+
+	/**
+	 * Number of images which are available
+	 */
+	public synchronized int getIdleCount() {
+		int total = 0;
+		for( ArrayDeque<ImageBase<?>> queue : available.values() ) {
+			total += queue.size();
+		}
+		return total;
+	}
+
+	static String key( ImageType.Family family , ImageDataType dataType , int numBands , int width , int height ) {
+		return family+":"+dataType+":"+numBands+":"+width+"x"+height;
+	}
+
+	public synchronized long getAllocated() {
+		return allocated;
+	}
+
+	public synchronized long getReused() {
+		return reused;
+	}
+
+	public synchronized long getReleased() {
+		return released;
+	}
+
+	public synchronized long getDiscarded() {
+		return discarded;
+	}
+}
@@ -0,0 +1,135 @@
+package pyboof;
+
+import boofcv.struct.image.ImageBase;
+
+import java.util.Iterator;
+import java.util.LinkedHashMap;
+import java.util.Map;
+
+/**
+ * Images which are kept in the JVM so that Python doesn't need to upload the same pixels again. Images are looked
+ * up by a key, which is either a hash of their contents or a name picked by the user. Once the total size of the
+ * images goes over the budget the least recently used ones are discarded. The most recently added image is never
+ * discarded, even if it's larger than the budget by itself.
+ *
+ * Registered images are shared by everyone who looks them up, so they should not be modified.
+ *
+ * @author Peter Abeles
+ */
+public class ImageRegistry {
+	/** Access ordered, so the first entry is the least recently used */
+	final LinkedHashMap<String, ImageBase<?>> images = new LinkedHashMap<>(16, 0.75f, true);
+
+	long maxBytes;
+	long totalBytes;
+
+	long hits;
+	long misses;
+	long evictions;
+
+	/**
+	 * @param maxBytes Total number of bytes the images can use before old ones are discarded
+	 */
+	public ImageRegistry( long maxBytes ) {
+		this.maxBytes = maxBytes;
+	}
+
+	/**
+	 * Returns the image with the key and marks it as recently used, or null if there isn't one
+	 */
+	public synchronized ImageBase<?> get( String key ) {
+		ImageBase<?> image = images.get(key);
+		if( image == null )
+			misses++;
+		else
+			hits++;
+		return image;
+	}
+
+	/**
+	 * Same as {@link #get} but the image isn't marked as used and the statistics are not changed
+	 */
+	public synchronized boolean contains( String key ) {
+		return images.containsKey(key);
+	}
+
+	/**
+	 * Adds the image, replacing any image with the same key, then discards old images if over budget
+	 */
+	public synchronized void put( String key , ImageBase<?> image ) {
+		ImageBase<?> previous = images.put(key, image);
+		if( previous != null )
+			totalBytes -= bytes(previous);
+		totalBytes += bytes(image);
+		evict();
+	}
+
+	/**
+	 * Reads an image from the mmap slot and adds it. A new image is always created since the image the key used
+	 * to refer to might still be in use
+	 */
+	public ImageBase<?> upload( BoofMemoryMapped mmap , int slot , String key ) {
+		ImageBase<?> image = mmap.readImage(slot, null);
+		put(key, image);
+		return image;
+	}
+
+	public synchronized boolean remove( String key ) {
+		ImageBase<?> image = images.remove(key);
+		if( image == null )
+			return false;
+		totalBytes -= bytes(image);
+		return true;
+	}
+
+	public synchronized void clear() {
+		images.clear();
+		totalBytes = 0;
+	}
+
+	/**
+	 * Changes the budget and discards images until it's met
+	 */
+	public synchronized void setMaxBytes( long maxBytes ) {
+		this.maxBytes = maxBytes;
+		evict();
+	}
+
+	void evict() {
+		Iterator<Map.Entry<String, ImageBase<?>>> iter = images.entrySet().iterator();
+		while( totalBytes > maxBytes && images.size() > 1 ) {
+			totalBytes -= bytes(iter.next().getValue());
+			iter.remove();
+			evictions++;
+		}
+	}
+
+	static long bytes( ImageBase<?> image ) {
+		return (long)image.width*image.height*BoofMemoryMapped.numBands(image)*
+				image.getImageType().getDataType().getNumBits()/8;
+	}
+
+	public synchronized int size() {
+		return images.size();
+	}
+
+	public synchronized long getTotalBytes() {
+		return totalBytes;
+	}
+
+	public synchronized long getMaxBytes() {
+		return maxBytes;
+	}
+
+	public synchronized long getHits() {
+		return hits;
+	}
+
+	public synchronized long getMisses() {
+		return misses;
+	}
+
+	public synchronized long getEvictions() {
+		return evictions;
+	}
+}
@@ -18,12 +18,16 @@
 
 package pyboof;
 
+import boofcv.abst.feature.dense.DescribeImageDense;
 import boofcv.abst.feature.detdesc.DetectDescribePoint;
 import boofcv.concurrency.BoofConcurrency;
 import boofcv.factory.filter.binary.ConfigThreshold;
 import boofcv.factory.filter.binary.ThresholdType;
 import boofcv.struct.Configuration;
 import boofcv.struct.feature.TupleDesc;
+import boofcv.struct.image.ImageBase;
+import boofcv.struct.image.ImageGray;
+import boofcv.struct.image.ImageType;
 import georegression.struct.point.Point2D_F64;
 import org.ddogleg.struct.DogArray;
 import org.ddogleg.struct.FastArray;
@@ -45,7 +49,12 @@ import java.util.List;
  */
 public class PyBoofEntryPoint {
 
+    /** Printed to stdout once the gateway is accepting connections. Must match JVM_READY_LINE in Python */
+    public static final String READY_LINE = "PyBoof ready";
+
     public static BoofMemoryMapped mmap;
+    /** Clients sharing this JVM in daemon mode. Created when the first session is opened */
+    public static DaemonSessions sessions;
     public static String buildDate;
 
     /**
@@ -60,6 +69,10 @@ public class PyBoofEntryPoint {
            port = Integer.parseInt(args[0]);
         GatewayServer gatewayServer = new GatewayServer(new PyBoofEntryPoint(), port);
         gatewayServer.start();
+
+        // Let Python know it can connect now
+        System.out.println(READY_LINE + " port=" + port);
+        System.out.flush();
     }
 
     public static void setMaxThreads(int maxThreads) {
@@ -78,8 +91,67 @@ public class PyBoofEntryPoint {
     }
 
     public static void initializeMmap(String filePath, int sizeMB) {
+        initializeMmap(filePath, sizeMB, 1, sizeMB);
+    }
+
+    public static BoofMemoryMapped initializeMmap(String filePath, int slotSizeMB, int numSlots, int maxSlotSizeMB) {
         // no need to do special cleanup if mmap already exists.  It will be cleaned up by GC
-        mmap = new BoofMemoryMapped(filePath, sizeMB);
+        mmap = new BoofMemoryMapped(filePath, slotSizeMB, numSlots, maxSlotSizeMB);
+        return mmap;
+    }
+
+    /**
+     * Creates an additional memory mapped file, e.g. for another Python thread. Unlike initializeMmap() the
+     * global instance is not replaced
+     */
+    public static BoofMemoryMapped createMmap(String filePath, int slotSizeMB, int numSlots, int maxSlotSizeMB) {
+        return new BoofMemoryMapped(filePath, slotSizeMB, numSlots, maxSlotSizeMB);
+    }
+
+    /**
+     * Creates slots which are stored in the JVM's heap and copied to Python as byte arrays. Used when memory mapped
+     * files are disabled
+     */
+    public static BoofMemoryMapped createHeapSlots(int slotBytes, int numSlots, int maxSlotSizeMB) {
+        return new BoofMemoryMapped(slotBytes, numSlots, maxSlotSizeMB);
+    }
+
+    /**
+     * Opens a session for a Python process which is sharing this JVM as a daemon
+     *
+     * @param buildDate Build date of the Python client. Must match the JVM's
+     * @return ID of the session
+     */
+    public static synchronized int openSession(String buildDate) {
+        if (sessions == null)
+            sessions = new DaemonSessions(DaemonSessions.DEFAULT_TIMEOUT_SECONDS);
+        return sessions.open(buildDate);
+    }
+
+    public static BoofMemoryMapped initializeSessionMmap(int session, String filePath, int slotSizeMB, int numSlots,
+                                                         int maxSlotSizeMB) {
+        return sessions.initializeMmap(session, filePath, slotSizeMB, numSlots, maxSlotSizeMB);
+    }
+
+    /**
+     * Creates an additional memory mapped file for a session, e.g. for another Python thread. Unlike createMmap()
+     * the file is released when the session is closed or reclaimed
+     */
+    public static BoofMemoryMapped createSessionMmap(int session, String filePath, int slotSizeMB, int numSlots,
+                                                     int maxSlotSizeMB) {
+        return sessions.createChannel(session, filePath, slotSizeMB, numSlots, maxSlotSizeMB);
+    }
+
+    public static void releaseSessionMmap(int session, String filePath) {
+        sessions.releaseChannel(session, filePath);
+    }
+
+    public static void heartbeat(int session) {
+        sessions.heartbeat(session);
+    }
+
+    public static void closeSession(int session) {
+        sessions.close(session);
     }
 
     /**
@@ -138,6 +210,58 @@ public class PyBoofEntryPoint {
         return array;
     }
 
+    /**
+     * Reads the image from the mmap slot, detects and describes features, and writes all the results back into the
+     * same slot. Everything is done in a single call from Python.
+     *
+     * @param image (Optional) Storage for the input image. If null a new image is created
+     * @return The image the input was read into, so that it can be recycled
+     */
+    public static ImageGray detectDescribeMmap(BoofMemoryMapped mmap, int slot, DetectDescribePoint alg, ImageGray image) {
+        image = mmap.readImage_Gray(slot, image);
+        long before = System.nanoTime();
+        alg.detect(image);
+        mmap.addComputeNanos(System.nanoTime() - before);
+        mmap.write_DetectDescribe(slot, alg);
+        return image;
+    }
+
+    /**
+     * Detects and describes features in a Java image and writes all the results into the mmap slot
+     */
+    public static void detectDescribe(BoofMemoryMapped mmap, int slot, DetectDescribePoint alg, ImageBase image) {
+        long before = System.nanoTime();
+        alg.detect(image);
+        mmap.addComputeNanos(System.nanoTime() - before);
+        mmap.write_DetectDescribe(slot, alg);
+    }
+
+    /**
+     * Reads the image from the mmap slot, computes dense descriptors, and writes the locations and descriptors back
+     * into the same slot.
+     *
+     * @param image (Optional) Storage for the input image. If null a new image is created
+     * @return The image the input was read into, so that it can be recycled
+     */
+    public static ImageGray describeDenseMmap(BoofMemoryMapped mmap, int slot, DescribeImageDense alg, ImageGray image) {
+        image = mmap.readImage_Gray(slot, image);
+        long before = System.nanoTime();
+        alg.process(image);
+        mmap.addComputeNanos(System.nanoTime() - before);
+        mmap.write_DescribeDense(slot, alg);
+        return image;
+    }
+
+    /**
+     * Computes dense descriptors in a Java image and writes the locations and descriptors into the mmap slot
+     */
+    public static void describeDense(BoofMemoryMapped mmap, int slot, DescribeImageDense alg, ImageBase image) {
+        long before = System.nanoTime();
+        alg.process(image);
+        mmap.addComputeNanos(System.nanoTime() - before);
+        mmap.write_DescribeDense(slot, alg);
+    }
+
     public static List<String> getPublicFields(String classPath) {
         List<String> list = new ArrayList<String>();
 
@@ -165,6 +289,61 @@ public class PyBoofEntryPoint {
         return list;
     }
 
+    /**
+     * Returns the public fields of a class as a single comma separated string so that they can be sent to Python
+     * in one call
+     */
+    public static String getPublicFieldNames(String classPath) {
+        return String.join(",", getPublicFields(classForPath(classPath)));
+    }
+
+    /**
+     * Looks up a class from its path. Nested classes can be separated by '$' or '.'
+     */
+    public static Class<?> classForPath(String classPath) {
+        String path = classPath;
+        while (true) {
+            try {
+                return Class.forName(path);
+            } catch (ClassNotFoundException e) {
+                int index = path.lastIndexOf('.');
+                if (index < 0)
+                    throw new IllegalArgumentException("Can't find class " + classPath);
+                path = path.substring(0, index) + "$" + path.substring(index + 1);
+            }
+        }
+    }
+
+    public static String getClassName(Object o) {
+        return o.getClass().getName();
+    }
+
+    /**
+     * Describes the type of an image, or an ImageType, as "family ordinal,data type,number of bands" so that
+     * Python can learn all three with a single call
+     */
+    public static String imageTypeSummary(Object imageOrType) {
+        ImageType<?> type = imageOrType instanceof ImageBase ?
+                ((ImageBase<?>) imageOrType).getImageType() : (ImageType<?>) imageOrType;
+        return type.getFamily().ordinal() + "," + type.getDataType() + "," + type.getNumBands();
+    }
+
+    /**
+     * Packs primitive fields of every object in the list into a byte array. Used when there's no memory mapped
+     * file. See {@link FieldSnapshot}
+     */
+    public static byte[] snapshotFields(Object objects, String paths) {
+        return FieldSnapshot.snapshot(objects, paths);
+    }
+
+    /**
+     * Reads fields of any type, e.g. strings and enums, from every object in the list. See
+     * {@link FieldSnapshot#snapshotValues}
+     */
+    public static byte[] snapshotValues(Object objects, String paths) {
+        return FieldSnapshot.snapshotValues(objects, paths);
+    }
+
     public static boolean isConfigClass(Object o) {
         return o instanceof Configuration;
     }
@@ -0,0 +1,74 @@
+package pyboof;
+
+import org.junit.Test;
+
+import java.io.File;
+import java.io.IOException;
+
+import static org.junit.Assert.*;
+
+/**
+ * @author Peter Abeles
+ */
+public class TestDaemonSessions {
+	/** Build date which won't conflict with any other session opened by the tests */
+	static String buildDate() {
+		return PyBoofEntryPoint.buildDate == null ? "test" : PyBoofEntryPoint.buildDate;
+	}
+
+	static File createFile() throws IOException {
+		File file = File.createTempFile("pyboof_session", ".mmap");
+		file.deleteOnExit();
+		return file;
+	}
+
+	@Test
+	public void close_releasesChannels() throws IOException {
+		DaemonSessions alg = new DaemonSessions(60);
+		int id = alg.open(buildDate());
+		File main = createFile();
+		File channel = createFile();
+		alg.initializeMmap(id, main.getPath(), 1, 2, 1);
+		alg.createChannel(id, channel.getPath(), 1, 2, 1);
+		assertEquals(1, alg.lookup(id).channels.size());
+
+		alg.close(id);
+		assertFalse(main.exists());
+		assertFalse(channel.exists());
+		assertEquals(0, alg.getNumSessions());
+	}
+
+	@Test
+	public void reapIdle_releasesChannels() throws Exception {
+		DaemonSessions alg = new DaemonSessions(0);
+		int id = alg.open(buildDate());
+		File channel = createFile();
+		alg.createChannel(id, channel.getPath(), 1, 2, 1);
+
+		Thread.sleep(5);
+		alg.reapIdle();
+		assertFalse(channel.exists());
+		assertEquals(0, alg.getNumSessions());
+	}
+
+	@Test
+	public void releaseChannel() throws IOException {
+		DaemonSessions alg = new DaemonSessions(60);
+		int id = alg.open(buildDate());
+		File a = createFile();
+		File b = createFile();
+		alg.createChannel(id, a.getPath(), 1, 2, 1);
+		alg.createChannel(id, b.getPath(), 1, 2, 1);
+
+		alg.releaseChannel(id, a.getPath());
+		assertFalse(a.exists());
+		assertTrue(b.exists());
+		assertEquals(1, alg.lookup(id).channels.size());
+
+		// Releasing something that's already gone does nothing
+		alg.releaseChannel(id, a.getPath());
+		alg.close(id);
+		alg.releaseChannel(id, b.getPath());
+		assertFalse(b.exists());
+	}
+}
@@ -2,10 +2,14 @@ import atexit
 import mmap
 import os
 import signal
+import struct
 import subprocess
+import threading
 import time
+import weakref
 import numpy as np
 import sys
+from contextlib import contextmanager
 
 from py4j.java_gateway import JavaGateway
 from py4j.java_gateway import GatewayParameters
@@ -29,34 +33,153 @@ if build_date is None:
 # Class which stores all global variables. This is done because if you import a global the reference is copied.
 # As a result if it ever gets modified you're referencing the old object
 class PBGlobal:
-    gateway = None
-    mmap_size = 0
-    mmap_file = None
     java_pid = None
+    # ID of the session on a shared daemon JVM. None if this process has its own JVM
+    session_id = None
+    # Arguments passed to init_pyboof() when the JVM is started lazily. None once it has been started
+    lazy_args = None
+
+    _gateway = None
+    _start_lock = threading.RLock()
+
+    # Channel created by init_pyboof() and the thread it belongs to. Other threads get their own channels so that
+    # their transfers can't overwrite each other
+    _mmap_channel = None
+    _mmap_owner = None
+    # (size_mb, num_slots, max_size_mb) used to create channels for other threads
+    _mmap_settings = None
+    # Incremented each time init_pyboof() creates a new channel, which makes the thread channels stale
+    _mmap_generation = 0
+    _thread_channels = threading.local()
+
+    def _start_if_lazy(self):
+        with self._start_lock:
+            if self.lazy_args is None:
+                return
+            args = self.lazy_args
+            self.lazy_args = None
+            try:
+                init_pyboof(**args)
+            except BaseException:
+                # Undo the partial start so that the next access tries again instead of using a broken gateway
+                _reset_failed_start()
+                self.lazy_args = args
+                raise
+
+    @property
+    def gateway(self):
+        """
+        Py4J gateway to the JVM. If the JVM is started lazily, the first access launches it
+        """
+        if self._gateway is None:
+            self._start_if_lazy()
+        return self._gateway
+
+    @gateway.setter
+    def gateway(self, value):
+        self._gateway = value
+
+    @property
+    def mmap_channel(self):
+        """
+        The MmapChannel used by the calling thread. The thread which called init_pyboof() uses the channel it created.
+        Any other thread gets its own channel, with its own file and BoofMemoryMapped in Java, the first time it
+        needs one. See use_mmap_channel() to pick the channel explicitly.
+        """
+        local = self._thread_channels
+        if getattr(local, "generation", None) == self._mmap_generation:
+            return local.channel
+
+        if self._mmap_channel is None:
+            self._start_if_lazy()
+            if self._mmap_channel is None:
+                return None
+        if self._mmap_owner == threading.get_ident():
+            return self._mmap_channel
+
+        local.channel = create_mmap_channel(*self._mmap_settings)
+        local.generation = self._mmap_generation
+        return local.channel
+
+    def peek_mmap_channel(self):
+        """
+        The calling thread's channel if it has one. Unlike mmap_channel, a channel is never created
+        """
+        local = self._thread_channels
+        if getattr(local, "generation", None) == self._mmap_generation:
+            return local.channel
+        if self._mmap_owner == threading.get_ident():
+            return self._mmap_channel
+        return None
+
+    @mmap_channel.setter
+    def mmap_channel(self, value):
+        self._mmap_channel = value
+        self._mmap_owner = threading.get_ident()
+        self._mmap_generation += 1
+
+    @property
+    def mmap_file(self):
+        """
+        The memory mapped file. Changes if the file is resized. None if memory mapped files are not being used
+        """
+        return None if self.mmap_channel is None else self.mmap_channel.mm
+
+    @property
+    def mmap_size(self):
+        """
+        Current size of a single slot in bytes
+        """
+        return 0 if self.mmap_channel is None else self.mmap_channel.slot_bytes
 
 pbg = PBGlobal()
 
-def init_pyboof(java_port: int = 25333, python_port: int = 25334, size_mb: int = 20):
+# Line the JVM prints to stdout once the gateway is accepting connections. Must match PyBoofEntryPoint.READY_LINE
+JVM_READY_LINE = "PyBoof ready"
+# How long to wait for a newly launched JVM to say it's ready, in seconds
+JVM_STARTUP_TIMEOUT = 15.0
+# How often a client lets the daemon JVM know it's still alive, in seconds. Must be well under
+# DaemonSessions.DEFAULT_TIMEOUT_SECONDS
+DAEMON_HEARTBEAT_PERIOD = 10.0
+
+def init_pyboof(java_port: int = 25333, python_port: int = 25334, size_mb: int = 20, num_slots: int = 4,
+                max_size_mb: int = 256, lazy: bool = False, daemon: bool = False):
     """
     Initializes PyBoof by connecting a Java Virtual Machine (JVM) using Py4J and if requested, will create a
     memory mapped file to enabled much faster file transfers of larger objects.
 
     If you wish to run multiple independent processes, then you launch each process with a unique port.
-    :param size_mb: Size of the memory mapped file in megabytes. If <= 0 then memory mapped files will not be used
+    :param size_mb: Size of each slot in the memory mapped file in megabytes. If <= 0 then memory mapped files will
+    not be used and data is copied through Py4J as byte arrays instead. See HeapChannel
+    :param num_slots: Number of slots the memory mapped file is split into. See MmapChannel
+    :param max_size_mb: Slots grow on demand when a payload doesn't fit, up to this size in megabytes
+    :param lazy: If True the settings are saved and the JVM is launched the first time it's needed
+    :param daemon: If True a long lived JVM is shared with other Python processes. This process opens its own
+    session and memory mapped file on it, and the JVM is left running on exit. See connect_daemon()
     """
     global pbg
 
     # The user is re-initializing for some reason. Let's close the gateway if already open
-    if pbg.gateway is not None:
+    if pbg._gateway is not None:
         print("Closing previously open gateway", file=sys.stderr)
         shutdown_jvm()
 
+    if lazy:
+        pbg.lazy_args = dict(java_port=java_port, python_port=python_port, size_mb=size_mb,
+                             num_slots=num_slots, max_size_mb=max_size_mb, daemon=daemon)
+        return
+    pbg.lazy_args = None
+
+    if daemon:
+        connect_daemon(java_port, size_mb, num_slots, max_size_mb)
+        return
+
     pbg.gateway = JavaGateway(gateway_parameters=GatewayParameters(port=java_port, auto_field=True),
                               callback_server_parameters=CallbackServerParameters(port=python_port,
                                                                                   daemonize=True))
 
     # print("gateway={}".format(id(pbg.gateway)))
-    signal.signal(signal.SIGINT, signal_handler)
+    _install_signal_handler()
 
     # kill java on a regular exit too
     atexit.register(shutdown_jvm)
@@ -65,23 +188,104 @@ def init_pyboof(java_port: int = 25333, python_port: int = 25334, size_mb: int =
         # print("Launching Java process: java_port={} python_port={}".format(java_port, python_port))
         jar_path = os.path.realpath(__file__)
         jar_path = os.path.join(os.path.dirname(jar_path), "PyBoof-all.jar")
-        proc = subprocess.Popen(["java", "-jar", jar_path, str(java_port)])
+        proc = subprocess.Popen(["java", "-jar", jar_path, str(java_port)], stdout=subprocess.PIPE,
+                                universal_newlines=True)
         pbg.java_pid = proc.pid
-        time.sleep(0.1)
-        # closed loop initialization.  If it fails for 5 seconds give up
-        start_time = time.time()
-        success = False
-        while time.time() - start_time < 5.0:
-            if check_jvm(True):
-                success = True
-                break
-
-        if not success:
-            print("Failed to successfully launch the JVM after 5 seconds.  Aborting", file=sys.stderr)
-            pass
+
+        # Block until the JVM says it's ready instead of polling the gateway
+        if not _wait_for_jvm_ready(proc, JVM_STARTUP_TIMEOUT) or not check_jvm(True):
+            print("Failed to successfully launch the JVM after {} seconds.  Aborting".format(JVM_STARTUP_TIMEOUT),
+                  file=sys.stderr)
 
     if size_mb > 0:
-        __init_memmap(size_mb)
+        __init_memmap(size_mb, num_slots, max_size_mb)
+    else:
+        __init_heap_slots(num_slots, max_size_mb)
+
+
+def connect_daemon(java_port: int = 25333, size_mb: int = 20, num_slots: int = 4, max_size_mb: int = 256):
+    """
+    Connects to a shared PyBoof JVM, launching it if nobody else has yet. The JVM is detached from this process
+    and keeps running after it exits, so later processes skip JVM startup and get code the JIT has already warmed
+    up. Each process gets its own gateway session and memory mapped file. A background thread sends heartbeats and
+    the daemon reclaims sessions which stop sending them, e.g. if a client crashed.
+
+    Python callbacks are not available in daemon mode since all the clients share one JVM.
+    """
+    global pbg
+
+    pbg.gateway = JavaGateway(gateway_parameters=GatewayParameters(port=java_port, auto_field=True))
+    _install_signal_handler()
+    atexit.register(shutdown_jvm)
+
+    if not _ping_jvm():
+        jar_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "PyBoof-all.jar")
+        proc = subprocess.Popen(["java", "-jar", jar_path, str(java_port)], stdout=subprocess.PIPE,
+                                universal_newlines=True, start_new_session=True)
+        if not _wait_for_jvm_ready(proc, JVM_STARTUP_TIMEOUT):
+            raise RuntimeError("Failed to launch the daemon JVM after {} seconds".format(JVM_STARTUP_TIMEOUT))
+
+    entry = pbg.gateway.jvm.pyboof.PyBoofEntryPoint
+    try:
+        pbg.session_id = entry.openSession(build_date)
+    except Py4JError as e:
+        raise RuntimeError("Daemon JVM on port {} was built for a different version of PyBoof. Stop it and try "
+                           "again. {}".format(java_port, e))
+
+    threading.Thread(target=_send_heartbeats, args=(pbg.session_id,), name="pyboof-heartbeat", daemon=True).start()
+
+    if size_mb > 0:
+        __init_memmap(size_mb, num_slots, max_size_mb)
+    else:
+        __init_heap_slots(num_slots, max_size_mb)
+
+
+def _ping_jvm():
+    """
+    True if there's a JVM which responds on the gateway's port
+    """
+    try:
+        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.nothing()
+        return True
+    except Py4JNetworkError:
+        return False
+
+
+def _send_heartbeats(session_id):
+    """
+    Lets the daemon know this process is still using its session. Stops once the session is closed
+    """
+    while pbg.session_id == session_id:
+        time.sleep(DAEMON_HEARTBEAT_PERIOD)
+        gateway = pbg._gateway
+        if gateway is None or pbg.session_id != session_id:
+            return
+        try:
+            gateway.jvm.pyboof.PyBoofEntryPoint.heartbeat(session_id)
+        except Py4JError as e:
+            print("PyBoof daemon heartbeat failed. {}".format(e), file=sys.stderr)
+            return
+
+
+def _wait_for_jvm_ready(proc, timeout):
+    """
+    Waits for the JVM to print JVM_READY_LINE. Everything it prints to stdout is passed along to Python's stdout
+
+    :return: True if the JVM is ready or False if it exited or timed out
+    """
+    ready = threading.Event()
+
+    def forward_stdout():
+        for line in proc.stdout:
+            if not ready.is_set() and line.startswith(JVM_READY_LINE):
+                ready.set()
+                continue
+            sys.stdout.write(line)
+        # The JVM exited. Don't make the caller wait for the timeout
+        ready.set()
+
+    threading.Thread(target=forward_stdout, name="pyboof-jvm-stdout", daemon=True).start()
+    return ready.wait(timeout) and proc.poll() is None
 
 
 # Used to change the number of threads the Java code can run inside of
@@ -116,17 +320,56 @@ def check_jvm(set_date):
 
 def shutdown_jvm():
     global pbg
-    if pbg.java_pid is None:
+    if pbg.session_id is not None:
+        # A shared daemon JVM is left running. Just give back this process's session
+        session_id = pbg.session_id
+        pbg.session_id = None
+        if pbg._mmap_channel is not None:
+            pbg._mmap_channel.close()
+            pbg.mmap_channel = None
+        try:
+            pbg._gateway.jvm.pyboof.PyBoofEntryPoint.closeSession(session_id)
+        except Py4JError:
+            pass
+        pbg._gateway.close()
+        pbg.gateway = None
+    elif pbg.java_pid is None:
         pass
-    elif pbg.gateway is None:
+    elif pbg._gateway is None:
         pass
     else:
         # shutdown the gateway so that it doesn't spew out a billion error messages when it can't connect
         # to the JVM
-        pbg.gateway.shutdown()
-        gateway = None
+        pbg._gateway.shutdown()
+        pbg.gateway = None
         os.kill(pbg.java_pid, signal.SIGTERM)
-        java_pid = None
+        pbg.java_pid = None
+
+
+def _reset_failed_start():
+    """
+    Closes whatever a failed init_pyboof() managed to open so that it can be called again
+    """
+    try:
+        shutdown_jvm()
+    except Exception:
+        pass
+    if pbg._gateway is not None:
+        try:
+            pbg._gateway.shutdown()
+        except Exception:
+            pass
+        pbg.gateway = None
+    pbg.session_id = None
+
+
+def _install_signal_handler():
+    """
+    Python only lets the main thread install signal handlers. When the JVM is launched lazily from another thread
+    control-c isn't caught, but the JVM is still killed on exit by atexit
+    """
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, signal_handler)
 
 
 # Catch control-c and kill the java process "gracefully" first.
@@ -139,28 +382,439 @@ def signal_handler(signal, frame):
         pass
 
 
-def __init_memmap(size_mb=20):
+def __init_memmap(size_mb=20, num_slots=4, max_size_mb=256):
     """
     Call to enable use of memory mapped files for quick communication between Python and Java.  This
     faster communication method requires specialized code so is only used when large amounts of memory
     is being transferred.
 
-    :param size_mb: Size of the memory mapped file in megabytes
+    :param size_mb: Size of each slot in megabytes
     :type size_mb: int
+    :param num_slots: Number of slots the file is split into
+    :type num_slots: int
+    :param max_size_mb: Largest size a slot can grow to in megabytes
+    :type max_size_mb: int
     """
     global pbg
-    import tempfile
-    mmap_path = os.path.join(tempfile.gettempdir(), "pyboof_mmap_{}".format(pbg.java_pid))
+    if pbg._mmap_channel is not None:
+        pbg._mmap_channel.close()
+    entry = pbg.gateway.jvm.pyboof.PyBoofEntryPoint
+    if pbg.session_id is None:
+        mmap_path, max_size_mb = _new_mmap_path("pyboof_mmap_{}".format(os.getpid()), size_mb, num_slots, max_size_mb)
+        java_mmap = entry.initializeMmap(mmap_path, size_mb, num_slots, max(size_mb, max_size_mb))
+    else:
+        # Every session on a daemon JVM gets its own file
+        mmap_path, max_size_mb = _new_mmap_path("pyboof_mmap_{}_{}".format(os.getpid(), pbg.session_id),
+                                                size_mb, num_slots, max_size_mb)
+        java_mmap = entry.initializeSessionMmap(pbg.session_id, mmap_path, size_mb, num_slots,
+                                                max(size_mb, max_size_mb))
     # print("mmap_path=", mmap_path)
-    pbg.mmap_size = size_mb * 1024 * 1024
-    pbg.gateway.jvm.pyboof.PyBoofEntryPoint.initializeMmap(mmap_path, size_mb)
+    pbg._mmap_settings = (size_mb, num_slots, max_size_mb)
+    pbg.mmap_channel = _open_mmap_channel(mmap_path, java_mmap)
+    pbg.mmap_fid = pbg.mmap_channel.fid
+
+
+def __init_heap_slots(num_slots=4, max_size_mb=256):
+    """
+    Used instead of a memory mapped file when they are disabled, e.g. in sandboxes which don't allow shared files
+    """
+    global pbg
+    if pbg._mmap_channel is not None:
+        pbg._mmap_channel.close()
+    pbg._mmap_settings = (0, num_slots, max_size_mb)
+    pbg.mmap_channel = create_heap_channel(num_slots, max_size_mb)
+    pbg.mmap_fid = None
+
+
+# Directory for the memory mapped files when PYBOOF_MMAP_DIR isn't set. Memory backed, unlike most temp directories
+SHARED_MEMORY_DIR = "/dev/shm"
+
+
+def _new_mmap_path(name, size_mb, num_slots, max_size_mb):
+    """
+    Selects where a new memory mapped file goes. Shared memory is used if it's available and large enough for the
+    file, otherwise the temp directory. Shared memory is often small, e.g. inside of Docker, and running out of
+    it while the file grows would crash both processes, so the largest slot size is reduced until the file will
+    always fit.
+
+    :return: path to the file, largest slot size in megabytes
+    """
+    import tempfile
+
+    mb = 1024 * 1024
+    directory = os.environ.get("PYBOOF_MMAP_DIR")
+    if directory is None and os.path.isdir(SHARED_MEMORY_DIR) and os.access(SHARED_MEMORY_DIR, os.W_OK):
+        stats = os.statvfs(SHARED_MEMORY_DIR)
+        available_mb = (stats.f_bavail * stats.f_frsize - MMAP_REGION_BYTES) // (num_slots * mb)
+        if available_mb >= size_mb:
+            directory = SHARED_MEMORY_DIR
+            if available_mb < max_size_mb:
+                print("Only {} MB of shared memory per mmap slot. Reducing max_size_mb from {}".
+                      format(available_mb, max_size_mb), file=sys.stderr)
+                max_size_mb = max(size_mb, available_mb)
+    if directory is None:
+        directory = tempfile.gettempdir()
+
+    _remove_stale_mmap_files(directory)
+    return os.path.join(directory, name), max_size_mb
+
+
+def _remove_stale_mmap_files(directory):
+    """
+    Deletes files left behind by processes which died before they could unlink their memory mapped files
+    """
+    if os.name == 'nt':
+        return
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith("pyboof_mmap_"):
+            continue
+        try:
+            os.kill(int(name.split("_")[2]), 0)
+        except ProcessLookupError:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+        except (ValueError, OSError):
+            # Not a pid or owned by another user
+            pass
+
+
+def _open_mmap_channel(mmap_path, java_mmap):
     # Open file in read,write,binary mode
-    pbg.mmap_fid = open(mmap_path, "r+b")
+    fid = open(mmap_path, "r+b")
+    mm = _map_file(fid)
+    if os.name != 'nt':
+        # Both processes have the file open now, so the name isn't needed. Once they're done with it, or crash,
+        # the OS will reclaim it. Resizing goes through the open handles
+        os.remove(mmap_path)
+    found_slots, slot_bytes = __check_mmap_region_header(mm)
+    return MmapChannel(mm, fid, java_mmap, found_slots, slot_bytes)
+
+
+_channel_counter = iter(range(1, sys.maxsize))
+
+
+def create_mmap_channel(size_mb: int = 20, num_slots: int = 4, max_size_mb: int = 256):
+    """
+    Creates a new MmapChannel with its own file and its own BoofMemoryMapped in Java. Transfers on different
+    channels can happen at the same time from different threads. The file is released once the channel is
+    garbage collected. If size_mb <= 0 then a HeapChannel is created instead.
+    """
+    if size_mb <= 0:
+        return create_heap_channel(num_slots, max_size_mb)
+    mmap_path, max_size_mb = _new_mmap_path("pyboof_mmap_{}_c{}".format(os.getpid(), next(_channel_counter)),
+                                            size_mb, num_slots, max_size_mb)
+    entry = pbg.gateway.jvm.pyboof.PyBoofEntryPoint
+    session_id = pbg.session_id
+    if session_id is None:
+        java_mmap = entry.createMmap(mmap_path, size_mb, num_slots, max(size_mb, max_size_mb))
+    else:
+        # The daemon releases the file if this process goes away without closing its session
+        java_mmap = entry.createSessionMmap(session_id, mmap_path, size_mb, num_slots, max(size_mb, max_size_mb))
+    channel = _open_mmap_channel(mmap_path, java_mmap)
+    weakref.finalize(channel, _discard_mmap_file, channel.fid, mmap_path, session_id)
+    return channel
+
+
+def create_heap_channel(num_slots: int = 4, max_size_mb: int = 256):
+    """
+    Creates a HeapChannel, which copies payloads to and from Java instead of sharing a file
+    """
+    java_mmap = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.createHeapSlots(HEAP_SLOT_BYTES, num_slots, max_size_mb)
+    return HeapChannel(java_mmap, java_mmap.getNumSlots(), java_mmap.getSlotBytes(), java_mmap.getMaxSlotBytes())
+
+
+def _discard_mmap_file(fid, mmap_path, session_id=None):
+    fid.close()
+    if session_id is not None and session_id == pbg.session_id:
+        # Otherwise the daemon holds on to the file until the session is closed
+        try:
+            pbg.gateway.jvm.pyboof.PyBoofEntryPoint.releaseSessionMmap(session_id, mmap_path)
+        except Py4JError:
+            pass
+    if os.name != 'nt':
+        # Already unlinked when it was opened
+        return
+    try:
+        os.remove(mmap_path)
+    except OSError:
+        # The file can't be deleted while Java still has it mapped
+        pass
+
+
+@contextmanager
+def use_mmap_channel(channel):
+    """
+    Makes the current thread use the specified channel until the context exits, e.g. a channel which is handed
+    out by a pool of channels
+    """
+    local = pbg._thread_channels
+    previous = getattr(local, "channel", None), getattr(local, "generation", None)
+    local.channel = channel
+    local.generation = pbg._mmap_generation
+    try:
+        yield channel
+    finally:
+        local.channel, local.generation = previous
+
+
+def _map_file(fid):
+    """
+    Memory maps the entire file
+    """
     if os.name == 'nt':
-        mmap_file = mmap.mmap(pbg.mmap_fid.fileno(), length=0)
+        return mmap.mmap(fid.fileno(), length=0)
     else:
-        pbg.mmap_file = mmap.mmap(pbg.mmap_fid.fileno(), length=0, flags=mmap.MAP_SHARED,
-                              prot=mmap.PROT_READ | mmap.PROT_WRITE)
+        return mmap.mmap(fid.fileno(), length=0, flags=mmap.MAP_SHARED, prot=mmap.PROT_READ | mmap.PROT_WRITE)
+
+
+def __check_mmap_region_header(mm):
+    """
+    Makes sure the memory mapped file was created by a JVM which speaks the same protocol and byte order
+    """
+    magic, version, byte_order_mark, num_slots, slot_bytes = struct.unpack_from(MMAP_REGION_HEADER, mm, 0)
+    if magic != MMAP_MAGIC:
+        raise RuntimeError("Memory mapped file has an unexpected magic number {:08X}".format(magic))
+    if byte_order_mark != MMAP_BYTE_ORDER_MARK:
+        raise RuntimeError("Java and Python disagree on the native byte order")
+    if version != MMAP_PROTOCOL_VERSION:
+        raise RuntimeError("Memory mapped protocol versions do not match. Java={} Python={}".
+                           format(version, MMAP_PROTOCOL_VERSION))
+    return num_slots, slot_bytes
+
+
+# Version of the memory mapped protocol. Must match BoofMemoryMapped.PROTOCOL_VERSION in Java
+MMAP_PROTOCOL_VERSION = 8
+MMAP_MAGIC = 0x50424D4D
+MMAP_BYTE_ORDER_MARK = 0xFEFF
+# Header at the very start of the file: magic, protocol version, byte order mark, number of slots, bytes per slot
+MMAP_REGION_HEADER = '=IHHII'
+# Location of the slot size inside the region header. Java updates it when the file is resized
+MMAP_SLOT_BYTES_OFFSET = 12
+# Counters which Java keeps in the region header: nanoseconds spent computing in entry points, payload bytes it has
+# written, and the type of the last payload it wrote
+MMAP_COMPUTE_NANOS_OFFSET = 24
+MMAP_WRITTEN_BYTES_OFFSET = 32
+MMAP_LAST_TYPE_OFFSET = 40
+# Bytes reserved for the region header. Slots start at this offset
+MMAP_REGION_BYTES = 64
+# Slot which is used when one isn't specified. It's never leased
+MMAP_DEFAULT_SLOT = 0
+# Initial size of each slot in bytes when memory mapped files are disabled. See HeapChannel
+HEAP_SLOT_BYTES = 1024 * 1024
+
+# Everything is encoded in the host's native byte order. Each payload starts at the beginning of a slot and its
+# header is padded out to a multiple of 8 bytes so that the data which follows is aligned and can be viewed
+# directly with numpy
+# type, family, width, height, bands
+MMAP_IMAGE_HEADER = '=HBxIII'
+# type, number of elements
+MMAP_LIST_HEADER = '=HxxI'
+# type, number of elements, degrees of freedom
+MMAP_TUPLE_HEADER = '=HxxII4x'
+# type, number of elements
+MMAP_ARRAY_HEADER = '=HxxI'
+# type, number of features, descriptor degrees of freedom, descriptor list type
+MMAP_FEATURES_HEADER = '=HxxIII'
+# type, number of records, bytes in each record, bytes in the layout description
+MMAP_SNAPSHOT_HEADER = '=HxxIII'
+
+
+class MmapChannel:
+    """
+    Memory mapped file shared with Java which is split into fixed size slots. Each slot holds one payload, so
+    several transfers can be in flight at once without overwriting each other. Functions which are not given a slot
+    use MMAP_DEFAULT_SLOT. The other slots are handed out by lease(), e.g. so that the next frame can be uploaded
+    while the results from the previous one are still being read.
+
+    All the slots are the same size and they grow together. Before writing, Python asks Java to grow the file if a
+    payload won't fit. Java grows the file on its own when its output doesn't fit. Either way Java records the new
+    slot size in the region header, and sync() remaps the file on the Python side when it changes.
+    """
+
+    def __init__(self, mm, fid, java_mmap, num_slots: int, slot_bytes: int):
+        self.mm = mm
+        self.fid = fid
+        # Reference to BoofMemoryMapped in Java. Avoids looking up the static field on every call
+        self.java_mmap = java_mmap
+        self.num_slots = num_slots
+        self.slot_bytes = slot_bytes
+        self.pending_write = None
+        self._leased = set()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, slot=None) -> int:
+        """
+        Returns the slot which should be used and makes sure it's valid
+        """
+        if slot is None:
+            return MMAP_DEFAULT_SLOT
+        if not 0 <= slot < self.num_slots:
+            raise ValueError("Invalid slot {}. num_slots={}".format(slot, self.num_slots))
+        return slot
+
+    def offset(self, slot=None) -> int:
+        """
+        Location in bytes of the start of a slot
+        """
+        return MMAP_REGION_BYTES + self.resolve(slot) * self.slot_bytes
+
+    def prepare_write(self, slot: int, num_bytes: int) -> int:
+        """
+        Makes sure the slot can hold the payload, growing the file if needed, and returns the slot's offset
+
+        :param slot: Which slot will be written to
+        :param num_bytes: Size of the payload, including its header
+        """
+        if num_bytes > self.slot_bytes:
+            self.java_mmap.ensureCapacity(num_bytes)
+            self.sync()
+        # Recorded so that instrumentation can attribute the bytes once the payload's type has been written
+        self.pending_write = (slot, num_bytes)
+        return self.offset(slot)
+
+    def prepare_read(self, slot: int) -> int:
+        """
+        Called after Java has written into a slot. Remaps the file if Java had to grow it and returns the slot's
+        offset
+        """
+        self.sync()
+        return self.offset(slot)
+
+    def flush(self):
+        """
+        Called after a payload has been written and before Java is told to read it. The file is shared so there's
+        nothing to do
+        """
+        pass
+
+    def sync(self):
+        """
+        Checks to see if Java has resized the file and if so remaps it
+        """
+        slot_bytes = struct.unpack_from('=I', self.mm, MMAP_SLOT_BYTES_OFFSET)[0]
+        if slot_bytes == self.slot_bytes:
+            return
+        # The old mapping is left for the garbage collector since views into it might still exist
+        self.mm = _map_file(self.fid)
+        self.slot_bytes = slot_bytes
+
+    def lease(self) -> int:
+        """
+        Reserves a slot until it's released. Slots are handed out round robin so that the most recently released
+        slot is the last one to be reused.
+        """
+        num_leasable = self.num_slots - 1
+        with self._lock:
+            for i in range(num_leasable):
+                slot = 1 + (self._next + i) % num_leasable
+                if slot not in self._leased:
+                    self._leased.add(slot)
+                    self._next = slot % num_leasable
+                    return slot
+        raise RuntimeError("All {} mmap slots are leased. Increase num_slots in init_pyboof()".format(num_leasable))
+
+    def release(self, slot: int):
+        with self._lock:
+            self._leased.discard(slot)
+
+    @contextmanager
+    def leased(self):
+        """
+        Context manager which leases a slot and releases it on exit
+        """
+        slot = self.lease()
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def close(self):
+        try:
+            self.mm.close()
+        except BufferError:
+            # ndarray views still reference it. It will be unmapped once they are garbage collected
+            pass
+        self.fid.close()
+
+
+class HeapChannel(MmapChannel):
+    """
+    Used when memory mapped files are disabled. Payloads are encoded into a local buffer with the same layout as
+    the file and Java keeps its slots in its heap. flush() sends a payload to Java as a single byte array and
+    prepare_read() copies Java's output back the same way, so every transfer is one extra Py4J call no matter how
+    large it is. Both sides grow their slots on their own since only payloads are copied.
+    """
+
+    def __init__(self, java_mmap, num_slots: int, slot_bytes: int, max_slot_bytes: int):
+        super().__init__(bytearray(MMAP_REGION_BYTES + num_slots * slot_bytes), None, java_mmap,
+                         num_slots, slot_bytes)
+        self.max_slot_bytes = max_slot_bytes
+        # (slot, bytes) of the payload which has been written but not yet sent to Java
+        self._unsent = None
+
+    def prepare_write(self, slot: int, num_bytes: int) -> int:
+        if num_bytes > self.slot_bytes:
+            self._grow(num_bytes)
+        self.pending_write = (slot, num_bytes)
+        self._unsent = (slot, num_bytes)
+        return self.offset(slot)
+
+    def flush(self):
+        if self._unsent is None:
+            return
+        slot, num_bytes = self._unsent
+        self._unsent = None
+        base = self.offset(slot)
+        self.java_mmap.setPayload(slot, self.mm[base:base + num_bytes])
+
+    def prepare_read(self, slot: int) -> int:
+        payload = self.java_mmap.getPayload(slot)
+        if len(payload) > self.slot_bytes:
+            self._grow(len(payload))
+        base = self.offset(slot)
+        self.mm[base:base + len(payload)] = payload
+        return base
+
+    def sync(self):
+        pass
+
+    def _grow(self, num_bytes: int):
+        if num_bytes > self.max_slot_bytes:
+            raise ValueError("Payload of {} bytes exceeds the maximum slot size of {} bytes. Increase max_size_mb in "
+                             "init_pyboof()".format(num_bytes, self.max_slot_bytes))
+        larger = min(self.max_slot_bytes, (max(num_bytes, 2 * self.slot_bytes) + 7) // 8 * 8)
+        # A new buffer is allocated, instead of resizing in place, since ndarray views might reference the old one
+        mm = bytearray(MMAP_REGION_BYTES + self.num_slots * larger)
+        for slot in range(self.num_slots):
+            old = MMAP_REGION_BYTES + slot * self.slot_bytes
+            new = MMAP_REGION_BYTES + slot * larger
+            mm[new:new + self.slot_bytes] = self.mm[old:old + self.slot_bytes]
+        self.mm = mm
+        self.slot_bytes = larger
+
+    def close(self):
+        pass
+
+
+def mmap_view(dtype, shape, offset):
+    """
+    Returns an ndarray which is a view into the memory mapped file. Assigning to it writes directly into the file
+    and avoids creating intermediate copies.
+
+    :param dtype: Data type of each element
+    :param shape: Shape of the returned array
+    :param offset: Location in bytes of the first element
+    :return: ndarray which references the memory mapped file
+    """
+    count = int(np.prod(shape))
+    return np.frombuffer(pbg.mmap_file, dtype=dtype, count=count, offset=offset).reshape(shape)
 
 
 class MmapType:
@@ -187,6 +841,16 @@ class MmapType:
     ARRAY_S32 = 17
     ARRAY_F32 = 18
     ARRAY_F64 = 19
+    LIST_TUPLE_B = 20
+    DETECT_DESCRIBE = 21
+    DESCRIBE_DENSE = 22
+    FIELD_SNAPSHOT = 23
+    IMAGE_S8 = 24
+    IMAGE_U16 = 25
+    IMAGE_S16 = 26
+    IMAGE_S32 = 27
+    IMAGE_S64 = 28
+    IMAGE_F64 = 29
 
 
 def mmap_primitive_len(mmap_type: MmapType):
@@ -210,19 +874,19 @@ def mmap_primitive_len(mmap_type: MmapType):
 
 def mmap_primitive_format(mmap_type: MmapType):
     if mmap_type == MmapType.ARRAY_S8:
-        return ">b"
+        return "=b"
     elif mmap_type == MmapType.ARRAY_U8:
-        return ">B"
+        return "=B"
     elif mmap_type == MmapType.ARRAY_S16:
-        return ">h"
+        return "=h"
     elif mmap_type == MmapType.ARRAY_U16:
-        return ">H"
+        return "=H"
     elif mmap_type == MmapType.ARRAY_S32:
-        return ">i"
+        return "=i"
     elif mmap_type == MmapType.ARRAY_F32:
-        return ">f"
+        return "=f"
     elif mmap_type == MmapType.ARRAY_F64:
-        return ">d"
+        return "=d"
     else:
         raise Exception("Not a primitive array type")
 
@@ -246,8 +910,12 @@ def mmap_force_array_type(data_array, mmap_type: MmapType):
         raise Exception("Not a primitive array type")
 
 
+# The JVM isn't launched until something needs it, so importing PyBoof is cheap. Set PYBOOF_LAZY=0 to launch it now
+# and PYBOOF_DAEMON=1 to share a long lived JVM with other processes
 init_pyboof(java_port=int(os.environ.get('PYBOOF_JAVA_PORT', 25333)),
-            python_port=int(os.environ.get('PYBOOF_PYTHON_PORT', 25334)))
+            python_port=int(os.environ.get('PYBOOF_PYTHON_PORT', 25334)),
+            lazy=os.environ.get('PYBOOF_LAZY', '1') != '0',
+            daemon=os.environ.get('PYBOOF_DAEMON', '0') == '1')
 
 from pyboof.calib import *
 from pyboof.common import *
@@ -258,4 +926,7 @@ from pyboof.recognition import *
 from pyboof.feature import *
 from pyboof.stereo import *
 from pyboof.sfm import *
+from pyboof.pool import JvmPool
+from pyboof.aio import AsyncExecutor, ndarray_to_boof_async, boof_to_ndarray_async
+from pyboof.stats import enable_stats, disable_stats, reset_stats, stats, collect_stats
 import pyboof.swing
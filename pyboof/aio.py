@@ -0,0 +1,137 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncExecutor:
+    """
+    Runs blocking PyBoof calls on a bounded pool of threads so that they can be awaited without stalling the event
+    loop. Each thread has its own Py4J connection and its own mmap channel, so calls on different threads don't
+    interfere with each other.
+
+    At most max_pending calls can be queued or running at once. Callers beyond that wait in run() until there's
+    room, which provides backpressure. If the awaiting task is cancelled before its call has started, the call is
+    dropped. A call which has already started runs to completion in Java and its result is discarded. It still
+    counts against max_pending until it finishes.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32):
+        if max_pending < max_workers:
+            raise ValueError("max_pending must be at least max_workers")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pyboof-aio")
+        # asyncio.Semaphore can only be used with one event loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Calls fn(*args, **kwargs) on one of the threads and returns its result
+        """
+        semaphore = self._semaphore()
+        await semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            job = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        # The permit is held until the job is finished, not until the caller stops waiting. A cancelled caller
+        # doesn't stop a job which has already started in Java
+        job.add_done_callback(lambda _: _release_threadsafe(loop, semaphore))
+        return await asyncio.wrap_future(job, loop=loop)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _release_threadsafe(loop, semaphore):
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # The event loop has been closed so nobody can be waiting on the semaphore
+        pass
+
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+
+def get_default_executor() -> AsyncExecutor:
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = AsyncExecutor()
+        return _default_executor
+
+
+def set_default_executor(executor: AsyncExecutor):
+    """
+    Changes the executor used by the *_async functions when one isn't specified
+    """
+    global _default_executor
+    with _default_lock:
+        _default_executor = executor
+
+
+_object_locks_lock = threading.Lock()
+
+
+def _object_lock(obj):
+    """
+    Returns a lock which is unique to the object. Java algorithms and their Python wrappers store the results of the
+    last call, so only one call at a time can be using them
+    """
+    with _object_locks_lock:
+        lock = obj.__dict__.get("_aio_lock")
+        if lock is None:
+            lock = threading.Lock()
+            obj.__dict__["_aio_lock"] = lock
+        return lock
+
+
+async def run_async(fn, *args, executor: AsyncExecutor = None, owner=None, **kwargs):
+    """
+    Awaitable version of fn(*args, **kwargs)
+
+    :param executor: Which executor to run on. If None the default executor is used
+    :param owner: If not None, calls with the same owner are run one at a time, e.g. a detector which stores its
+    results
+    """
+    if executor is None:
+        executor = get_default_executor()
+    if owner is None:
+        return await executor.run(fn, *args, **kwargs)
+
+    def locked():
+        with _object_lock(owner):
+            return fn(*args, **kwargs)
+
+    return await executor.run(locked)
+
+
+async def ndarray_to_boof_async(npimg, boof_img=None, executor: AsyncExecutor = None):
+    """
+    Awaitable version of ndarray_to_boof()
+    """
+    from pyboof.image import ndarray_to_boof
+    return await run_async(ndarray_to_boof, npimg, boof_img, executor=executor)
+
+
+async def boof_to_ndarray_async(boof, executor: AsyncExecutor = None):
+    """
+    Awaitable version of boof_to_ndarray(). A copy is always returned since a view would be overwritten by the
+    next transfer on the same thread
+    """
+    from pyboof.image import boof_to_ndarray
+    return await run_async(boof_to_ndarray, boof, True, executor=executor)
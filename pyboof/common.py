@@ -1,3 +1,6 @@
+import copy
+import json
+
 from py4j import java_gateway
 from pyboof import pbg
 from six import string_types
@@ -6,10 +9,6 @@ import struct
 import numpy as np
 
 
-def exception_use_mmap():
-    raise Exception("Need to turn on mmap. Add pb.init_memmap() to your code before any other calls to PyBoof")
-
-
 def is_java_class(java_class, string_path):
     """True if the passed in object is the Class specified by the path"""
     return pbg.gateway.jvm.pyboof.PyBoofEntryPoint.isClass(java_class, string_path)
@@ -32,10 +31,67 @@ def python_to_java_double_array(array):
     return jarray
 
 
+# Public fields of Java classes keyed by the class's name. Classes can't change while the JVM is running, so each
+# class only needs to be looked up once
+_public_fields = {}
+
+
+def java_public_fields(java_object, class_name=None):
+    """
+    Returns the names of the public fields in the Java object's class as a frozenset
+
+    :param class_name: Path of the object's class. If None then it's looked up
+    """
+    entry_point = pbg.gateway.jvm.pyboof.PyBoofEntryPoint
+    if class_name is None:
+        class_name = entry_point.getClassName(java_object)
+    fields = _public_fields.get(class_name)
+    if fields is None:
+        names = entry_point.getPublicFieldNames(class_name)
+        fields = frozenset(names.split(",")) if names else frozenset()
+        _public_fields[class_name] = fields
+    return fields
+
+
+class JavaStatic:
+    """
+    Class attribute holding a static member of a Java class, e.g. an enum value. The JVM is only asked for it when
+    it's first read, so defining these doesn't launch the JVM when PyBoof is imported. It's looked up again if
+    the JVM is restarted.
+    """
+
+    def __init__(self, class_path, member=None, call=False):
+        """
+        :param class_path: Path of the Java class
+        :param member: Name of the static member. If None then the attribute's name is used
+        :param call: If True the member is a static method with no arguments and its result is returned
+        """
+        self.class_path = class_path
+        self.member = member
+        self.call = call
+        self._gateway = None
+        self._value = None
+
+    def __set_name__(self, owner, name):
+        if self.member is None:
+            self.member = name
+
+    def __get__(self, instance, owner):
+        gateway = pbg.gateway
+        if self._gateway is not gateway:
+            java_class = gateway.jvm
+            for name in self.class_path.split("."):
+                java_class = getattr(java_class, name)
+            value = getattr(java_class, self.member)
+            self._value = value() if self.call else value
+            self._gateway = gateway
+        return self._value
+
+
 class JavaWrapper:
-    def __init__(self, java_object=None):
+    def __init__(self, java_object=None, class_name=None):
         self.java_obj = java_object
-        self.java_fields = [x for x in pbg.gateway.jvm.pyboof.PyBoofEntryPoint.getPublicFields(self.java_obj.getClass())]
+        self.java_fields = java_public_fields(self.java_obj, class_name)
 
     def __getattr__(self, item):
         if "java_fields" in self.__dict__ and item in self.__dict__["java_fields"]:
@@ -50,7 +106,7 @@ class JavaWrapper:
             self.__dict__[key] = value
 
     def __dir__(self):
-        return sorted(set(self.__dict__.keys() + self.java_fields))
+        return sorted(set(self.__dict__.keys()) | self.java_fields)
 
     def set_java_object(self, obj):
         self.java_obj = obj
@@ -62,32 +118,146 @@ class JavaWrapper:
         return "Wrapped Java:\n" + self.java_obj.toString()
 
 
+# Default values of config classes, as returned by JavaConfig.to_dict(), keyed by class path
+_default_configs = {}
+# Names of the fields which are configs themselves keyed by class path
+_config_fields = {}
+# Class path of the Java config each JavaConfig subclass wraps
+_config_class_paths = {}
+
+
+def default_config(java_class_path):
+    """
+    Returns the default values of a config class as a dictionary. Only the first call for a class goes to Java
+    """
+    values = _default_configs.get(java_class_path)
+    if values is None:
+        serialization = pbg.gateway.jvm.pyboof.ConfigSerialization
+        values = json.loads(serialization.toJson(serialization.create(java_class_path)))
+        _default_configs[java_class_path] = values
+    return copy.deepcopy(values)
+
+
+def _config_field_names(java_class_path):
+    fields = _config_fields.get(java_class_path)
+    if fields is None:
+        names = pbg.gateway.jvm.pyboof.ConfigSerialization.getConfigFieldNames(java_class_path)
+        fields = frozenset(names.split(",")) if names else frozenset()
+        _config_fields[java_class_path] = fields
+    return fields
+
+
+def _changed_values(values, defaults):
+    changed = {}
+    for key, value in values.items():
+        default = defaults.get(key)
+        if isinstance(value, dict) and isinstance(default, dict):
+            nested = _changed_values(value, default)
+            if nested:
+                changed[key] = nested
+        elif key not in defaults or value != default:
+            changed[key] = value
+    return changed
+
+
+def _restore_config(cls, java_class_path, values):
+    config = cls.__new__(cls)
+    JavaConfig.__init__(config, java_class_path, values)
+    return config
+
+
 class JavaConfig(JavaWrapper):
     """
     Provides a nice python wrapper around Java classes.  Public variables are automatically turned into Python
     attributes
+
+    Every field can be read or changed at once with to_dict() and update(), or as YAML with to_yaml() and
+    update_yaml(), which takes a single call to Java instead of one for each field. Configs can be pickled, e.g. to
+    send them to a JvmPool worker. Only the values which differ from the defaults are pickled.
     """
 
     # TODO variables which are java classes are a little messed up
-    def __init__(self, java_class_path):
+    def __init__(self, java_class_path, values: dict = None):
+        """
+        :param java_class_path: Path of the Java class to create, or an existing Java config to wrap
+        :param values: Optional dictionary of field values which are changed from the defaults
+        """
+        serialization = pbg.gateway.jvm.pyboof.ConfigSerialization
         if isinstance(java_class_path, string_types):
-            self.java_class_path = java_class_path
-
-            words = java_class_path.replace('$', ".").split(".")
-
-            a = pbg.gateway.jvm.__getattr__(words[0])
-            for i in range(1, len(words)):
-                a = a.__getattr__(words[i])
-
-            self.java_obj = a.__call__()
+            if values:
+                java_obj = serialization.create(java_class_path, json.dumps(values))
+            else:
+                java_obj = serialization.create(java_class_path)
+            class_name = java_class_path
+            _config_class_paths.setdefault(type(self), java_class_path)
         else:
-            self.java_obj = java_class_path
-        JavaWrapper.__init__(self, self.java_obj)
+            java_obj = java_class_path
+            class_name = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.getClassName(java_obj)
+            if values:
+                serialization.apply(java_obj, json.dumps(values))
+        self.java_class_path = class_name
+        JavaWrapper.__init__(self, java_obj, class_name)
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        """
+        Creates the config with the values in the dictionary. Fields which aren't in the dictionary have their
+        default value
+        """
+        java_class_path = _config_class_paths.get(cls)
+        if java_class_path is None:
+            # The class path isn't known until an instance has been created
+            return cls().update(values)
+        return _restore_config(cls, java_class_path, values)
+
+    @classmethod
+    def from_yaml(cls, text: str):
+        """
+        Creates the config from YAML. Fields which aren't in the YAML have their default value
+        """
+        java_class_path = _config_class_paths.get(cls)
+        if java_class_path is None:
+            return cls().update_yaml(text)
+        config = cls.__new__(cls)
+        JavaConfig.__init__(config, pbg.gateway.jvm.pyboof.ConfigSerialization.create(java_class_path, text))
+        return config
+
+    def to_dict(self, changed_only=False) -> dict:
+        """
+        Returns the values of all the fields as a dictionary. Nested configs are nested dictionaries and enums
+        are their names. Fields which can't be converted are left out.
+
+        :param changed_only: If True then only values which differ from the defaults are returned
+        """
+        values = json.loads(pbg.gateway.jvm.pyboof.ConfigSerialization.toJson(self.java_obj))
+        if changed_only:
+            values = _changed_values(values, default_config(self.java_class_path))
+        return values
+
+    def to_yaml(self) -> str:
+        return pbg.gateway.jvm.pyboof.ConfigSerialization.toYaml(self.java_obj)
+
+    def update(self, values: dict):
+        """
+        Changes the fields to the values in the dictionary. Enums can be specified by name. Returns self
+        """
+        pbg.gateway.jvm.pyboof.ConfigSerialization.apply(self.java_obj, json.dumps(values))
+        return self
+
+    def update_yaml(self, text: str):
+        """
+        Changes the fields to the values in the YAML. Returns self
+        """
+        pbg.gateway.jvm.pyboof.ConfigSerialization.apply(self.java_obj, text)
+        return self
+
+    def __reduce__(self):
+        return _restore_config, (type(self), self.java_class_path, self.to_dict(changed_only=True))
 
     def __getattr__(self, item):
         if "java_fields" in self.__dict__ and item in self.__dict__["java_fields"]:
             a = java_gateway.get_field(self.java_obj, item)
-            if pbg.gateway.jvm.pyboof.PyBoofEntryPoint.isConfigClass(a):
+            if a is not None and item in _config_field_names(self.__dict__["java_class_path"]):
                 return JavaConfig(a)
             else:
                 return a
@@ -129,7 +299,7 @@ def create_java_file(path: str):
     return pbg.gateway.jvm.java.io.File(path)
 
 
-def mmap_array_python_to_java(pylist, mmap_type: pyboof.MmapType):
+def mmap_array_python_to_java(pylist, mmap_type: pyboof.MmapType, slot=None):
     """
     Converts a python primitive list into a java primitive array
     """
@@ -138,29 +308,22 @@ def mmap_array_python_to_java(pylist, mmap_type: pyboof.MmapType):
     pylist = pyboof.mmap_force_array_type(pylist, mmap_type)
 
     num_elements = len(pylist)
-    mm = pbg.mmap_file
-
-    num_element_bytes = pyboof.mmap_primitive_len(mmap_type)
-    format = pyboof.mmap_primitive_format(mmap_type)
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
-    # max number of list elements it can write at once
-    max_elements = (pbg.mmap_size - 100) / num_element_bytes
+    header_bytes = struct.calcsize(pyboof.MMAP_ARRAY_HEADER)
+    base = channel.prepare_write(slot, header_bytes + pylist.nbytes)
 
-    # See if it can be writen in a single chunk
-    if max_elements < num_elements:
-        raise Exception("max_elements is too small")
-
-    # Write as much of the list as it can to the mmap file
-    mm.seek(0)
-    mm.write(struct.pack('>HI', mmap_type, num_elements))
-    for i in range(0, num_elements):
-        mm.write(struct.pack(format, pylist[i]))
+    # Write the entire array to the mmap file in a single bulk copy
+    struct.pack_into(pyboof.MMAP_ARRAY_HEADER, channel.mm, base, mmap_type, num_elements)
+    pyboof.mmap_view(pylist.dtype, (num_elements,), base + header_bytes)[:] = pylist
 
     # Now tell the java end to read what it just wrote
-    return pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.read_primitive_array(mmap_type)
+    channel.flush()
+    return channel.java_mmap.read_primitive_array(slot, mmap_type)
 
 
-def mmap_array_java_to_python(java_array, mmap_type: pyboof.MmapType):
+def mmap_array_java_to_python(java_array, mmap_type: pyboof.MmapType, slot=None):
     """
     Converts a java primitive array into a python primitive list
     """
@@ -168,21 +331,92 @@ def mmap_array_java_to_python(java_array, mmap_type: pyboof.MmapType):
         return None
 
     num_elements = len(java_array)
-    mm = pbg.mmap_file
-
-    num_element_bytes = pyboof.mmap_primitive_len(mmap_type)
-    format = pyboof.mmap_primitive_format(mmap_type)
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
-    python_list = []
+    dtype = pyboof.mmap_force_array_type([], mmap_type).dtype
+    header_bytes = struct.calcsize(pyboof.MMAP_ARRAY_HEADER)
 
-    pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.write_primitive_array(java_array, mmap_type, 0)
-    mm.seek(0)
-    data_type, num_found = struct.unpack(">HI", mm.read(2 + 4))
+    channel.java_mmap.write_primitive_array(slot, java_array, mmap_type, 0)
+    base = channel.prepare_read(slot)
+    data_type, num_found = struct.unpack_from(pyboof.MMAP_ARRAY_HEADER, channel.mm, base)
     if data_type != mmap_type:
         raise Exception("Unexpected data type in mmap file. {%d}" % data_type)
     if num_found != num_elements:
         raise Exception("Unexpected number of elements returned. " + str(num_found))
-    for i in range(num_found):
-        element = struct.unpack(format, mm.read(num_element_bytes))
-        python_list.append(element)
-    return pyboof.mmap_force_array_type(python_list, mmap_type)
+    return pyboof.mmap_view(dtype, (num_found,), base + header_bytes).copy()
+
+
+# Structured dtypes for snapshot layouts keyed by the layout's description
+_snapshot_dtypes = {}
+
+
+def _snapshot_dtype(description):
+    dtype = _snapshot_dtypes.get(description)
+    if dtype is None:
+        fields = [f.split(":") for f in description.split(",")] if description else []
+        dtype = np.dtype([(name, "=" + code) for name, code in fields])
+        _snapshot_dtypes[description] = dtype
+    return dtype
+
+
+def snapshot_fields(java_objects, fields=None, slot=None):
+    """
+    Reads primitive fields from every object in a Java List or FastAccess with a single call, instead of one
+    call for each field of each object.
+
+    :param java_objects: Java List or FastAccess. All the objects must be of the same class
+    :param fields: Which fields to read. Nested fields are separated by a '.', e.g. "pixel.x". If None then all of the
+    public primitive fields are read
+    :param slot: Which memory mapped slot to transfer through. None for the default slot
+    :return: Structured ndarray with one record for each object. Columns are named after the fields
+    """
+    paths = "" if fields is None else ",".join(fields)
+
+    if pbg.mmap_file:
+        channel = pbg.mmap_channel
+        slot = channel.resolve(slot)
+        channel.java_mmap.write_FieldSnapshot(slot, java_objects, paths)
+        base = channel.prepare_read(slot)
+        data_type, num_found, record_bytes, description_bytes = \
+            struct.unpack_from(pyboof.MMAP_SNAPSHOT_HEADER, channel.mm, base)
+        if data_type != pyboof.MmapType.FIELD_SNAPSHOT:
+            raise Exception("Unexpected data type in mmap file. {%d}" % data_type)
+        buffer = channel.mm
+        offset = base + struct.calcsize(pyboof.MMAP_SNAPSHOT_HEADER)
+    else:
+        buffer = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.snapshotFields(java_objects, paths)
+        num_found, record_bytes, description_bytes = struct.unpack_from("=III", buffer, 0)
+        offset = 12
+
+    description = bytes(buffer[offset:offset + description_bytes]).decode("ascii").rstrip()
+    dtype = _snapshot_dtype(description)
+    if num_found == 0:
+        return np.zeros(0, dtype=dtype)
+    if dtype.itemsize != record_bytes:
+        raise Exception("Snapshot record size doesn't match its layout. {} {}".format(dtype.itemsize, record_bytes))
+    return np.frombuffer(buffer, dtype=dtype, count=num_found, offset=offset + description_bytes).copy()
+
+
+def snapshot_values(java_objects, fields):
+    """
+    Reads fields of any type, e.g. strings, enums, and byte arrays, from every object in a Java List or FastAccess
+    with a single call. Use snapshot_fields() for primitive fields.
+
+    :param java_objects: Java List or FastAccess. All the objects must be of the same class
+    :param fields: Which fields to read. Nested fields are separated by a '.'
+    :return: List with one list of values for each object. Each value is bytes, which holds the array for byte
+    arrays and the UTF-8 encoded text of the Java object for everything else. None if the value is null
+    """
+    buffer = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.snapshotValues(java_objects, ",".join(fields))
+    values = []
+    offset = 0
+    while offset < len(buffer):
+        length, = struct.unpack_from("=i", buffer, offset)
+        offset += 4
+        if length < 0:
+            values.append(None)
+        else:
+            values.append(bytes(buffer[offset:offset + length]))
+            offset += length
+    return [values[i:i + len(fields)] for i in range(0, len(values), len(fields))]
@@ -9,6 +9,7 @@ from pyboof import pbg
 from pyboof.common import JavaList
 from pyboof.common import JavaList_to_fastarray
 from pyboof.common import is_java_class
+from pyboof.common import snapshot_fields
 import pyboof.image
 import numpy as np
 
@@ -16,33 +17,138 @@ import numpy as np
 def p2b_list_descF64(pylist):
     """
     Converts a python list of feature descriptors stored in 64bit floats into a BoofCV compatible format
-    :param pylist: Python list of feature descriptors
-    :type pylist: list[list[float]]
+    :param pylist: Python list of feature descriptors or an (N,D) ndarray
+    :type pylist: list[list[float]] | np.ndarray
     :return: List of descriptors in BoofCV format
     """
     java_list = pbg.gateway.jvm.java.util.ArrayList()
 
-    if pbg.mmap_file:
-        mmap_list_python_to_TupleF64(pylist, java_list)
-    else:
-        exception_use_mmap()
+    mmap_ndarray_to_TupleDesc(pylist, java_list, pyboof.MmapType.LIST_TUPLE_F64)
     return java_list
 
 
-def b2p_list_descF64(boof_list):
+def b2p_list_descF64(boof_list, as_ndarray=False):
     """
     Converts a BoofCV list of feature descriptors stored in 64bit floats into a Python compatible format
     :param boof_list: Descriptor list in BoofCV format
+    :param as_ndarray: If True an (N,D) float64 ndarray is returned instead of a list of tuples
     :return: List of descriptors in Python format
-    :rtype: list[list[float]]
+    :rtype: list[list[float]] | np.ndarray
+    """
+    descs = mmap_TupleDesc_to_ndarray(boof_list, pyboof.MmapType.LIST_TUPLE_F64)
+    if as_ndarray:
+        return descs
+    return [tuple(desc) for desc in descs.tolist()]
+
+
+def p2b_list_descF32(descs):
+    """
+    Converts an (N,D) array of feature descriptors stored in 32bit floats into a list of TupleDesc_F32
+    :param descs: (N,D) array of descriptors
+    :return: List of descriptors in BoofCV format
+    """
+    java_list = pbg.gateway.jvm.java.util.ArrayList()
+
+    mmap_ndarray_to_TupleDesc(descs, java_list, pyboof.MmapType.LIST_TUPLE_F32)
+    return java_list
+
+
+def b2p_list_descF32(boof_list):
+    """
+    Converts a BoofCV list of TupleDesc_F32 into an (N,D) float32 ndarray
+    :param boof_list: Descriptor list in BoofCV format
+    :rtype: np.ndarray
     """
-    pylist = []
+    return mmap_TupleDesc_to_ndarray(boof_list, pyboof.MmapType.LIST_TUPLE_F32)
 
-    if pbg.mmap_file:
-        mmap_list_TupleF64_to_python(boof_list, pylist)
+
+def p2b_list_descB(descs, num_bits=None):
+    """
+    Converts an (N,B) uint8 array of packed binary descriptors into a list of TupleDesc_B. Bits are packed
+    little endian, i.e. the same as np.packbits(bits, axis=1, bitorder='little')
+    :param descs: (N,B) array of packed bits
+    :param num_bits: Number of bits in each descriptor. If None then it's 8*B
+    :return: List of descriptors in BoofCV format
+    """
+    java_list = pbg.gateway.jvm.java.util.ArrayList()
+
+    mmap_ndarray_to_TupleDesc(descs, java_list, pyboof.MmapType.LIST_TUPLE_B, num_bits)
+    return java_list
+
+
+def b2p_list_descB(boof_list):
+    """
+    Converts a BoofCV list of TupleDesc_B into an (N,B) uint8 ndarray of packed bits, little endian.
+    Use np.unpackbits(descs, axis=1, bitorder='little') to get the individual bits
+    :param boof_list: Descriptor list in BoofCV format
+    :rtype: np.ndarray
+    """
+    return mmap_TupleDesc_to_ndarray(boof_list, pyboof.MmapType.LIST_TUPLE_B)
+
+
+def p2b_list_desc(descs, num_bits=None):
+    """
+    Converts descriptors into a BoofCV list. The descriptor type is selected using the dtype.
+    float64 = TupleDesc_F64, float32 = TupleDesc_F32, uint8 = TupleDesc_B. Lists are assumed to be float64.
+    """
+    mmap_type = ndarray_to_desc_mmap(descs)
+    java_list = pbg.gateway.jvm.java.util.ArrayList()
+
+    mmap_ndarray_to_TupleDesc(descs, java_list, mmap_type, num_bits)
+    return java_list
+
+
+def b2p_list_desc(boof_list, desc_type):
+    """
+    Converts a BoofCV list of descriptors into an ndarray
+    :param boof_list: Descriptor list in BoofCV format
+    :param desc_type: Java Class of the descriptors, e.g. from DetectDescribePointFeatures.get_descriptor_type()
+    :rtype: np.ndarray
+    """
+    return mmap_TupleDesc_to_ndarray(boof_list, desc_class_to_mmap(desc_type))
+
+
+def ndarray_to_desc_mmap(descs):
+    """
+    Selects the descriptor list type which matches the dtype. Lists default to 64-bit floats
+    """
+    if not isinstance(descs, np.ndarray) or descs.dtype == np.float64:
+        return pyboof.MmapType.LIST_TUPLE_F64
+    elif descs.dtype == np.float32:
+        return pyboof.MmapType.LIST_TUPLE_F32
+    elif descs.dtype == np.uint8:
+        return pyboof.MmapType.LIST_TUPLE_B
     else:
-        exception_use_mmap()
-    return pylist
+        raise RuntimeError("No descriptor type for dtype={}".format(descs.dtype))
+
+
+def desc_class_to_mmap(desc_type):
+    """
+    Converts the Java class of a descriptor into its list type
+    """
+    name = desc_type.getSimpleName()
+    if name == "TupleDesc_F64":
+        return pyboof.MmapType.LIST_TUPLE_F64
+    elif name == "TupleDesc_F32":
+        return pyboof.MmapType.LIST_TUPLE_F32
+    elif name == "TupleDesc_B":
+        return pyboof.MmapType.LIST_TUPLE_B
+    else:
+        raise RuntimeError("Unsupported descriptor type " + name)
+
+
+def mmap_to_desc_class(mmap_type):
+    """
+    Returns the Java class of the descriptor stored in a list type
+    """
+    if mmap_type == pyboof.MmapType.LIST_TUPLE_F64:
+        return pbg.gateway.jvm.boofcv.struct.feature.TupleDesc_F64(0).getClass()
+    elif mmap_type == pyboof.MmapType.LIST_TUPLE_F32:
+        return pbg.gateway.jvm.boofcv.struct.feature.TupleDesc_F32(0).getClass()
+    elif mmap_type == pyboof.MmapType.LIST_TUPLE_B:
+        return pbg.gateway.jvm.boofcv.struct.feature.TupleDesc_B(0).getClass()
+    else:
+        raise RuntimeError("Not a descriptor list type " + str(mmap_type))
 
 
 class ConfigSurfFast(JavaConfig):
@@ -155,40 +261,33 @@ class AssociateDescription(JavaWrapper):
     def set_source(self, feature_list):
         """
 
-        :param feature_list: List of feature descriptions
-        :type feature_list: [[float]] | JavaList
+        :param feature_list: List of feature descriptions. The descriptor type is selected by the ndarray's dtype
+        :type feature_list: [[float]] | np.ndarray | JavaList
         """
-        # automatically convert from python to boof type
-        if type(feature_list) is list:
-            feature_list = p2b_list_descF64(feature_list)
-        elif type(feature_list) is JavaList:
-            feature_list = feature_list.java_obj
-        else:
-            raise Exception("unexpected list type " + feature_list.__class__.__name__)
-
-        java_type = pbg.gateway.jvm.boofcv.struct.feature.TupleDesc_F64(0).getClass()
-
-        fast_array = JavaList_to_fastarray(feature_list, java_type)
-        self.java_obj.setSource(fast_array)
+        self.java_obj.setSource(self._to_fastarray(feature_list))
 
     def set_destination(self, feature_list):
         """
 
-        :param feature_list: List of feature descriptions
-        :type feature_list: [[float]] | JavaList
+        :param feature_list: List of feature descriptions. The descriptor type is selected by the ndarray's dtype
+        :type feature_list: [[float]] | np.ndarray | JavaList
         """
+        self.java_obj.setDestination(self._to_fastarray(feature_list))
+
+    @staticmethod
+    def _to_fastarray(feature_list):
         # automatically convert from python to boof type
-        if type(feature_list) is list:
-            feature_list = p2b_list_descF64(feature_list)
+        if type(feature_list) is list or isinstance(feature_list, np.ndarray):
+            mmap_type = ndarray_to_desc_mmap(feature_list)
+            java_type = mmap_to_desc_class(mmap_type)
+            feature_list = p2b_list_desc(feature_list)
         elif type(feature_list) is JavaList:
+            java_type = feature_list.java_type
             feature_list = feature_list.java_obj
         else:
             raise Exception("unexpected list type " + feature_list.__class__.__name__)
 
-        java_type = pbg.gateway.jvm.boofcv.struct.feature.TupleDesc_F64(0).getClass()
-
-        fast_queue = JavaList_to_fastarray(feature_list, java_type)
-        self.java_obj.setDestination(fast_queue)
+        return JavaList_to_fastarray(feature_list, java_type)
 
     def associate(self):
         """
@@ -196,15 +295,9 @@ class AssociateDescription(JavaWrapper):
         :return: List of (src index, dst index, match score)
         :rtype: [(int,int,float)]
         """
-        output = []
-
         self.java_obj.associate()
-        matches = self.java_obj.getMatches()
-        for i in range(matches.getSize()):
-            association = JavaWrapper(matches.get(i))
-            output.append((association.src, association.dst, association.fitScore))
-
-        return output
+        matches = snapshot_fields(self.java_obj.getMatches(), ["src", "dst", "fitScore"])
+        return matches.tolist()
 
     def get_java_matches(self):
         return self.java_obj.getMatches()
@@ -278,40 +371,56 @@ def java_list_to_python(java_list):
 class DetectDescribePointFeatures(JavaWrapper):
     def __init__(self, java_object):
         self.set_java_object(java_object)
+        self.scales = None
+        self.orientations = None
+        self.java_image = None
+        self.input_type = None
 
-    def detect(self, image):
+    def detect(self, image, as_ndarray=False, slot=None):
         """
-        Detects features inside the image and returns a list of feature locations and descriptions
-        :param image: Image in BoofCV format
+        Detects features inside the image and returns a list of feature locations and descriptions. The
+        image is processed and every result is returned with a single call to Java.
+        :param image: Image in BoofCV format or an ndarray. ndarrays are converted into the detector's input type
+        :param as_ndarray: If True locations are an (N,2) ndarray and descriptions an (N,D) ndarray
         :return: List of feature pixel locations and their descriptions. (2d pixel coordinates, list of descriptions)
-        :rtype: (list[(float,float)],list[list[float]])
+        :rtype: (list[(float,float)],list[tuple] | np.ndarray)
         """
-        self.java_obj.detect(image)
-
-        # extract a list of locations and descriptions.  Don't copy since it will immediately be convert
-        # into a python format
-        java_locations = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.extractPoints(self.java_obj, False)
-        java_descriptions = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.extractFeatures(self.java_obj, False)
+        channel = pbg.mmap_channel
+        slot = channel.resolve(slot)
+        entry = pbg.gateway.jvm.pyboof.PyBoofEntryPoint
+
+        if isinstance(image, np.ndarray):
+            if self.input_type is None:
+                self.input_type = self.java_obj.getInputType()
+            image = _convert_ndarray_input(image, self.input_type, slot)
+        if isinstance(image, np.ndarray):
+            pyboof.mmap_write_gray(image, slot)
+            channel.flush()
+            self.java_image = entry.detectDescribeMmap(channel.java_mmap, slot, self.java_obj, self.java_image)
+        else:
+            entry.detectDescribe(channel.java_mmap, slot, self.java_obj, image)
 
-        # Convert into a Python format and return the two lists
-        locations = pyboof.b2p_list_point2D(java_locations, np.double)
-        descriptions = b2p_list_descF64(java_descriptions)
+        locations, self.scales, self.orientations, descriptions = mmap_read_DetectDescribe(slot)
 
-        return locations, descriptions
+        if as_ndarray:
+            return locations, descriptions
+        return [tuple(p) for p in locations.tolist()], [tuple(desc) for desc in descriptions.tolist()]
 
     def get_scales(self):
-        N = self.java_obj.getNumberOfFeatures()
-        output = [0] * N
-        for i in range(N):
-            output[i] = self.java_obj.getScale(i)
-        return output
+        """
+        Scale (radius) of each feature found in the last call to detect()
+        """
+        if self.scales is None:
+            return []
+        return self.scales.tolist()
 
     def get_orientations(self):
-        N = self.java_obj.getNumberOfFeatures()
-        output = [0] * N
-        for i in range(N):
-            output[i] = self.java_obj.getOrientation(i)
-        return output
+        """
+        Orientation of each feature found in the last call to detect()
+        """
+        if self.orientations is None:
+            return []
+        return self.orientations.tolist()
 
     def has_scale(self):
         return self.java_obj.hasScale()
@@ -323,6 +432,20 @@ class DetectDescribePointFeatures(JavaWrapper):
         return self.java_obj.getDescriptionType()
 
 
+def _convert_ndarray_input(npimg, java_image_type, slot):
+    """
+    Prepares an ndarray for an algorithm with the specified input type. Gray ndarrays for gray algorithms are cast
+    to the input's dtype and returned so they can go through the mmap file as part of a composite call. Anything
+    else is converted into a BoofCV image of the input type
+    """
+    family, dtype, _ = pyboof.image._image_type_summary(java_image_type)
+    if npimg.ndim == 2:
+        if family != pyboof.Family.SINGLE_BAND:
+            raise ValueError("Expected an image with multiple bands since the input type isn't gray")
+        return npimg.astype(dtype, copy=False)
+    return pyboof.ndarray_to_boof_converted(npimg, image_type=java_image_type, slot=slot)
+
+
 class DetectLine(JavaWrapper):
     def __init__(self, java_object):
         self.set_java_object(java_object)
@@ -343,11 +466,39 @@ class DenseDescribePointFeatures(JavaWrapper):
         self.set_java_object(java_object)
         self.descriptions = []
         self.locations = []
+        self.java_image = None
+        self.input_type = None
 
-    def detect(self, image):
-        self.java_obj.process(image)
-        self.locations = pyboof.b2p_list_point2D(self.java_obj.getLocations(), np.int32)
-        self.descriptions = b2p_list_descF64(self.java_obj.getDescriptions())
+    def detect(self, image, as_ndarray=False, slot=None):
+        """
+        Computes descriptors across the image. Results are stored in 'locations' and 'descriptions'. The
+        image is processed and every result is returned with a single call to Java.
+        :param image: Image in BoofCV format or an ndarray. ndarrays are converted into the describer's input type
+        :param as_ndarray: If True locations are an (N,2) int32 ndarray and descriptions an (N,D) ndarray.
+                           Otherwise both are lists of tuples
+        """
+        channel = pbg.mmap_channel
+        slot = channel.resolve(slot)
+        entry = pbg.gateway.jvm.pyboof.PyBoofEntryPoint
+
+        if isinstance(image, np.ndarray):
+            if self.input_type is None:
+                self.input_type = self.java_obj.getImageType()
+            image = _convert_ndarray_input(image, self.input_type, slot)
+        if isinstance(image, np.ndarray):
+            pyboof.mmap_write_gray(image, slot)
+            channel.flush()
+            self.java_image = entry.describeDenseMmap(channel.java_mmap, slot, self.java_obj, self.java_image)
+        else:
+            entry.describeDense(channel.java_mmap, slot, self.java_obj, image)
+
+        locations, descriptions = mmap_read_DescribeDense(slot)
+
+        if not as_ndarray:
+            locations = [tuple(p) for p in locations.tolist()]
+            descriptions = [tuple(desc) for desc in descriptions.tolist()]
+        self.locations = locations
+        self.descriptions = descriptions
 
 
 class ConfigPointTracker(JavaConfig):
@@ -412,16 +563,15 @@ class PointTracker(JavaWrapper):
 
 
 def b2p_list_PointTrack(java_list):
-    size = java_list.size()
+    tracks = snapshot_fields(java_list, ["pixel.x", "pixel.y", "featureId", "spawnFrameID", "lastSeenFrameID"])
     py_list = []
 
-    for i in range(size):
-        java_track = JavaWrapper(java_list.get(i))
+    for x, y, feature_id, spawn_frame_id, last_seen_frame_id in tracks.tolist():
         py_track = PointTrack()
-        py_track.pixel = (float(java_track.pixel.x), float(java_track.pixel.y))
-        py_track.feature_id = int(java_track.featureId)
-        py_track.spawn_frame_id = int(java_track.spawnFrameID)
-        py_track.last_seen_frame_id = int(java_track.lastSeenFrameID)
+        py_track.pixel = (x, y)
+        py_track.feature_id = feature_id
+        py_track.spawn_frame_id = spawn_frame_id
+        py_track.last_seen_frame_id = last_seen_frame_id
         py_list.append(py_track)
 
     return py_list
@@ -593,59 +743,145 @@ class FactoryPointTracker:
         return PointTracker(java_object, self.boof_image_type)
 
 
-def mmap_list_python_to_TupleF64(pylist, java_list):
+def mmap_list_python_to_TupleF64(pylist, java_list, slot=None):
     """
     Converts a python list of float arrays into a list of TupleDesk64F in java using memmap file
-    :param pylist: (Input) Python list of float arrays.  All arrays need to have the same length
+    :param pylist: (Input) Python list of float arrays or an (N,D) ndarray.  All arrays need to have the same length
     :type pylist: list[list[float]]
     :param java_list: (Output) Java list to store TupleDesc64F
     """
-    num_elements = len(pylist)
-    if num_elements == 0:
-        dof = 0
+    mmap_ndarray_to_TupleDesc(pylist, java_list, pyboof.MmapType.LIST_TUPLE_F64, slot=slot)
+
+
+def mmap_list_TupleF64_to_python(java_list, pylist, slot=None):
+    """
+    Converts a java list of TupleDesc64F into a python list of float arrays using memmap file
+    :param java_list: Input: java list
+    :param pylist: output: python list
+    :type pylist: list[list[float]]
+    """
+    descs = mmap_TupleDesc_to_ndarray(java_list, pyboof.MmapType.LIST_TUPLE_F64, slot)
+    for desc in descs.tolist():
+        pylist.append(tuple(desc))
+
+
+# Element dtype and the name of the BoofMemoryMapped read/write functions for each descriptor list type
+_mmap_tuple_formats = {
+    pyboof.MmapType.LIST_TUPLE_F64: (np.float64, "TupleF64"),
+    pyboof.MmapType.LIST_TUPLE_F32: (np.float32, "TupleF32"),
+    pyboof.MmapType.LIST_TUPLE_B: (np.uint8, "TupleB")
+}
+
+
+def mmap_ndarray_to_TupleDesc(descs, java_list, mmap_type, num_bits=None, slot=None):
+    """
+    Converts an (N,D) array of descriptors into a list of TupleDesc in java using memmap file. The entire array
+    is written with a single copy.
+    :param descs: (Input) (N,D) array of descriptors. For binary descriptors it's (N,B) packed bits
+    :param java_list: (Output) Java list the descriptors are appended to
+    :param mmap_type: LIST_TUPLE_F64, LIST_TUPLE_F32, or LIST_TUPLE_B
+    :param num_bits: Only used with binary descriptors. Number of bits. If None then it's 8*B
+    """
+    dtype, name = _mmap_tuple_formats[mmap_type]
+
+    if len(descs) == 0:
+        descs = np.zeros((0, 0), dtype=dtype)
+    else:
+        descs = np.ascontiguousarray(descs, dtype=dtype)
+        if descs.ndim != 2:
+            raise ValueError("Expected an (N,D) array of descriptors, not shape {}".format(descs.shape))
+    num_elements, width = descs.shape
+
+    if mmap_type != pyboof.MmapType.LIST_TUPLE_B:
+        dof = width
+    elif num_bits is None:
+        dof = width * 8
+    elif (num_bits + 7) // 8 != width:
+        raise ValueError("{} bits doesn't match {} bytes per descriptor".format(num_bits, width))
     else:
-        dof = len(pylist[0])
-    mm = pbg.mmap_file
+        dof = num_bits
 
-    # max number of list elements it can write at once
-    max_elements = (pbg.mmap_size - 100) / (dof * 8)
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
-    curr = 0
-    while curr < num_elements:
-        # Write as much of the list as it can to the mmap file
-        num_write = min(max_elements, num_elements - curr)
-        mm.seek(0)
-        mm.write(struct.pack('>HII', pyboof.MmapType.LIST_TUPLE_F64, num_elements, dof))
-        for i in range(curr, curr + num_write):
-            mm.write(struct.pack('>%sd' % dof, *pylist[i]))
+    header_bytes = struct.calcsize(pyboof.MMAP_TUPLE_HEADER)
+    base = channel.prepare_write(slot, header_bytes + descs.nbytes)
 
-        # Now tell the java end to read what it just wrote
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.read_List_TupleF64(java_list)
+    struct.pack_into(pyboof.MMAP_TUPLE_HEADER, channel.mm, base, mmap_type, num_elements, dof)
+    channel.mm[base + header_bytes:base + header_bytes + descs.nbytes] = descs.tobytes()
 
-        # move on to the next block
-        curr = curr + num_write
+    # Now tell the java end to read what it just wrote
+    channel.flush()
+    getattr(channel.java_mmap, "read_List_" + name)(slot, java_list)
 
 
-def mmap_list_TupleF64_to_python(java_list, pylist):
+def mmap_TupleDesc_to_ndarray(java_list, mmap_type, slot=None):
     """
-    Converts a java list of TupleDesc64F into a python list of float arrays using memmap file
+    Converts a java list of TupleDesc into an (N,D) ndarray using memmap file. For binary descriptors
+    an (N,B) array of packed bits is returned.
     :param java_list: Input: java list
-    :param pylist: output: python list
-    :type pylist: list[list[float]]
+    :param mmap_type: LIST_TUPLE_F64, LIST_TUPLE_F32, or LIST_TUPLE_B
+    :return: Copy of the descriptors
+    :rtype: np.ndarray
     """
+    dtype, name = _mmap_tuple_formats[mmap_type]
+
     num_elements = java_list.size()
-    mm = pbg.mmap_file
-
-    num_read = 0
-    while num_read < num_elements:
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.write_List_TupleF64(java_list, num_read)
-        mm.seek(0)
-        data_type, num_found, dof = struct.unpack(">HII", mm.read(2 + 4 + 4))
-        if data_type != pyboof.MmapType.LIST_TUPLE_F64:
-            raise Exception("Unexpected data type in mmap file. {%d}" % data_type)
-        if num_found > num_elements - num_read:
-            raise Exception("Too many elements returned. " + str(num_found))
-        for i in range(num_found):
-            desc = struct.unpack(">%sd" % dof, mm.read(8 * dof))
-            pylist.append(desc)
-        num_read += num_found
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
+
+    getattr(channel.java_mmap, "write_List_" + name)(slot, java_list, 0)
+    base = channel.prepare_read(slot)
+    data_type, num_found, dof = struct.unpack_from(pyboof.MMAP_TUPLE_HEADER, channel.mm, base)
+    if data_type != mmap_type:
+        raise Exception("Unexpected data type in mmap file. {%d}" % data_type)
+    if num_found != num_elements:
+        raise Exception("Unexpected number of elements returned. " + str(num_found))
+    if mmap_type == pyboof.MmapType.LIST_TUPLE_B:
+        dof = (dof + 7) // 8
+    offset = base + struct.calcsize(pyboof.MMAP_TUPLE_HEADER)
+    return pyboof.mmap_view(dtype, (num_found, dof), offset).copy()
+
+
+def _mmap_read_features_header(mmap_type, slot):
+    """
+    Reads the header of a composite feature payload and returns the number of features, the descriptor's list
+    type, its dtype and width, and the offset the data starts at
+    """
+    channel = pbg.mmap_channel
+    base = channel.prepare_read(slot)
+    data_type, num_found, dof, desc_type = struct.unpack_from(pyboof.MMAP_FEATURES_HEADER, channel.mm, base)
+    if data_type != mmap_type:
+        raise Exception("Unexpected data type in mmap file. {%d}" % data_type)
+    dtype = _mmap_tuple_formats[desc_type][0]
+    if desc_type == pyboof.MmapType.LIST_TUPLE_B:
+        dof = (dof + 7) // 8
+    return num_found, dtype, dof, base + struct.calcsize(pyboof.MMAP_FEATURES_HEADER)
+
+
+def mmap_read_DetectDescribe(slot=None):
+    """
+    Reads the results written by PyBoofEntryPoint.detectDescribe from the memmap file.
+    :return: (N,2) locations, (N,) scales, (N,) orientations, (N,D) descriptions. All are copies
+    """
+    slot = pbg.mmap_channel.resolve(slot)
+    N, dtype, dof, offset = _mmap_read_features_header(pyboof.MmapType.DETECT_DESCRIBE, slot)
+
+    locations = pyboof.mmap_view(np.float64, (N, 2), offset).copy()
+    scales = pyboof.mmap_view(np.float64, (N,), offset + 16 * N).copy()
+    orientations = pyboof.mmap_view(np.float64, (N,), offset + 24 * N).copy()
+    descriptions = pyboof.mmap_view(dtype, (N, dof), offset + 32 * N).copy()
+    return locations, scales, orientations, descriptions
+
+
+def mmap_read_DescribeDense(slot=None):
+    """
+    Reads the results written by PyBoofEntryPoint.describeDense from the memmap file.
+    :return: (N,2) int32 locations, (N,D) descriptions. Both are copies
+    """
+    slot = pbg.mmap_channel.resolve(slot)
+    N, dtype, dof, offset = _mmap_read_features_header(pyboof.MmapType.DESCRIBE_DENSE, slot)
+
+    locations = pyboof.mmap_view(np.int32, (N, 2), offset).copy()
+    descriptions = pyboof.mmap_view(dtype, (N, dof), offset + 8 * N).copy()
+    return locations, descriptions
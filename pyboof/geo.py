@@ -870,61 +870,91 @@ def create_change_camera_model(intrinsic_orig, intrinsic_desired, image_type,
     return (ImageDistort(id), CameraPinhole(java_intrinsic_out))
 
 def p2b_list_AssociatedPair(pylist):
+    """
+    Converts a list of associated pairs into a BoofCV list of AssociatedPair
+    :param pylist: Either a list of ((x0,y0),(x1,y1)) or an (N,4) ndarray with rows of (x0,y0,x1,y1)
+    :return: List of AssociatedPair in BoofCV format
+    """
     java_list = pbg.gateway.jvm.java.util.ArrayList()
 
-    if pbg.mmap_file:
-        mmap_list_python_to_AssociatedPair(pylist, java_list)
-    else:
-        exception_use_mmap()
+    mmap_list_python_to_AssociatedPair(pylist, java_list)
     return java_list
 
 
-def b2p_list_AssociatedPair(boof_list):
+def b2p_list_AssociatedPair(boof_list, as_ndarray=False):
     """
     Converts a BoofCV list AssociatedPair into a Python compatible format
     :param boof_list: Descriptor list in BoofCV format
-    :return: List of 2d points in Python format
-    :type pylist: list[(float,float)]
+    :param as_ndarray: If True an (N,4) ndarray with rows of (x0,y0,x1,y1) is returned instead of a list
+    :return: List of associated pairs in Python format
+    :rtype: list[((float,float),(float,float))]
     """
-    pylist = []
-
-    if pbg.mmap_file:
-        mmap_list_AssociatedPair_to_python(boof_list, pylist)
-    else:
-        exception_use_mmap()
-    return pylist
+    pairs = mmap_list_AssociatedPair_to_ndarray(boof_list)
+    if as_ndarray:
+        return pairs
+    return [((p[0], p[1]), (p[2], p[3])) for p in pairs.tolist()]
 
 
-def p2b_list_point2D(pylist, dtype):
+def p2b_list_point2D(pylist, dtype=None):
     """
-    Converts a python list of feature descriptors stored in 64bit floats into a BoofCV compatible format
-    :param pylist: Python list of 2d points
+    Converts a python list of 2d points into a BoofCV compatible format
+    :param pylist: Python list of 2d points or an (N,2) ndarray
     :type pylist: list[(float,float)]
+    :param dtype: Type of point which is created in Java. If None then it's selected using the ndarray's dtype
     :return: List of 2d points in BoofCV format
     """
     java_list = pbg.gateway.jvm.java.util.ArrayList()
 
-    if pbg.mmap_file:
-        mmap_list_python_to_Point2D(pylist, java_list, dtype)
-    else:
-        exception_use_mmap()
+    if dtype is None:
+        dtype = ndarray_to_point_dtype(pylist)
+
+    mmap_list_python_to_Point2D(pylist, java_list, dtype)
     return java_list
 
 
-def b2p_list_point2D(boof_list, dtype):
+def b2p_list_point2D(boof_list, dtype, as_ndarray=False):
     """
     Converts a BoofCV list of 2d points into a Python compatible format
     :param boof_list: Descriptor list in BoofCV format
+    :param as_ndarray: If True an (N,2) ndarray is returned instead of a list of tuples
     :return: List of 2d points in Python format
-    :type pylist: list[(float,float)]
+    :rtype: list[(float,float)]
     """
-    pylist = []
+    points = mmap_list_Point2D_to_ndarray(boof_list, dtype)
+    if as_ndarray:
+        return points
+    return [tuple(p) for p in points.tolist()]
 
-    if pbg.mmap_file:
-        mmap_list_Point2D_to_python(boof_list, pylist, dtype)
-    else:
-        exception_use_mmap()
-    return pylist
+
+def p2b_list_point3D(pylist, dtype=None):
+    """
+    Converts a python list of 3d points into a BoofCV compatible format
+    :param pylist: Python list of 3d points or an (N,3) ndarray
+    :type pylist: list[(float,float,float)]
+    :param dtype: Type of point which is created in Java. If None then it's selected using the ndarray's dtype
+    :return: List of 3d points in BoofCV format
+    """
+    java_list = pbg.gateway.jvm.java.util.ArrayList()
+
+    if dtype is None:
+        dtype = ndarray_to_point_dtype(pylist)
+
+    mmap_list_python_to_Point3D(pylist, java_list, dtype)
+    return java_list
+
+
+def b2p_list_point3D(boof_list, dtype, as_ndarray=False):
+    """
+    Converts a BoofCV list of 3d points into a Python compatible format
+    :param boof_list: List of 3d points in BoofCV format
+    :param as_ndarray: If True an (N,3) ndarray is returned instead of a list of tuples
+    :return: List of 3d points in Python format
+    :rtype: list[(float,float,float)]
+    """
+    points = mmap_list_Point3D_to_ndarray(boof_list, dtype)
+    if as_ndarray:
+        return points
+    return [tuple(p) for p in points.tolist()]
 
 
 def p2b_list_LineParametric(pylist, dtype):
@@ -942,60 +972,72 @@ def p2b_list_LineParametric(pylist, dtype):
     return java_list
 
 
-def mmap_list_python_to_AssociatedPair(pylist, java_list):
+def _check_points_shape(points, width):
+    """
+    Makes sure the ndarray has one row of 'width' values per element. An empty input is an empty list
+    """
+    if points.size == 0:
+        return points.reshape(0, width)
+    if points.ndim != 2 or points.shape[1] != width:
+        raise ValueError("Expected an (N,{}) array not shape={}".format(width, points.shape))
+    return points
+
+
+def mmap_list_python_to_AssociatedPair(pylist, java_list, slot=None):
     """
     Converts a python list of ((x0,y0),(x1,y1)) a java list of AssociatedPair using memmap file
 
-    :param pylist: (Input) Python list of 2D float tuples.
+    :param pylist: (Input) Python list of 2D float tuples or an (N,4) ndarray
     :type pylist: list[((float,float),(float,float))]
     :param java_list: (Output) Java list to store AssociatedPair
     """
-    num_elements = len(pylist)
-    mm = pbg.mmap_file
+    pairs = np.asarray(pylist, dtype=np.float64)
+    if pairs.ndim == 3 and pairs.shape[1:] == (2, 2):
+        pairs = pairs.reshape(-1, 4)
+    pairs = _check_points_shape(pairs, 4)
+    num_elements = pairs.shape[0]
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
+
+    header_bytes = struct.calcsize(pyboof.MMAP_LIST_HEADER)
+    base = channel.prepare_write(slot, header_bytes + pairs.nbytes)
 
-    # max number of list elements it can write at once
-    max_elements = (pbg.mmap_size - 100) / (4 * 8)
+    struct.pack_into(pyboof.MMAP_LIST_HEADER, channel.mm, base, pyboof.MmapType.LIST_ASSOCIATEDPAIR_F64, num_elements)
+    channel.mm[base + header_bytes:base + header_bytes + pairs.nbytes] = pairs.tobytes()
 
-    curr = 0
-    while curr < num_elements:
-        # Write as much of the list as it can to the mmap file
-        num_write = min(max_elements, num_elements - curr)
-        mm.seek(0)
-        mm.write(struct.pack('>HI', pyboof.MmapType.LIST_ASSOCIATEDPAIR_F64, num_elements))
-        for i in range(curr, curr + num_write):
-            p = pylist[i]
-            mm.write(struct.pack('>4d', float(p[0][0]), float(p[0][1]), float(p[1][0]), float(p[1][1])))
+    # Now tell the java end to read what it just wrote
+    channel.flush()
+    channel.java_mmap.read_List_AssociatedPair_F64(slot, java_list)
 
-        # Now tell the java end to read what it just wrote
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.read_List_AssociatedPair_F64(java_list)
 
-        # move on to the next block
-        curr = curr + num_write
+def mmap_list_AssociatedPair_to_ndarray(java_list, slot=None):
+    """
+    Converts a java list of AssociatedPair into an (N,4) ndarray with rows of (x0,y0,x1,y1) using memmap file
+    """
+    num_elements = java_list.size()
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
+
+    channel.java_mmap.write_List_AssociatedPair_F64(slot, java_list, 0)
+    base = channel.prepare_read(slot)
+    data_type, num_found = struct.unpack_from(pyboof.MMAP_LIST_HEADER, channel.mm, base)
+    if data_type != pyboof.MmapType.LIST_ASSOCIATEDPAIR_F64:
+        raise Exception("Unexpected data type in mmap file. %d" % data_type)
+    if num_found != num_elements:
+        raise Exception("Unexpected number of elements returned. " + str(num_found))
+    offset = base + struct.calcsize(pyboof.MMAP_LIST_HEADER)
+    return pyboof.mmap_view(np.float64, (num_found, 4), offset).copy()
 
 
-def mmap_list_AssociatedPair_to_python(java_list, pylist):
+def mmap_list_AssociatedPair_to_python(java_list, pylist, slot=None):
     """
     Converts a java list of AssociatedPair into a python list of ((x,y),(x,y)) using memmap file
     :param java_list: Input: java list
     :param pylist: output: python list
     :type pylist: list[((float,float),(float,float))]
     """
-    num_elements = java_list.size()
-    mm = pbg.mmap_file
-
-    num_read = 0
-    while num_read < num_elements:
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.write_List_AssociatedPair_F64(java_list, num_read)
-        mm.seek(0)
-        data_type, num_found = struct.unpack(">HI", mm.read(2 + 4))
-        if data_type != pyboof.MmapType.LIST_ASSOCIATEDPAIR_F64:
-            raise Exception("Unexpected data type in mmap file. %d" % data_type)
-        if num_found > num_elements - num_read:
-            raise Exception("Too many elements returned. " + str(num_found))
-        for i in range(num_found):
-            desc = struct.unpack(">4d", mm.read(8 * 4))
-            pylist.append(((desc[0], desc[1]), (desc[2], desc[3])))
-        num_read += num_found
+    for p in mmap_list_AssociatedPair_to_ndarray(java_list, slot).tolist():
+        pylist.append(((p[0], p[1]), (p[2], p[3])))
 
 
 def dtype_to_unpack(dtype):
@@ -1009,7 +1051,7 @@ def dtype_to_unpack(dtype):
         return (2, "h")
     elif dtype == np.int32:
         return (4, "i")
-    elif dtype == float:
+    elif dtype == float or dtype == np.float32:
         return (4, "f")
     elif dtype == np.double:
         return (8, "d")
@@ -1017,6 +1059,25 @@ def dtype_to_unpack(dtype):
         raise Exception("Unknown dtype")
 
 
+def ndarray_to_point_dtype(points):
+    """
+    Selects the point dtype, using the same convention as the rest of PyBoof, which matches an ndarray of points.
+    Lists default to 64-bit floats
+    """
+    if not isinstance(points, np.ndarray) or points.dtype == np.float64:
+        return np.double
+    elif points.dtype == np.float32:
+        return float
+    elif points.dtype == np.int32:
+        return np.int32
+    elif points.dtype == np.int16:
+        return np.int16
+    elif points.dtype == np.uint16:
+        return np.uint16
+    else:
+        raise RuntimeError("No point type for dtype={}".format(points.dtype))
+
+
 def dtype_to_mmaplistpoints(dtype):
     if dtype == np.int16:
         return pyboof.MmapType.LIST_POINT2D_S16
@@ -1024,7 +1085,7 @@ def dtype_to_mmaplistpoints(dtype):
         return pyboof.MmapType.LIST_POINT2D_U16
     elif dtype == np.int32:
         return pyboof.MmapType.LIST_POINT2D_S32
-    elif dtype == float:
+    elif dtype == float or dtype == np.float32:
         return pyboof.MmapType.LIST_POINT2D_F32
     elif dtype == np.double:
         return pyboof.MmapType.LIST_POINT2D_F64
@@ -1033,7 +1094,7 @@ def dtype_to_mmaplistpoints(dtype):
 
 
 def dtype_to_mmaplistpoints3d(dtype):
-    if dtype == float:
+    if dtype == float or dtype == np.float32:
         return pyboof.MmapType.LIST_POINT3D_F32
     elif dtype == np.double:
         return pyboof.MmapType.LIST_POINT3D_F64
@@ -1041,129 +1102,127 @@ def dtype_to_mmaplistpoints3d(dtype):
         raise RuntimeError("No mmap type for dtype={}".format(dtype))
 
 
-def mmap_list_python_to_Point2D(pylist, java_list, dtype):
+def mmap_list_python_to_Point2D(pylist, java_list, dtype, slot=None):
     """
-    Converts a python list of 2d float tuples into a list of Point2D_64F in java using memmap file
+    Converts a python list of 2d points, or an (N,2) ndarray, into a list of Point2D in java using memmap file.
+    All the points are packed into the memory mapped file with a single copy
 
-    :param pylist: (Input) Python list of 2D float tuples.
-    :type pylist: list[(float,float)]
-    :param java_list: (Output) Java list to store Point2D_64F
+    :param pylist: (Input) Python list of 2d tuples or an (N,2) ndarray
+    :param java_list: (Output) Java list to store Point2D
+    :param dtype: Type of Point2D which is created in Java
     """
-    num_elements = len(pylist)
-    mm = pbg.mmap_file
-
     num_bytes, char_type = dtype_to_unpack(dtype)
-    num_bytes_per_point = num_bytes * 2
-    format_string = ">2{}".format(char_type)
-
+    points = _check_points_shape(np.asarray(pylist, dtype=np.dtype(char_type)), 2)
+    num_elements = points.shape[0]
     mmap_type = dtype_to_mmaplistpoints(dtype)
 
-    # max number of list elements it can write at once
-    max_elements = int((pbg.mmap_size - 100) / num_bytes_per_point)
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
-    curr = 0
-    while curr < num_elements:
-        # Write as much of the list as it can to the mmap file
-        num_write = min(max_elements, num_elements - curr)
-        mm.seek(0)
-        mm.write(struct.pack('>HI', mmap_type, num_elements))
-        for i in range(curr, curr + num_write):
-            mm.write(struct.pack(format_string, *pylist[i]))
+    header_bytes = struct.calcsize(pyboof.MMAP_LIST_HEADER)
+    base = channel.prepare_write(slot, header_bytes + points.nbytes)
 
-        # Now tell the java end to read what it just wrote
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.read_List_Point2D(java_list, mmap_type)
+    struct.pack_into(pyboof.MMAP_LIST_HEADER, channel.mm, base, mmap_type, num_elements)
+    channel.mm[base + header_bytes:base + header_bytes + points.nbytes] = points.tobytes()
 
-        # move on to the next block
-        curr = curr + num_write
+    # Now tell the java end to read what it just wrote
+    channel.flush()
+    channel.java_mmap.read_List_Point2D(slot, java_list, mmap_type)
 
 
-def mmap_list_Point2D_to_python(java_list, pylist, dtype):
+def mmap_list_Point2D_to_ndarray(java_list, dtype, slot=None):
     """
-    Converts a java list of Point2D_* into a python list of float 2D tuples using memmap file
+    Converts a java list of Point2D_* into an (N,2) ndarray using memmap file
     :param java_list: Input: java list
-    :param pylist: output: python list
-    :type pylist: list[(float,float)]
     :param dtype The numpy dtype
     """
     num_elements = java_list.size()
-    mm = pbg.mmap_file
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
     num_bytes, char_type = dtype_to_unpack(dtype)
-    num_bytes_per_point = num_bytes * 2
-    format_string = ">2{}".format(char_type)
-
     mmap_type = dtype_to_mmaplistpoints(dtype)
 
-    num_read = 0
-    while num_read < num_elements:
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.write_List_Point2D(java_list, mmap_type, num_read)
-        mm.seek(0)
-        data_type, num_found = struct.unpack(">HI", mm.read(2 + 4))
-        if data_type != mmap_type:
-            raise Exception("Unexpected data type in mmap file. %d" % data_type)
-        if num_found > num_elements - num_read:
-            raise Exception("Too many elements returned. " + str(num_found))
-        for i in range(num_found):
-            point = struct.unpack(format_string, mm.read(num_bytes_per_point))
-            pylist.append(point)
-        num_read += num_found
-
-
-def mmap_list_python_to_Point3D(pylist, java_list, dtype):
+    channel.java_mmap.write_List_Point2D(slot, java_list, mmap_type, 0)
+    base = channel.prepare_read(slot)
+    data_type, num_found = struct.unpack_from(pyboof.MMAP_LIST_HEADER, channel.mm, base)
+    if data_type != mmap_type:
+        raise Exception("Unexpected data type in mmap file. %d" % data_type)
+    if num_found != num_elements:
+        raise Exception("Unexpected number of elements returned. " + str(num_found))
+    offset = base + struct.calcsize(pyboof.MMAP_LIST_HEADER)
+    return pyboof.mmap_view(np.dtype(char_type), (num_found, 2), offset).copy()
+
+
+def mmap_list_Point2D_to_python(java_list, pylist, dtype, slot=None):
+    """
+    Converts a java list of Point2D_* into a python list of 2d tuples using memmap file
+    :param java_list: Input: java list
+    :param pylist: output: python list
+    :param dtype The numpy dtype
     """
-    Converts a python list of 3d float tuples into a list of Point3D_64F in java using memmap file
+    for point in mmap_list_Point2D_to_ndarray(java_list, dtype, slot).tolist():
+        pylist.append(tuple(point))
+
+
+def mmap_list_python_to_Point3D(pylist, java_list, dtype, slot=None):
     """
-    num_elements = len(pylist)
-    mm = pbg.mmap_file
+    Converts a python list of 3d points, or an (N,3) ndarray, into a list of Point3D in java using memmap file.
+    All the points are packed into the memory mapped file with a single copy
 
+    :param pylist: (Input) Python list of 3d tuples or an (N,3) ndarray
+    :param java_list: (Output) Java list to store Point3D
+    :param dtype: Type of Point3D which is created in Java
+    """
     num_bytes, char_type = dtype_to_unpack(dtype)
-    num_bytes_per_point = num_bytes * 3
-    format_string = ">3{}".format(char_type)
-
+    points = _check_points_shape(np.asarray(pylist, dtype=np.dtype(char_type)), 3)
+    num_elements = points.shape[0]
     mmap_type = dtype_to_mmaplistpoints3d(dtype)
 
-    # max number of list elements it can write at once
-    max_elements = int((pbg.mmap_size - 100) / num_bytes_per_point)
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
-    curr = 0
-    while curr < num_elements:
-        # Write as much of the list as it can to the mmap file
-        num_write = min(max_elements, num_elements - curr)
-        mm.seek(0)
-        mm.write(struct.pack('>HI', mmap_type, num_write))
-        for i in range(curr, curr + num_write):
-            mm.write(struct.pack(format_string, *pylist[i]))
+    header_bytes = struct.calcsize(pyboof.MMAP_LIST_HEADER)
+    base = channel.prepare_write(slot, header_bytes + points.nbytes)
 
-        # Now tell the java end to read what it just wrote
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.read_List_Point3D(java_list, mmap_type)
+    struct.pack_into(pyboof.MMAP_LIST_HEADER, channel.mm, base, mmap_type, num_elements)
+    channel.mm[base + header_bytes:base + header_bytes + points.nbytes] = points.tobytes()
 
-        # move on to the next block
-        curr = curr + num_write
+    # Now tell the java end to read what it just wrote
+    channel.flush()
+    channel.java_mmap.read_List_Point3D(slot, java_list, mmap_type)
 
 
-def mmap_list_Point3D_to_python(java_list, pylist, dtype):
+def mmap_list_Point3D_to_ndarray(java_list, dtype, slot=None):
     """
-    Converts a java list of Point3D_* into a python list of float 3D tuples using memmap file
+    Converts a java list of Point3D_* into an (N,3) ndarray using memmap file
+    :param java_list: Input: java list
+    :param dtype The numpy dtype
     """
     num_elements = java_list.size()
-    mm = pbg.mmap_file
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
 
     num_bytes, char_type = dtype_to_unpack(dtype)
-    num_bytes_per_point = num_bytes * 3
-    format_string = ">3{}".format(char_type)
-
     mmap_type = dtype_to_mmaplistpoints3d(dtype)
 
-    num_read = 0
-    while num_read < num_elements:
-        pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.write_List_Point3D(java_list, mmap_type, num_read)
-        mm.seek(0)
-        data_type, num_found = struct.unpack(">HI", mm.read(2 + 4))
-        if data_type != mmap_type:
-            raise Exception("Unexpected data type in mmap file. %d" % data_type)
-        if num_found > num_elements - num_read:
-            raise Exception("Too many elements returned. " + str(num_found))
-        for i in range(num_found):
-            point = struct.unpack(format_string, mm.read(num_bytes_per_point))
-            pylist.append(point)
-        num_read += num_found
\ No newline at end of file
+    channel.java_mmap.write_List_Point3D(slot, java_list, mmap_type, 0)
+    base = channel.prepare_read(slot)
+    data_type, num_found = struct.unpack_from(pyboof.MMAP_LIST_HEADER, channel.mm, base)
+    if data_type != mmap_type:
+        raise Exception("Unexpected data type in mmap file. %d" % data_type)
+    if num_found != num_elements:
+        raise Exception("Unexpected number of elements returned. " + str(num_found))
+    offset = base + struct.calcsize(pyboof.MMAP_LIST_HEADER)
+    return pyboof.mmap_view(np.dtype(char_type), (num_found, 3), offset).copy()
+
+
+def mmap_list_Point3D_to_python(java_list, pylist, dtype, slot=None):
+    """
+    Converts a java list of Point3D_* into a python list of 3d tuples using memmap file
+    :param java_list: Input: java list
+    :param pylist: output: python list
+    :param dtype The numpy dtype
+    """
+    for point in mmap_list_Point3D_to_ndarray(java_list, dtype, slot).tolist():
+        pylist.append(tuple(point))
\ No newline at end of file
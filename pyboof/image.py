@@ -1,8 +1,13 @@
+import glob
+import hashlib
+import numbers
 import numpy as np
+import operator
 import os
 import struct
+from contextlib import contextmanager
+from py4j.java_collections import ListConverter
 
-import py4j.java_gateway as jg
 import pyboof
 from pyboof import pbg
 
@@ -24,6 +29,10 @@ class Family:
 class BImage(JavaWrapper):
     """
     Wrapper around a BoofCV image.  Provide a slow but pythonic way to interact with the images.
+
+    Indexing with integers, e.g. img[y, x] or img[y, x, band], reads or writes a single pixel with one call to
+    Java. Indexing with slices, e.g. img[y0:y1, x0:x1] or img[..., band], reads or writes the whole rectangle as an
+    ndarray in a single transfer.
     """
     def __init__(self, java_image):
         JavaWrapper.__init__(self,java_image)
@@ -38,13 +47,14 @@ class BImage(JavaWrapper):
         """
         return ImageType(self.java_obj.getImageType())
 
-    def ndarray(self):
+    def ndarray(self, copy=True):
         """
         Creates a new ndarray which will have the same values as this image
+        :param copy: If False the ndarray might be a view into the memory mapped file. See boof_to_ndarray()
         :return: equivalent ndarray
         :rtype: numpy.ndarray
         """
-        return boof_to_ndarray(self.java_obj)
+        return boof_to_ndarray(self.java_obj, copy)
 
     def create_same_shape(self):
         """
@@ -56,6 +66,13 @@ class BImage(JavaWrapper):
         return BImage(java_image)
 
     def __getitem__(self, key):
+        if self._is_region(key):
+            x0, y0, x1, y1, band, local = self._region(key)
+            shape = self._region_shape(x0, y0, x1, y1, band)
+            if 0 in shape:
+                return np.zeros(shape, self.dtype)[local]
+            return mmap_boof_region_to_numpy(self.java_obj, x0, y0, x1, y1, band)[local]
+
         if isinstance(key, (list, tuple)):
             if len(key) == 2:
                 if self.family is Family.SINGLE_BAND:
@@ -75,6 +92,20 @@ class BImage(JavaWrapper):
             raise RuntimeError("Unexpected argument type")
 
     def __setitem__(self, key, value):
+        if self._is_region(key):
+            x0, y0, x1, y1, band, local = self._region(key)
+            shape = self._region_shape(x0, y0, x1, y1, band)
+            if 0 in shape:
+                return
+            if all(_index_covers(k, n) for k, n in zip(local, shape)):
+                region = np.empty(shape, self.dtype)
+            else:
+                # Only some of the pixels inside the rectangle change so the rest need to be read first
+                region = mmap_boof_region_to_numpy(self.java_obj, x0, y0, x1, y1, band)
+            region[local] = value
+            mmap_numpy_to_boof_region(region, self.java_obj, x0, y0, band)
+            return
+
         if isinstance(key, (list, tuple)):
             if len(key) == 2:
                 if self.family == Family.SINGLE_BAND:
@@ -102,6 +133,61 @@ class BImage(JavaWrapper):
         else:
             raise RuntimeError("Unexpected argument type")
 
+    @staticmethod
+    def _is_region(key):
+        if isinstance(key, (list, tuple)):
+            return any(isinstance(k, slice) or k is Ellipsis for k in key)
+        return isinstance(key, (slice, numbers.Integral)) or key is Ellipsis
+
+    def _region(self, key):
+        """
+        Converts a numpy style index into the rectangle which is transferred, the band of a planar image which is
+        transferred (-1 for all of them), and the index which selects the requested elements from the rectangle
+        """
+        shape = self.shape
+        key = tuple(key) if isinstance(key, (list, tuple)) else (key,)
+        for i, k in enumerate(key):
+            if k is Ellipsis:
+                key = key[:i] + (slice(None),) * (len(shape) - len(key) + 1) + key[i + 1:]
+                break
+        if len(key) > len(shape):
+            raise IndexError("Too many indices for an image with shape {}".format(shape))
+        key = key + (slice(None),) * (len(shape) - len(key))
+
+        bounds = []
+        local = []
+        for k, n in zip(key[0:2], shape[0:2]):
+            if isinstance(k, slice):
+                r = range(*k.indices(n))
+                if len(r) == 0:
+                    bounds.append((0, 0))
+                    local.append(slice(0, 0))
+                    continue
+                lower = min(r)
+                stop = r.stop - lower
+                bounds.append((lower, max(r) + 1))
+                local.append(slice(r.start - lower, stop if stop >= 0 else None, r.step))
+            else:
+                i = _check_index(k, n)
+                bounds.append((i, i + 1))
+                local.append(0)
+
+        band = -1
+        if len(shape) == 3:
+            if self.family == Family.PLANAR and isinstance(key[2], numbers.Integral):
+                # Only the selected band needs to be transferred
+                band = _check_index(key[2], shape[2])
+            else:
+                local.append(key[2])
+
+        (y0, y1), (x0, x1) = bounds
+        return x0, y0, x1, y1, band, tuple(local)
+
+    def _region_shape(self, x0, y0, x1, y1, band):
+        if self.family == Family.SINGLE_BAND or band >= 0:
+            return y1 - y0, x1 - x0
+        return y1 - y0, x1 - x0, self.java_obj.getNumBands()
+
     def __getattr__(self, item):
         if item == 'shape':
             if self.family == Family.SINGLE_BAND:
@@ -111,6 +197,24 @@ class BImage(JavaWrapper):
         return JavaWrapper.__getattr__(self, item)
 
 
+def _check_index(index, size):
+    i = operator.index(index)
+    if i < 0:
+        i += size
+    if not 0 <= i < size:
+        raise IndexError("Index {} is out of bounds for size {}".format(index, size))
+    return i
+
+
+def _index_covers(index, size):
+    """
+    True if the index selects every element along an axis of the specified size
+    """
+    if isinstance(index, slice):
+        return range(*index.indices(size)) == range(size)
+    return isinstance(index, numbers.Integral) and size == 1
+
+
 class ImageType(JavaWrapper):
     """
     Description on the image data format.
@@ -120,7 +224,12 @@ class ImageType(JavaWrapper):
     def __init__(self, jImageType):
         JavaWrapper.__init__(self, jImageType)
 
-    def create_boof_image(self, width, height):
+    def create_boof_image(self, width, height, pool=None):
+        """
+        :param pool: If not None the image is taken from this ImagePool instead of being created
+        """
+        if pool is not None:
+            return pool.acquire(self, width, height)
         return self.java_obj.createImage(width, height)
 
     def get_family(self):
@@ -188,129 +297,469 @@ def load_planar( path , dtype ):
     return PLANAR
 
 
-def convert_boof_image( input , output ):
+def convert_boof_image( input , output=None, image_type=None, pool=None ):
     """
     Converts between two different boofcv images.  Essentially performs a typecast and doesn't change
     pixel values.  Except if the input has more than one band and the output is gray scale.  It then
     averages the bands.
 
     :param input: BoofCV image
-    :param output:  BoofCV image
-    :return:
+    :param output:  BoofCV image. If None a new image of image_type is used
+    :param image_type: Type of the output when output is None. ImageType or a Java ImageType
+    :param pool: If not None and output is None, the output is taken from this ImagePool instead of being created
+    :return: The output image
     """
+    if output is None:
+        if image_type is None:
+            raise ValueError("output or image_type must be specified")
+        if not isinstance(image_type, ImageType):
+            image_type = ImageType(image_type)
+        output = image_type.create_boof_image(input.getWidth(), input.getHeight(), pool)
     pbg.gateway.jvm.boofcv.core.image.GConvertImage.convert(input,output)
+    return output
 
 
-def ndarray_to_boof( npimg , boof_img=None):
+def ndarray_to_boof( npimg , boof_img=None, slot=None, family=None, pool=None):
     """
-    Converts an image in ndarray format into a BoofCV image
+    Converts an image in ndarray format into a BoofCV image. Arrays with a shape of (height, width) become
+    single band images and (height, width, bands) become multi-band images.
 
-    :param npimg: numpy image
+    :param npimg: numpy image. The dtype can be uint8, int8, uint16, int16, int32, int64, float32, or float64
     :param boof_img: Optional storage for BoofCV image.  None to declare a new image
+    :param slot: Which memory mapped slot to transfer the image through. None for the default slot
+    :param family: Family of the new image if boof_img is None, e.g. Family.PLANAR. Multi-band images are
+    interleaved by default
+    :param pool: If not None and boof_img is None, the image is taken from this ImagePool instead of being created
     :return: Converted BoofCV image
     """
     if npimg is None:
         raise Exception("Input image is None")
 
-    if pbg.mmap_file:
-        if len(npimg.shape) == 2:
-            if npimg.dtype == np.uint8:
-                return mmap_numpy_to_boof_U8(npimg, boof_img)
-            elif npimg.dtype == np.float32:
-                return mmap_numpy_to_boof_F32(npimg, boof_img)
-            else:
-                raise Exception("Image type not supported yet")
-        else:
-            if npimg.dtype == np.uint8:
-                return mmap_numpy_to_boof_IU8(npimg)
-            elif npimg.dtype == np.float32:
-                raise Exception("Need to add support for float images")
-            else:
-                raise Exception("Image type not supported yet")
+    if boof_img is None and pool is not None:
+        return pool.upload(npimg, family, slot)
+    return mmap_numpy_to_boof(npimg, boof_img, family, slot)
+
+
+def boof_to_ndarray( boof , copy=True, slot=None):
+    """
+    Converts a BoofCV image into an ndarray
+
+    :param boof: BoofCV image
+    :param copy: If True a new ndarray is returned. If False, then the returned ndarray is a read only view into the
+    slot. This avoids copying the image in Python, but the view is only valid until the next transfer through the
+    same slot. Call copy() on it if you need to hold onto it any longer.
+    :param slot: Which memory mapped slot to transfer the image through. None for the default slot
+    :return: Converted ndarray
+    """
+    # Everything needed to decode the image is in the payload's header
+    return mmap_boof_to_numpy(boof, copy, slot)
+
+
+class GrayWeights:
+    """
+    Weights of the red, green, and blue channels when converting a color image into gray
+    """
+    AVERAGE = (1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0)
+    # ITU-R BT.601
+    LUMA = (0.299, 0.587, 0.114)
+
+
+def ndarray_to_boof_converted(npimg, boof_img=None, image_type=None, channel_order="RGB",
+                              gray_weights=GrayWeights.AVERAGE, slot=None, pool=None):
+    """
+    Converts an interleaved color ndarray directly into a BoofCV image of a different type, e.g. an OpenCV BGR
+    frame into the GrayU8 image a tracker needs. The conversion is done while copying into the memory mapped
+    file, so only the converted pixels are sent and an intermediate color image isn't created in Java.
+
+    Gray images are a weighted sum of the red, green, and blue channels. The channels of multi-band images are
+    put in the order R, G, B, followed by A if there is one. Pixel values are converted like numpy's astype(),
+    i.e. floats are truncated to integers.
+
+    :param npimg: (height, width, bands) image
+    :param boof_img: Storage for the converted image. Its type is the type which is converted into
+    :param image_type: Type which is converted into when boof_img is None. ImageType or a Java ImageType
+    :param channel_order: Order of the channels in npimg, e.g. "BGR" for images from OpenCV
+    :param gray_weights: Weights of the red, green, and blue channels. See GrayWeights
+    :param slot: Which memory mapped slot to transfer the image through. None for the default slot
+    :param pool: If not None and boof_img is None, the image is taken from this ImagePool instead of being created
+    :return: Converted BoofCV image
+    """
+    if boof_img is not None:
+        target = boof_img
+    elif image_type is not None:
+        target = image_type.java_obj if isinstance(image_type, ImageType) else image_type
+        if pool is not None:
+            boof_img = target = pool.acquire(target, npimg.shape[1], npimg.shape[0])
     else:
-        if len(npimg.shape) == 2:
-            if npimg.dtype == np.uint8:
-                if boof_img is None:
-                    b = pbg.gateway.jvm.boofcv.struct.image.GrayU8()
-                else:
-                    b = boof_img
-                b.setData( bytearray(npimg.data))
-            elif npimg.dtype == np.float32:
-                if boof_img is None:
-                    b = pbg.gateway.jvm.boofcv.struct.image.GrayF32()
-                else:
-                    b = boof_img
-                b.setData(npimg.data)
-            else:
-                raise Exception("Image type not supported yet")
-        else:
-            if boof_img is not None:
-                raise RuntimeError("multiband images doesn't yet support predeclared storage")
-
-            # TODO change this to interleaved images since that's the closest equivalent
-            num_bands = npimg.shape[2]
-
-            bands = []
-            for i in range(num_bands):
-                bands.append(npimg[:, :, i])
-
-            class_type = dtype_to_Class_SingleBand(npimg.dtype)
-
-            b = pbg.gateway.jvm.boofcv.struct.image.Planar(class_type,num_bands)
-
-            for i in range(num_bands):
-                if npimg.dtype == np.uint8:
-                    band = pbg.gateway.jvm.boofcv.struct.image.GrayU8()
-                    band.setData( bytearray(bands[i]) )
-                elif npimg.dtype == np.float32:
-                    band = pbg.gateway.jvm.boofcv.struct.image.GrayF32()
-                    band.setData( bands[i] )
-                band.setWidth(npimg.shape[1])
-                band.setHeight(npimg.shape[0])
-                band.setStride(npimg.shape[1])
-                b.setBand(i,band)
-
-    b.setWidth(npimg.shape[1])
-    b.setHeight(npimg.shape[0])
-    b.setStride(npimg.shape[1])
-
-    return b
-
-
-def boof_to_ndarray( boof ):
-    width = boof.getWidth()
-    height = boof.getHeight()
-    if jg.is_instance_of(pbg.gateway, boof, pbg.gateway.jvm.boofcv.struct.image.ImageGray):
-        nptype = JImageDataType_to_dtype(boof.getImageType().getDataType())
-        boof_data = boof.getData()
-
-        if pbg.mmap_file:
-            if nptype == np.uint8:
-                return mmap_boof_to_numpy_U8(boof)
-            elif nptype == np.float32:
-                return mmap_boof_to_numpy_F32(boof)
-            else:
-                raise RuntimeError("Unsupported image type")
-        else:
-            # create copy the very slow way
-            N = len(boof_data)
-            print("Before painful copy {}".format(N))
-            data = [0]*N
-            for i in range(N):
-                data[i] = boof_data[i]
-            print("After painful copy")
-            return np.ndarray(shape=(height,width), dtype=nptype, buffer=np.array(data))
-    elif jg.is_instance_of(pbg.gateway, boof, pbg.gateway.jvm.boofcv.struct.image.Planar):
-        nptype = JImageDataType_to_dtype(boof.getImageType().getDataType())
-        if pbg.mmap_file:
-            if nptype == np.uint8:
-                return mmap_boof_PU8_to_numpy_IU8(boof)
-            else:
-                raise RuntimeError("Unsupported image type.  Only U8 currently supported")
-        else:
-            raise RuntimeError("Must have mmap turned on for this image type")
+        raise ValueError("boof_img or image_type must be specified")
+    family, dtype, num_bands = _image_type_summary(target)
+
+    if npimg.ndim != 3 or npimg.shape[2] != len(channel_order):
+        raise ValueError("Expected an image with {} channels. shape={}".format(len(channel_order), npimg.shape))
+    channel_order = channel_order.upper()
+    height, width = npimg.shape[0:2]
+
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
+    if family == Family.SINGLE_BAND:
+        offset = mmap_write_image_header(dtype_to_mmap_image(dtype), width, height, 1, dtype.itemsize, slot, family)
+        _weighted_gray(npimg, channel_order, gray_weights, pyboof.mmap_view(dtype, (height, width), offset))
     else:
-        raise Exception("Boof image type not yet supported")
+        if num_bands != npimg.shape[2]:
+            raise ValueError("Image has {} bands not {}".format(num_bands, npimg.shape[2]))
+        order = sorted(range(num_bands), key=lambda i: _channel_rank(channel_order[i]))
+        offset = mmap_write_image_header(dtype_to_mmap_image(dtype), width, height, num_bands, dtype.itemsize,
+                                         slot, family)
+        view = pyboof.mmap_view(dtype, (height, width, num_bands), offset)
+        for band, source in enumerate(order):
+            view[:, :, band] = npimg[:, :, source]
+    channel.flush()
+    return channel.java_mmap.readImage(slot, boof_img)
+
+
+# ImageDataType names of the types which can be transferred
+_data_type_dtypes = {"U8": np.uint8, "S8": np.int8, "U16": np.uint16, "S16": np.int16, "S32": np.int32,
+                     "S64": np.int64, "F32": np.float32, "F64": np.float64}
+
+
+def _image_type_summary(java_image_or_type):
+    """
+    Returns the family, dtype, and number of bands of a Java image or ImageType using a single call
+    """
+    family, data_type, num_bands = pbg.gateway.jvm.pyboof.PyBoofEntryPoint.imageTypeSummary(
+        java_image_or_type).split(",")
+    if data_type not in _data_type_dtypes:
+        raise RuntimeError("Image type not supported yet. " + data_type)
+    return int(family), np.dtype(_data_type_dtypes[data_type]), int(num_bands)
+
+
+def _channel_rank(name):
+    rank = "RGBA".find(name)
+    if rank < 0:
+        raise ValueError("Unknown channel '{}'. Expected R, G, B, or A".format(name))
+    return rank
+
+
+def _weighted_gray(npimg, channel_order, weights, output):
+    """
+    Writes the weighted sum of the red, green, and blue channels into output
+    """
+    try:
+        red, green, blue = (npimg[:, :, channel_order.index(c)] for c in "RGB")
+    except ValueError:
+        raise ValueError("Channel order '{}' needs R, G, and B to convert into gray".format(channel_order))
+    # float32 is exact for sums of 8 and 16-bit values
+    wide = max(npimg.dtype.itemsize, output.dtype.itemsize) > 2
+    work = np.float64 if wide else np.float32
+    if tuple(weights) == GrayWeights.AVERAGE:
+        # Dividing the sum gives exact integers, unlike multiplying by 1/3
+        gray = np.add(red, green, dtype=work)
+        gray += blue
+        gray /= 3
+    else:
+        gray = red * work(weights[0])
+        gray += green * work(weights[1])
+        gray += blue * work(weights[2])
+    output[:] = gray
+
+
+class ImageCache(JavaWrapper):
+    """
+    Images which are kept in the JVM so that sending the same image again doesn't upload its pixels. Images are
+    found by a hash of their contents or by a key picked by the caller, e.g. a frame number. Once the images use
+    more memory than the budget the least recently used ones are discarded.
+
+    The returned Java images are shared by every lookup, so they must not be modified.
+    """
+
+    def __init__(self, max_mb: float = 256):
+        """
+        :param max_mb: Memory the images can use in the JVM before old ones are discarded, in megabytes
+        """
+        JavaWrapper.__init__(self, pbg.gateway.jvm.pyboof.ImageRegistry(int(max_mb * 1024 * 1024)))
+
+    def upload(self, npimg, key=None, family=None, slot=None):
+        """
+        Returns the Java image for the ndarray. It's only uploaded if the key isn't in the cache already
+
+        :param npimg: Image. See ndarray_to_boof()
+        :param key: Identifies the image. If None a hash of the image's contents is used, which is much faster than
+        uploading it
+        :param family: Family of the Java image. See ndarray_to_boof()
+        """
+        if key is None:
+            key = image_content_key(npimg, family)
+        image = self.java_obj.get(key)
+        if image is None:
+            image = self.put(key, npimg, family, slot)
+        return image
+
+    def put(self, key, npimg, family=None, slot=None):
+        """
+        Uploads the image and stores it with the key. Replaces any image which already had that key
+        """
+        channel = pbg.mmap_channel
+        slot = channel.resolve(slot)
+        mmap_write_image(npimg, family, slot)
+        channel.flush()
+        return self.java_obj.upload(channel.java_mmap, slot, key)
+
+    def get(self, key):
+        """
+        Returns the Java image with the key or None
+        """
+        return self.java_obj.get(key)
+
+    def remove(self, key) -> bool:
+        return self.java_obj.remove(key)
+
+    def clear(self):
+        self.java_obj.clear()
+
+    def stats(self) -> dict:
+        return {"images": self.java_obj.size(), "bytes": self.java_obj.getTotalBytes(),
+                "max_bytes": self.java_obj.getMaxBytes(), "hits": self.java_obj.getHits(),
+                "misses": self.java_obj.getMisses(), "evictions": self.java_obj.getEvictions()}
+
+    def __contains__(self, key):
+        return self.java_obj.contains(key)
+
+    def __len__(self):
+        return self.java_obj.size()
+
+
+class ImagePool(JavaWrapper):
+    """
+    Java images which are reused instead of being created for every frame, which avoids allocating memory and
+    garbage collection in the JVM when processing video. Images are grouped by their type and shape. Once an image
+    is no longer needed it's released back into the pool and handed out by a later acquire() or upload().
+    """
+
+    def __init__(self, max_idle: int = 4):
+        """
+        :param max_idle: Most images of the same type and shape which are kept for reuse
+        """
+        JavaWrapper.__init__(self, pbg.gateway.jvm.pyboof.ImagePool(max_idle))
+
+    def acquire(self, image_type, width: int, height: int):
+        """
+        Returns a Java image of the specified type and shape. The contents are whatever the last user left in it
+
+        :param image_type: ImageType or a Java ImageType
+        """
+        if isinstance(image_type, ImageType):
+            image_type = image_type.java_obj
+        return self.java_obj.acquire(image_type, width, height)
+
+    def release(self, boof_image):
+        """
+        Returns an image to the pool. It must not be used after this
+        """
+        self.java_obj.release(boof_image)
+
+    def upload(self, npimg, family=None, slot=None):
+        """
+        Copies the ndarray into an image from the pool with a single call. See ndarray_to_boof()
+        """
+        channel = pbg.mmap_channel
+        slot = channel.resolve(slot)
+        mmap_write_image(npimg, family, slot)
+        channel.flush()
+        return self.java_obj.upload(channel.java_mmap, slot)
+
+    @contextmanager
+    def borrowed(self, npimg, family=None, slot=None):
+        """
+        Context manager which uploads the ndarray into a pooled image and releases it on exit
+        """
+        boof_image = self.upload(npimg, family, slot)
+        try:
+            yield boof_image
+        finally:
+            self.release(boof_image)
+
+    def clear(self):
+        self.java_obj.clear()
+
+    def stats(self) -> dict:
+        """
+        How many images have been created, handed out again, released, and dropped because there were already
+        max_idle of them, along with how many are waiting to be reused
+        """
+        return {"allocated": self.java_obj.getAllocated(), "reused": self.java_obj.getReused(),
+                "released": self.java_obj.getReleased(), "discarded": self.java_obj.getDiscarded(),
+                "idle": self.java_obj.getIdleCount()}
+
+
+class BatchImageLoader(JavaWrapper):
+    """
+    Loads images from disk in background threads inside the JVM, so that decoding the next images overlaps with
+    processing the current one. Images come out in the same order as the paths. At most 'prefetch' decoded images
+    are waiting at any time, which bounds memory use. Iterating returns Java images. Use ndarrays() to get ndarrays
+    instead.
+
+    Equivalent to a faster version of calling load_single_band() or load_planar() in a loop.
+    """
+
+    def __init__(self, paths, image_type, num_threads: int = 0, prefetch: int = 8, resize=None):
+        """
+        :param paths: List of image paths or a glob pattern, e.g. "images/*.jpg". Glob matches are sorted
+        :param image_type: ImageType or a Java ImageType which the images are converted into
+        :param num_threads: Number of threads which decode images. If <= 0 then the number of processors
+        :param prefetch: Most images which are decoded ahead of the consumer
+        :param resize: Optional (width, height) which every image is resized to
+        """
+        if isinstance(paths, str):
+            paths = sorted(glob.glob(paths))
+        self.paths = [os.path.abspath(p) for p in paths]
+        if isinstance(image_type, ImageType):
+            image_type = image_type.java_obj
+        width, height = resize if resize is not None else (0, 0)
+        java_list = ListConverter().convert(self.paths, pbg.gateway._gateway_client)
+        JavaWrapper.__init__(self, pbg.gateway.jvm.pyboof.BatchImageLoader(
+            java_list, image_type, num_threads, prefetch, width, height))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        boof_image = self.java_obj.nextOrNull()
+        if boof_image is None:
+            raise StopIteration
+        return boof_image
+
+    def next_ndarray(self, copy=True, slot=None):
+        """
+        Returns the next image as an ndarray or None if there are no more. The image never becomes a Java object
+        in Python, which saves a call. See boof_to_ndarray() for the meaning of copy
+        """
+        slot = pbg.mmap_channel.resolve(slot)
+        if not self.java_obj.writeNext(pbg.mmap_channel.java_mmap, slot):
+            return None
+        return _mmap_read_image(slot, copy)
+
+    def ndarrays(self, slot=None):
+        """
+        Generator which returns the remaining images as ndarrays
+        """
+        while True:
+            npimg = self.next_ndarray(slot=slot)
+            if npimg is None:
+                return
+            yield npimg
+
+    def index(self) -> int:
+        """
+        Index of the image which will be returned next
+        """
+        return self.java_obj.getIndex()
+
+    def close(self):
+        """
+        Stops the background threads. Images which have not been returned are discarded
+        """
+        self.java_obj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FrameSource(JavaWrapper):
+    """
+    Frames from a video or a sequence of images which are decoded inside the JVM. Iterating returns Java images
+    which can be passed directly to trackers, detectors, and video mosaics. Only the results need to come back to
+    Python, instead of every frame being decoded in Python and sent over with ndarray_to_boof().
+
+    A video reader can reuse the same image for every frame, so a frame is only valid until the next one is read.
+    Use open_frame_source() to create one.
+    """
+
+    def __init__(self, java_object):
+        JavaWrapper.__init__(self, java_object)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        frame = self.java_obj.nextOrNull()
+        if frame is None:
+            raise StopIteration
+        return frame
+
+    def next_ndarray(self, copy=True, slot=None):
+        """
+        Returns the next frame as an ndarray or None if there are no more. See boof_to_ndarray() for the meaning
+        of copy
+        """
+        slot = pbg.mmap_channel.resolve(slot)
+        if not self.java_obj.writeNext(pbg.mmap_channel.java_mmap, slot):
+            return None
+        return _mmap_read_image(slot, copy)
+
+    def frame_number(self) -> int:
+        """
+        Index of the most recently read frame, or -1 if none have been read
+        """
+        return self.java_obj.getFrameNumber()
+
+    def close(self):
+        self.java_obj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_image_extensions = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".pgm", ".ppm", ".tif", ".tiff")
+
+
+def open_frame_source(source, image_type, num_threads: int = 0, prefetch: int = 8) -> FrameSource:
+    """
+    Opens a video or a sequence of images so that its frames can be processed without leaving the JVM
+
+    :param source: Path to a video, such as an MJPEG file, a directory of images, a glob pattern, or a list of
+                   image paths. Images in a directory or matching a pattern are read in sorted order
+    :param image_type: ImageType or a Java ImageType which frames are converted into. Typically the value returned
+                       by get_image_type() of whatever processes the frames
+    :param num_threads: Number of threads which decode images in a sequence. See BatchImageLoader
+    :param prefetch: Most images in a sequence which are decoded ahead of time. See BatchImageLoader
+    """
+    if isinstance(image_type, ImageType):
+        image_type = image_type.java_obj
+    factory = pbg.gateway.jvm.pyboof.FrameSource
+
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            source = sorted(os.path.join(source, f) for f in os.listdir(source)
+                            if os.path.splitext(f)[1].lower() in _image_extensions)
+        elif any(c in source for c in "*?["):
+            source = sorted(glob.glob(source))
+        else:
+            return FrameSource(factory.openVideo(os.path.abspath(source), image_type))
+
+    java_list = ListConverter().convert([os.path.abspath(p) for p in source], pbg.gateway._gateway_client)
+    return FrameSource(factory.openImages(java_list, image_type, num_threads, prefetch))
+
+
+def image_content_key(npimg, family=None) -> str:
+    """
+    Returns a key which identifies the image by its contents, shape, dtype and the family it's converted into.
+    See ImageCache
+    """
+    if family is None:
+        family = Family.SINGLE_BAND if npimg.ndim == 2 else Family.INTERLEAVED
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("{}{}{}".format(np.dtype(npimg.dtype).str, npimg.shape, family).encode())
+    digest.update(np.ascontiguousarray(npimg).data)
+    return digest.hexdigest()
 
 
 def gradient_dtype(dtype):
@@ -337,15 +786,18 @@ def gradient_dtype(dtype):
         raise Exception("Unknown type: "+str(dtype))
 
 
-def create_single_band(width, height, dtype):
+def create_single_band(width, height, dtype, pool=None):
     """
     Creates a single band BoofCV image.
 
     :param width: Image width
     :param height: Image height
     :param dtype: data type
+    :param pool: If not None the image is taken from this ImagePool instead of being created
     :return: New instance of a BoofCV single band image
     """
+    if pool is not None:
+        return pool.acquire(create_ImageType(Family.SINGLE_BAND, dtype), width, height)
     if dtype == np.uint8:
         return pbg.gateway.jvm.boofcv.struct.image.GrayU8(width, height)
     elif dtype == np.int8:
@@ -366,7 +818,7 @@ def create_single_band(width, height, dtype):
         raise Exception("Unsupported type")
 
 
-def create_planar( width , height , num_bands , dtype):
+def create_planar( width , height , num_bands , dtype, pool=None):
     """
     Creates a Planar BoofCV image.
 
@@ -374,15 +826,18 @@ def create_planar( width , height , num_bands , dtype):
     :param height: Image height
     :param num_bands: Number of bands in the image
     :param dtype: data type
+    :param pool: If not None the image is taken from this ImagePool instead of being created
     :return: New instance of a BoofCV planar multi-bandimage
     """
+    if pool is not None:
+        return pool.acquire(create_ImageType(Family.PLANAR, dtype, num_bands), width, height)
 
     jImageClass = dtype_to_Class_SingleBand(dtype)
 
     return pbg.gateway.jvm.boofcv.struct.image.Planar(jImageClass,width,height,num_bands)
 
 
-def create_interleaved(width, height, num_bands, dtype):
+def create_interleaved(width, height, num_bands, dtype, pool=None):
     """
     Creates a interleaved BoofCV image.
 
@@ -390,8 +845,11 @@ def create_interleaved(width, height, num_bands, dtype):
     :param height: Image height
     :param num_bands: Number of bands/channels in the image
     :param dtype: data type
+    :param pool: If not None the image is taken from this ImagePool instead of being created
     :return: New instance of a BoofCV single band image
     """
+    if pool is not None:
+        return pool.acquire(create_ImageType(Family.INTERLEAVED, dtype, num_bands), width, height)
     if dtype == np.uint8:
         return pbg.gateway.jvm.boofcv.struct.image.InterleavedU8(width, height, num_bands)
     elif dtype == np.int8:
@@ -554,100 +1012,182 @@ def fill_uniform(image, min_value, max_value):
 #        Functions for converting images using mmap files
 
 
-def mmap_numpy_to_boof_U8(numpy_image, boof_img = None):
-    width = numpy_image.shape[1]
-    height = numpy_image.shape[0]
-    num_bands = 1
+# Pixel dtype of each image payload type
+_mmap_image_dtypes = {
+    pyboof.MmapType.IMAGE_U8: np.uint8,
+    pyboof.MmapType.IMAGE_S8: np.int8,
+    pyboof.MmapType.IMAGE_U16: np.uint16,
+    pyboof.MmapType.IMAGE_S16: np.int16,
+    pyboof.MmapType.IMAGE_S32: np.int32,
+    pyboof.MmapType.IMAGE_S64: np.int64,
+    pyboof.MmapType.IMAGE_F32: np.float32,
+    pyboof.MmapType.IMAGE_F64: np.float64,
+}
+_dtype_to_mmap_image = {np.dtype(v): k for k, v in _mmap_image_dtypes.items()}
+
+
+def dtype_to_mmap_image(dtype):
+    """
+    Returns the MmapType used to transfer images with pixels of the dtype
+    """
+    mmap_type = _dtype_to_mmap_image.get(np.dtype(np.dtype(dtype).type))
+    if mmap_type is None:
+        raise RuntimeError("Image type not supported yet. " + str(dtype))
+    return mmap_type
+
+
+def mmap_write_image_header(mmap_type, width, height, num_bands, pixel_bytes, slot=None, family=None):
+    """
+    Writes the image header into a slot in the memory mapped file and returns the offset of the first pixel. The
+    file is grown if the image won't fit.
+
+    :param family: Family of the image Java creates when it isn't given storage. If None then it's single band
+    for one band and interleaved for more
+    """
+    if family is None:
+        family = Family.SINGLE_BAND if num_bands == 1 else Family.INTERLEAVED
+    header_bytes = struct.calcsize(pyboof.MMAP_IMAGE_HEADER)
+    base = pbg.mmap_channel.prepare_write(slot, header_bytes + width * height * num_bands * pixel_bytes)
+    struct.pack_into(pyboof.MMAP_IMAGE_HEADER, pbg.mmap_file, base, mmap_type, family, width, height, num_bands)
+    return base + header_bytes
+
+
+def mmap_read_image_header(mmap_type=None, slot=None):
+    """
+    Reads the image header from a slot in the memory mapped file, after Java has written to it, and makes sure it's
+    of the expected type
+
+    :param mmap_type: Expected type of the image. If None then any image type is accepted
+    :return: width, height, num_bands, offset of the first pixel
+    """
+    found, family, width, height, num_bands, offset = _mmap_unpack_image_header(slot)
+    if mmap_type is not None and found != mmap_type:
+        raise RuntimeError("Unexpected data type in mmap file. Expected {} found {}".format(mmap_type, found))
+    return width, height, num_bands, offset
+
+
+def _mmap_unpack_image_header(slot):
+    base = pbg.mmap_channel.prepare_read(slot)
+    data_type, family, width, height, num_bands = struct.unpack_from(pyboof.MMAP_IMAGE_HEADER, pbg.mmap_file, base)
+    if data_type not in _mmap_image_dtypes:
+        raise RuntimeError("Expected an image in the mmap file. Found {}".format(data_type))
+    return data_type, family, width, height, num_bands, base + struct.calcsize(pyboof.MMAP_IMAGE_HEADER)
+
+
+def mmap_write_image(numpy_image, family=None, slot=None):
+    """
+    Copies an image into a slot. Single band images have a shape of (height, width) and multi-band images
+    (height, width, bands). Java isn't called, so it's up to the caller to have Java read the image.
+
+    :param family: Family of the image Java creates when it isn't given storage. See mmap_write_image_header()
+    """
+    mmap_type = dtype_to_mmap_image(numpy_image.dtype)
+    height, width = numpy_image.shape[0:2]
+    num_bands = 1 if numpy_image.ndim == 2 else numpy_image.shape[2]
+    dtype = np.dtype(numpy_image.dtype.type)
+
+    offset = mmap_write_image_header(mmap_type, width, height, num_bands, dtype.itemsize, slot, family)
+    # Assigning to a view handles strided input, such as a slice, without an intermediate copy
+    pyboof.mmap_view(dtype, numpy_image.shape, offset)[:] = numpy_image
+
+
+def mmap_write_gray(numpy_image, slot=None):
+    """
+    Copies a single band image into a slot. Java isn't called, so it's up to the caller to have Java read the
+    image, e.g. as part of a composite call
+    """
+    if numpy_image.ndim != 2:
+        raise RuntimeError("Expected a single band image. shape={}".format(numpy_image.shape))
+    mmap_write_image(numpy_image, Family.SINGLE_BAND, slot)
 
-    mm = pbg.mmap_file
-    mm.seek(0)
-    mm.write(struct.pack('>HIII', pyboof.MmapType.IMAGE_U8,width,height,num_bands))
-    mm.write(numpy_image.data)
 
-    return pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.readImage_U8(boof_img)
+def mmap_numpy_to_boof(numpy_image, boof_img=None, family=None, slot=None):
+    """
+    Converts an ndarray of any supported dtype into a BoofCV image through the memory mapped file
 
+    :param boof_img: Optional storage for the image. Must have the same dtype but can be of any family
+    :param family: Family of the image which is created if boof_img is None. See mmap_write_image_header()
+    """
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
+    mmap_write_image(numpy_image, family, slot)
+    channel.flush()
+    return channel.java_mmap.readImage(slot, boof_img)
 
-def mmap_numpy_to_boof_F32(numpy_image, boof_img = None):
-    width = numpy_image.shape[1]
-    height = numpy_image.shape[0]
-    num_bands = 1
 
-    mm = pbg.mmap_file
-    mm.seek(0)
-    mm.write(struct.pack('>HIII', pyboof.MmapType.IMAGE_F32, width, height, num_bands))
-    mm.write(numpy_image.data)
+def mmap_boof_to_numpy(boof_image, copy=True, slot=None):
+    """
+    Converts a BoofCV image of any supported type and family into an ndarray through the memory mapped file. Single
+    band images have a shape of (height, width) and all others (height, width, bands). See boof_to_ndarray()
+    """
+    slot = pbg.mmap_channel.resolve(slot)
+    pbg.mmap_channel.java_mmap.writeImage(slot, boof_image)
+    return _mmap_read_image(slot, copy)
 
-    return pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.readImage_F32(boof_img)
 
+def mmap_boof_region_to_numpy(boof_image, x0, y0, x1, y1, band=-1, copy=True, slot=None):
+    """
+    Converts the rectangle from (x0, y0) inclusive to (x1, y1) exclusive inside a BoofCV image into an ndarray
+    through the memory mapped file. Works with subimages. See BImage.__getitem__()
 
-def mmap_numpy_to_boof_IU8( numpy_image , boof_img=None):
-    width = numpy_image.shape[1]
-    height = numpy_image.shape[0]
-    num_bands = numpy_image.shape[2]
+    :param band: If >= 0 then only this band of a planar image is converted
+    """
+    slot = pbg.mmap_channel.resolve(slot)
+    pbg.mmap_channel.java_mmap.writeRegion(slot, boof_image, x0, y0, x1, y1, band)
+    return _mmap_read_image(slot, copy)
 
-    # The image write takes less than a millisecond
-    mm = pbg.mmap_file
-    mm.seek(0)
-    mm.write(struct.pack('>HIII', pyboof.MmapType.IMAGE_U8, width, height, num_bands))
-    mm.write(numpy_image.data)
 
-    # TODO again just invoking the java function appears to take 2 to 3 ms even if the function does nothing
-    #      Hard to tell how load the actual read takes in the MMAP file.  Probably around 1ms
-    return pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.readImage_IU8(boof_img)
+def mmap_numpy_to_boof_region(numpy_image, boof_image, x0, y0, band=-1, slot=None):
+    """
+    Copies an ndarray into a BoofCV image with its top left corner at (x0, y0) through the memory mapped file.
+    The dtype must match the BoofCV image. See BImage.__setitem__()
 
+    :param band: If >= 0 then the ndarray is single band and is copied into this band of a planar image
+    """
+    channel = pbg.mmap_channel
+    slot = channel.resolve(slot)
+    mmap_write_image(numpy_image, slot=slot)
+    channel.flush()
+    channel.java_mmap.readRegion(slot, boof_image, x0, y0, band)
 
-def mmap_boof_to_numpy_U8(boof_image):
-    pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.writeImage_U8(boof_image)
 
-    mm = pbg.mmap_file
-    mm.seek(0)
-    header_bytes = mm.read(14) # speed it up significantly by minimizing disk access
-    data_type, width, height, num_bands = struct.unpack('>hiii', header_bytes)
+def _mmap_read_image(slot, copy):
+    mmap_type, family, width, height, num_bands, offset = _mmap_unpack_image_header(slot)
+    shape = (height, width) if family == Family.SINGLE_BAND else (height, width, num_bands)
+    # Java wrote the data in native byte order so no conversion is needed
+    return mmap_view_or_copy(pyboof.mmap_view(_mmap_image_dtypes[mmap_type], shape, offset), copy)
 
-    if data_type is not pyboof.MmapType.IMAGE_U8:
-        raise RuntimeError("Expected IMAGE_U8 in mmap file")
-    if num_bands != 1:
-        raise RuntimeError("Expected single band image. Found {}".format(num_bands))
 
-    data = mm.read(width*height)
-    return np.ndarray(shape=(height, width), dtype=np.uint8, buffer=np.array(data))
+def mmap_numpy_to_boof_U8(numpy_image, boof_img = None, slot=None):
+    return mmap_numpy_to_boof(np.asarray(numpy_image, dtype=np.uint8), boof_img, slot=slot)
 
 
-def mmap_boof_to_numpy_F32(boof_image):
-    # PERFORMANCE NOTE: Surprisingly this executes very fast.  The python code below is by far the slowest part
-    pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.writeImage_F32(boof_image)
+def mmap_numpy_to_boof_F32(numpy_image, boof_img = None, slot=None):
+    return mmap_numpy_to_boof(np.asarray(numpy_image, dtype=np.float32), boof_img, slot=slot)
 
-    mm = pbg.mmap_file
-    mm.seek(0)
-    header_bytes = mm.read(14) # speed it up significantly by minimizing disk access
-    data_type, width, height, num_bands = struct.unpack('>hiii', header_bytes)
 
-    if data_type is not pyboof.MmapType.IMAGE_F32:
-        raise RuntimeError("Expected IMAGE_F32 in mmap file")
-    if num_bands != 1:
-        raise RuntimeError("Expected single band image. Found {}".format(num_bands))
+def mmap_numpy_to_boof_IU8(numpy_image , boof_img=None, slot=None):
+    return mmap_numpy_to_boof(np.asarray(numpy_image, dtype=np.uint8), boof_img, Family.INTERLEAVED, slot)
 
-    raw_data = mm.read(width * height * 4)
-    data = struct.unpack('>{}f'.format(width*height), raw_data)
 
-    if len(data) != width*height:
-        print("Unexpected data length. {}".format(len(data)))
+def mmap_view_or_copy(ndarray, copy):
+    """
+    Returns a copy of an ndarray which references the memory mapped file or, if copy is False, marks the view as
+    read only and returns it. The view is overwritten by the next transfer.
+    """
+    if copy:
+        return ndarray.copy()
+    ndarray.flags.writeable = False
+    return ndarray
 
-    # create array in java format then convert into native format
-    tmp = np.ndarray(shape=(height, width), dtype='>f4', order='C', buffer=raw_data)
-    return tmp.astype(dtype=np.float32, copy=False)
 
+def mmap_boof_to_numpy_U8(boof_image, copy=True, slot=None):
+    return mmap_boof_to_numpy(boof_image, copy, slot)
 
-def mmap_boof_PU8_to_numpy_IU8(boof_image):
-    pbg.gateway.jvm.pyboof.PyBoofEntryPoint.mmap.writeImage_PU8_as_IU8(boof_image)
 
-    mm = pbg.mmap_file
-    mm.seek(0)
-    header_bytes = mm.read(14) # speed it up significantly by minimizing disk access
-    data_type, width, height, num_bands = struct.unpack('>hiii', header_bytes)
+def mmap_boof_to_numpy_F32(boof_image, copy=True, slot=None):
+    return mmap_boof_to_numpy(boof_image, copy, slot)
 
-    if data_type is not pyboof.MmapType.IMAGE_U8:
-        raise RuntimeError("Expected IMAGE_U8 in mmap file")
 
-    data = mm.read(width*height*num_bands)
-    return np.ndarray(shape=(height, width, num_bands), dtype=np.uint8, buffer=np.array(data))
\ No newline at end of file
+def mmap_boof_PU8_to_numpy_IU8(boof_image, copy=True, slot=None):
+    return mmap_boof_to_numpy(boof_image, copy, slot)
@@ -1,9 +1,11 @@
 from pyboof import pbg
 
 from pyboof.common import *
+from pyboof.image import create_single_band
 from pyboof.image import dtype_to_Class_SingleBand
 from pyboof.image import ImageType
 from py4j.java_gateway import is_instance_of
+import numpy as np
 
 
 class Border:
@@ -25,21 +27,21 @@ class GradientType:
 
 
 class ThresholdType:
-    FIXED          = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.FIXED
-    GLOBAL_ENTROPY = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.GLOBAL_ENTROPY
-    GLOBAL_OTSU    = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.GLOBAL_OTSU
-    GLOBAL_LI      = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.GLOBAL_LI
-    GLOBAL_HUANG   = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.GLOBAL_HUANG
-    LOCAL_GAUSSIAN = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_GAUSSIAN
-    LOCAL_MEAN     = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_MEAN
-    LOCAL_OTSU     = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_OTSU
-    LOCAL_SAVOLA   = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_SAVOLA
-    LOCAL_WOLF     = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_WOLF
-    LOCAL_NICK     = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_NICK
-    LOCAL_NIBLACK  = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.LOCAL_NIBLACK
-    BLOCK_MIN_MAX  = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.BLOCK_MIN_MAX
-    BLOCK_MEAN     = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.BLOCK_MEAN
-    BLOCK_OTSU     = pbg.gateway.jvm.boofcv.factory.filter.binary.ThresholdType.BLOCK_OTSU
+    FIXED          = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    GLOBAL_ENTROPY = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    GLOBAL_OTSU    = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    GLOBAL_LI      = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    GLOBAL_HUANG   = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_GAUSSIAN = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_MEAN     = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_OTSU     = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_SAVOLA   = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_WOLF     = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_NICK     = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    LOCAL_NIBLACK  = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    BLOCK_MIN_MAX  = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    BLOCK_MEAN     = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
+    BLOCK_OTSU     = JavaStatic("boofcv.factory.filter.binary.ThresholdType")
 
 
 class InterpolationType:
@@ -124,7 +126,7 @@ def blur_median(image, output, radius=1):
     pbg.gateway.jvm.boofcv.alg.filter.blur.BlurImageOps.median(image, output, radius, None)
 
 
-def shrink_image(image, output_size, interp_type=InterpolationType.INTEGRAL, output=None):
+def shrink_image(image, output_size, interp_type=InterpolationType.INTEGRAL, output=None, pool=None):
     """
     Shrinks the image using the specified interpolation method.  If the change in scale is larger than a factor
     of two then integral should be used.  Otherwise bilinear should be sufficient.
@@ -134,6 +136,7 @@ def shrink_image(image, output_size, interp_type=InterpolationType.INTEGRAL, out
     :param interp_type: Interpolation type
     :type interp_type: InterpolationType
     :param output: Optional storage for output image.  Will be resized
+    :param pool: If not None and output is None, the output is taken from this ImagePool
     :return: The shrunk image
     """
 
@@ -146,7 +149,9 @@ def shrink_image(image, output_size, interp_type=InterpolationType.INTEGRAL, out
     if image.getWidth() < output_shape[1] or image.getHeight() < output_shape[0]:
         raise RuntimeError("Either width or height is larger in output than input")
 
-    if output is None:
+    if output is None and pool is not None:
+        output = pool.acquire(image.getImageType(), output_shape[1], output_shape[0])
+    elif output is None:
         output = image.createNew(output_shape[1], output_shape[0])
     else:
         output.reshape(output_shape[1], output_shape[0])
@@ -258,8 +263,18 @@ class InputToBinary(JavaWrapper):
     def __init__(self, java_object):
         self.set_java_object(java_object)
 
-    def process(self, input , output):
+    def process(self, input , output=None, pool=None):
+        """
+        Converts the input image into a binary image
+
+        :param output: Storage for the GrayU8 binary image. If None a new image is used
+        :param pool: If not None and output is None, the output is taken from this ImagePool
+        :return: The binary image
+        """
+        if output is None:
+            output = create_single_band(input.getWidth(), input.getHeight(), np.uint8, pool)
         self.java_obj.process(input, output)
+        return output
 
 
 class FactoryThresholdBinary:
@@ -0,0 +1,220 @@
+import multiprocessing
+import multiprocessing.context
+import os
+import queue
+import signal
+import socket
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import threading
+
+from py4j.protocol import Py4JNetworkError
+
+
+def find_free_port():
+    """
+    Asks the OS for a port which isn't being used
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+def _start_worker_jvm():
+    import pyboof
+    from pyboof import pbg
+    pyboof.init_pyboof(java_port=find_free_port(), python_port=find_free_port(), **_worker_settings)
+    if _worker_pids is not None and pbg.java_pid is not None:
+        _worker_pids.put(pbg.java_pid)
+
+
+# Protects os.environ while it's changed for a worker which is being launched
+_environ_lock = threading.Lock()
+
+
+class _WorkerProcess(multiprocessing.context.SpawnProcess):
+    """
+    Worker process which always imports PyBoof lazily. A spawned worker imports PyBoof before the initializer runs,
+    so if it inherited PYBOOF_LAZY=0 it would launch a JVM on the default ports before picking free ones. The
+    environment is only changed while the process is being launched, since that's when it's copied
+    """
+
+    def start(self):
+        with _environ_lock:
+            previous = os.environ.get("PYBOOF_LAZY")
+            os.environ["PYBOOF_LAZY"] = "1"
+            try:
+                super().start()
+            finally:
+                if previous is None:
+                    del os.environ["PYBOOF_LAZY"]
+                else:
+                    os.environ["PYBOOF_LAZY"] = previous
+
+
+class _WorkerContext(multiprocessing.context.SpawnContext):
+    Process = _WorkerProcess
+
+
+# Settings for init_pyboof() and the queue JVM pids are reported to. Only set inside of worker processes
+_worker_settings = None
+_worker_pids = None
+
+
+def _init_worker(settings, pids):
+    global _worker_settings, _worker_pids
+    _worker_settings = settings
+    _worker_pids = pids
+
+    import pyboof
+    from multiprocessing.util import Finalize
+    _start_worker_jvm()
+    # atexit isn't called when a worker process exits, but this is
+    Finalize(None, pyboof.shutdown_jvm, exitpriority=10)
+
+
+def _run_job(fn, args, kwargs):
+    """
+    Runs the job inside the worker. If the worker's JVM died, it's restarted and the job is tried again
+    """
+    try:
+        return fn(*args, **kwargs)
+    except Py4JNetworkError:
+        import pyboof
+        pyboof.shutdown_jvm()
+        _start_worker_jvm()
+        return fn(*args, **kwargs)
+
+
+class JvmPool:
+    """
+    Pool of worker processes which each have their own JVM and memory mapped file, so that jobs run in parallel
+    instead of all going through a single gateway. Works like concurrent.futures.ProcessPoolExecutor. Jobs are
+    functions which are run inside the worker, use PyBoof as normal, and return something which can be pickled.
+
+    If a worker process crashes, the pool is restarted and the jobs it lost are resubmitted up to max_retries
+    times. If a worker's JVM crashes, the worker launches a new one and runs the job again.
+
+    Example:
+
+        def count_qr(path):
+            detector = pb.FactoryFiducial(np.uint8).qrcode()
+            detector.detect(pb.load_single_band(path, np.uint8))
+            return len(detector.detections)
+
+        with JvmPool(8) as pool:
+            counts = list(pool.map(count_qr, paths))
+    """
+
+    def __init__(self, num_workers=None, size_mb: int = 20, num_slots: int = 4, max_size_mb: int = 256,
+                 max_retries: int = 1):
+        """
+        :param num_workers: Number of worker processes and JVMs. If None then it's the number of CPUs
+        :param size_mb: Size of each worker's mmap slots. See init_pyboof()
+        :param num_slots: Number of slots in each worker's mmap file. See init_pyboof()
+        :param max_size_mb: Largest size each worker's mmap slots can grow to. See init_pyboof()
+        :param max_retries: How many times a job is resubmitted after the worker running it crashed
+        """
+        self.num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.max_retries = max_retries
+        self._settings = dict(size_mb=size_mb, num_slots=num_slots, max_size_mb=max_size_mb)
+        # Workers must start from a clean interpreter. A forked worker would share the parent's gateway
+        self._context = _WorkerContext()
+        self._pids = self._context.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._executor = self._create_executor()
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(max_workers=self.num_workers, mp_context=self._context,
+                                   initializer=_init_worker, initargs=(self._settings, self._pids))
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Schedules fn(*args, **kwargs) to run on one of the workers
+        """
+        future = Future()
+        self._submit(future, fn, args, kwargs, self.max_retries)
+        return future
+
+    def _submit(self, future, fn, args, kwargs, retries):
+        with self._lock:
+            if self._executor is None:
+                raise RuntimeError("Can't submit jobs after shutdown")
+            generation = self._generation
+            inner = self._executor.submit(_run_job, fn, args, kwargs)
+
+        def done(f):
+            if future.cancelled():
+                return
+            if f.cancelled():
+                future.cancel()
+                return
+            error = f.exception()
+            if isinstance(error, BrokenProcessPool) and retries > 0:
+                try:
+                    self._restart(generation)
+                    self._submit(future, fn, args, kwargs, retries - 1)
+                except RuntimeError as e:
+                    future.set_exception(e)
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(f.result())
+
+        inner.add_done_callback(done)
+
+    def _restart(self, generation):
+        """
+        Replaces a broken executor. Only the first job to notice a broken executor restarts it
+        """
+        with self._lock:
+            if self._executor is None:
+                raise RuntimeError("Pool has been shutdown")
+            if generation != self._generation:
+                return
+            self._executor.shutdown(wait=False)
+            self._kill_orphaned_jvms()
+            self._generation += 1
+            self._executor = self._create_executor()
+
+    def _kill_orphaned_jvms(self):
+        # Workers which crashed never got to shut down their JVM
+        while not self._pids.empty():
+            try:
+                os.kill(self._pids.get_nowait(), signal.SIGTERM)
+            except queue.Empty:
+                return
+            except (OSError, ValueError):
+                pass
+
+    def map(self, fn, *iterables, timeout=None):
+        """
+        Same as the built-in map() but the calls are spread across the workers. Results are returned in order
+        """
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+
+        def results():
+            try:
+                for f in futures:
+                    yield f.result(timeout)
+            finally:
+                for f in futures:
+                    f.cancel()
+
+        return results()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+        return False
@@ -4,6 +4,10 @@ from pyboof import pbg
 from pyboof import MmapType
 from py4j.java_collections import ListConverter
 from py4j.protocol import Py4JError
+from pyboof.aio import run_async
+from pyboof.image import BatchImageLoader
+from pyboof.image import ImageCache
+from pyboof.image import ndarray_to_boof
 import tempfile
 
 
@@ -55,20 +59,20 @@ class HammingDictionary:
     """
     List of prebuilt hamming dictionaries
     """
-    CUSTOM = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.CUSTOM
-    ARUCO_ORIGINAL = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_ORIGINAL
-    ARUCO_MIP_16h3 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_MIP_16h3
-    ARUCO_MIP_25h7 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_MIP_25h7
-    ARUCO_MIP_36h12 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_MIP_36h12
-    ARUCO_OCV_4x4_1000 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_OCV_4x4_1000
-    ARUCO_OCV_5x5_1000 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_OCV_5x5_1000
-    ARUCO_OCV_6x6_1000 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_OCV_6x6_1000
-    ARUCO_OCV_7x7_1000 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.ARUCO_OCV_7x7_1000
-    APRILTAG_16h5 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.APRILTAG_16h5
-    APRILTAG_25h7 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.APRILTAG_25h7
-    APRILTAG_25h9 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.APRILTAG_25h9
-    APRILTAG_36h10 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.APRILTAG_36h10
-    APRILTAG_36h11 = pbg.gateway.jvm.boofcv.factory.fiducial.HammingDictionary.APRILTAG_36h11
+    CUSTOM = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_ORIGINAL = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_MIP_16h3 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_MIP_25h7 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_MIP_36h12 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_OCV_4x4_1000 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_OCV_5x5_1000 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_OCV_6x6_1000 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    ARUCO_OCV_7x7_1000 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    APRILTAG_16h5 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    APRILTAG_25h7 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    APRILTAG_25h9 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    APRILTAG_36h10 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
+    APRILTAG_36h11 = JavaStatic("boofcv.factory.fiducial.HammingDictionary")
 
 
 class ConfigGridDimen(JavaConfig):
@@ -235,6 +239,15 @@ class FiducialDetector(JavaWrapper):
     def detect(self, image):
         self.java_obj.detect(image)
 
+    async def detect_async(self, image, executor=None):
+        """
+        Awaitable version of detect(). Returns the number of fiducials found
+        """
+        def detect():
+            self.detect(image)
+            return self.get_total()
+        return await run_async(detect, executor=executor, owner=self)
+
     def set_intrinsic(self, intrinsic):
         if intrinsic is None:
             self.java_obj.setLensDistortion(None, -1, -1)
@@ -279,10 +292,54 @@ class FiducialDetector(JavaWrapper):
 
 
 class FiducialImageDetector(FiducialDetector):
-    def add_pattern(self, image, side_length, threshold=100.0):
+    def add_pattern(self, image, side_length, threshold=100.0, cache: ImageCache = None):
+        """
+        :param image: Pattern as a gray BoofCV image or ndarray
+        :param cache: If not None and the image is an ndarray, the pattern is only uploaded if it isn't in the cache
+        """
+        if isinstance(image, np.ndarray):
+            image = ndarray_to_boof(image) if cache is None else cache.upload(image)
         self.java_obj.addPatternImage(image, threshold, side_length)
 
 
+def _polygon_fields(name):
+    return ["{}.vertexes[{}].{}".format(name, i, axis) for i in range(4) for axis in "xy"]
+
+
+def _read_markers(java_objects, primitives, values, polygons):
+    """
+    Reads the fields of every marker in a Java list using one call for the primitive fields and one for everything
+    else, instead of several calls for each marker. Returns a dict of field name to value for each marker.
+    Polygons must have 4 vertexes.
+    """
+    records = snapshot_fields(java_objects, primitives + [f for name in polygons for f in _polygon_fields(name)])
+    if len(records) == 0:
+        return []
+    others = snapshot_values(java_objects, values)
+    markers = []
+    for record, other in zip(records.tolist(), others):
+        fields = dict(zip(primitives, record))
+        fields.update(zip(values, other))
+        for idx, name in enumerate(polygons):
+            start = len(primitives) + 8 * idx
+            fields[name] = Polygon2D(list(zip(record[start:start + 8:2], record[start + 1:start + 8:2])))
+        markers.append(fields)
+    return markers
+
+
+def _read_marker(java_object, primitives, values, polygons):
+    java_list = ListConverter().convert([java_object], pbg.gateway._gateway_client)
+    return _read_markers(java_list, primitives, values, polygons)[0]
+
+
+def _text(value):
+    return None if value is None else value.decode("utf-8")
+
+
+def _byte_array(value):
+    return None if value is None else np.frombuffer(value, dtype=np.uint8).copy()
+
+
 class QrCode:
     """Description of a detected QR Code inside an image.
 
@@ -305,24 +362,40 @@ class QrCode:
             self.pp_corner = Polygon2D(4)
             self.pp_down = Polygon2D(4)
         else:
-            jobj = JavaWrapper(java_object)
-            self.version = jobj.version
-            self.message = jobj.message
-            self.corrected = mmap_array_java_to_python(jobj.corrected, MmapType.ARRAY_U8)
-            self.byteEncoding = jobj.byteEncoding
-            self.totalBitErrors = jobj.totalBitErrors
-            self.bitsTransposed = jobj.bitsTransposed
-            self.error_level = jobj.error.toString()
-            self.mask_pattern = jobj.mask.toString()
-            self.mode = jobj.mode.toString()
-            self.failure_cause = ""
-            self.bounds = Polygon2D(jobj.bounds)
-            self.pp_right = Polygon2D(jobj.ppRight)
-            self.pp_corner = Polygon2D(jobj.ppCorner)
-            self.pp_down = Polygon2D(jobj.ppDown)
+            self._set_fields(_read_marker(java_object, *QrCode._fields))
+
+    # Primitive fields, other fields, and polygons which are read from the Java object
+    _fields = (["version", "totalBitErrors", "bitsTransposed"],
+               ["message", "corrected", "byteEncoding", "error", "mask", "mode", "failureCause"],
+               ["bounds", "ppRight", "ppCorner", "ppDown"])
+
+    def _set_fields(self, fields):
+        self.version = fields["version"]
+        self.message = _text(fields["message"])
+        self.corrected = _byte_array(fields["corrected"])
+        self.byteEncoding = _text(fields["byteEncoding"])
+        self.totalBitErrors = fields["totalBitErrors"]
+        self.bitsTransposed = fields["bitsTransposed"]
+        self.error_level = _text(fields["error"])
+        self.mask_pattern = _text(fields["mask"])
+        self.mode = _text(fields["mode"])
+        self.failure_cause = _text(fields["failureCause"]) or ""
+        self.bounds = fields["bounds"]
+        self.pp_right = fields["ppRight"]
+        self.pp_corner = fields["ppCorner"]
+        self.pp_down = fields["ppDown"]
 
-            if jobj.failureCause is not None:
-                self.failure_cause = jobj.failureCause.toString()
+    @staticmethod
+    def from_java_list(java_objects):
+        """
+        Converts a Java list of QrCode into a list of QrCode. Much faster than converting them one at a time
+        """
+        codes = []
+        for fields in _read_markers(java_objects, *QrCode._fields):
+            code = QrCode()
+            code._set_fields(fields)
+            codes.append(code)
+        return codes
 
 
 class QrCodeDetector(JavaWrapper):
@@ -346,8 +419,17 @@ class QrCodeDetector(JavaWrapper):
         except Py4JError as exc:
             raise TypeError("Expected image to be GrayU8 or GrayF32") from exc
 
-        self.detections = [QrCode(x) for x in self.java_obj.getDetections()]
-        self.failures = [QrCode(x) for x in self.java_obj.getFailures()]
+        self.detections = QrCode.from_java_list(self.java_obj.getDetections())
+        self.failures = QrCode.from_java_list(self.java_obj.getFailures())
+
+    async def detect_async(self, image, executor=None):
+        """
+        Awaitable version of detect(). Returns the detections, which are also stored in 'detections'
+        """
+        def detect():
+            self.detect(image)
+            return self.detections
+        return await run_async(detect, executor=executor, owner=self)
 
     def get_image_type(self):
         return ImageType(self.java_obj.getImageType())
@@ -373,22 +455,38 @@ class MicroQrCode:
             self.bounds = Polygon2D(4)
             self.pp = Polygon2D(4)
         else:
-            jobj = JavaWrapper(java_object)
-            self.version = jobj.version
-            self.message = jobj.message
-            self.corrected = mmap_array_java_to_python(jobj.corrected, MmapType.ARRAY_U8)
-            self.byteEncoding = jobj.byteEncoding
-            self.totalBitErrors = jobj.totalBitErrors
-            self.bitsTransposed = jobj.bitsTransposed
-            self.error_level = jobj.error.toString()
-            self.mask_pattern = jobj.mask.toString()
-            self.mode = jobj.mode.toString()
-            self.failure_cause = ""
-            self.bounds = Polygon2D(jobj.bounds)
-            self.pp = Polygon2D(jobj.pp)
+            self._set_fields(_read_marker(java_object, *MicroQrCode._fields))
+
+    # Primitive fields, other fields, and polygons which are read from the Java object
+    _fields = (["version", "totalBitErrors", "bitsTransposed"],
+               ["message", "corrected", "byteEncoding", "error", "mask", "mode", "failureCause"],
+               ["bounds", "pp"])
+
+    def _set_fields(self, fields):
+        self.version = fields["version"]
+        self.message = _text(fields["message"])
+        self.corrected = _byte_array(fields["corrected"])
+        self.byteEncoding = _text(fields["byteEncoding"])
+        self.totalBitErrors = fields["totalBitErrors"]
+        self.bitsTransposed = fields["bitsTransposed"]
+        self.error_level = _text(fields["error"])
+        self.mask_pattern = _text(fields["mask"])
+        self.mode = _text(fields["mode"])
+        self.failure_cause = _text(fields["failureCause"]) or ""
+        self.bounds = fields["bounds"]
+        self.pp = fields["pp"]
 
-            if jobj.failureCause is not None:
-                self.failure_cause = jobj.failureCause.toString()
+    @staticmethod
+    def from_java_list(java_objects):
+        """
+        Converts a Java list of MicroQrCode into a list of MicroQrCode. Much faster than converting them one at a time
+        """
+        codes = []
+        for fields in _read_markers(java_objects, *MicroQrCode._fields):
+            code = MicroQrCode()
+            code._set_fields(fields)
+            codes.append(code)
+        return codes
 
 
 class MicroQrDetector(JavaWrapper):
@@ -411,8 +509,17 @@ class MicroQrDetector(JavaWrapper):
             self.java_obj.process(image)
         except Py4JError as exc:
             raise TypeError("Expected image to be GrayU8 or GrayF32") from exc
-        self.detections = [MicroQrCode(x) for x in self.java_obj.getDetections()]
-        self.failures = [MicroQrCode(x) for x in self.java_obj.getFailures()]
+        self.detections = MicroQrCode.from_java_list(self.java_obj.getDetections())
+        self.failures = MicroQrCode.from_java_list(self.java_obj.getFailures())
+
+    async def detect_async(self, image, executor=None):
+        """
+        Awaitable version of detect(). Returns the detections, which are also stored in 'detections'
+        """
+        def detect():
+            self.detect(image)
+            return self.detections
+        return await run_async(detect, executor=executor, owner=self)
 
     def get_image_type(self):
         return ImageType(self.java_obj.getImageType())
@@ -436,19 +543,38 @@ class AztecCode:
             self.totalBitErrors = -1  # Number of errors detected in error correction
             self.bounds = Polygon2D(4)
         else:
-            jobj = JavaWrapper(java_object)
-            self.dataLayers = jobj.dataLayers
-            self.messageWordCount = jobj.messageWordCount
-            self.rawbits = mmap_array_java_to_python(jobj.rawbits, MmapType.ARRAY_U8)
-            self.corrected = mmap_array_java_to_python(jobj.corrected, MmapType.ARRAY_U8)
-            self.message = jobj.message
-            self.structure = jobj.structure.toString()
-            self.transposed = jobj.transposed
-            self.totalBitErrors = jobj.totalBitErrors
-            self.bounds = Polygon2D(jobj.bounds)
+            self._set_fields(_read_marker(java_object, *AztecCode._fields))
+
+    # Primitive fields, other fields, and polygons which are read from the Java object
+    _fields = (["dataLayers", "messageWordCount", "transposed", "totalBitErrors"],
+               ["rawbits", "corrected", "message", "structure", "failure"],
+               ["bounds"])
+
+    def _set_fields(self, fields):
+        self.dataLayers = fields["dataLayers"]
+        self.messageWordCount = fields["messageWordCount"]
+        self.rawbits = _byte_array(fields["rawbits"])
+        self.corrected = _byte_array(fields["corrected"])
+        self.message = _text(fields["message"])
+        self.structure = _text(fields["structure"])
+        self.transposed = fields["transposed"]
+        self.totalBitErrors = fields["totalBitErrors"]
+        self.bounds = fields["bounds"]
+
+        if fields["failure"] is not None:
+            self.failure_cause = _text(fields["failure"])
 
-            if jobj.failure is not None:
-                self.failure_cause = jobj.failure.toString()
+    @staticmethod
+    def from_java_list(java_objects):
+        """
+        Converts a Java list of AztecCode into a list of AztecCode. Much faster than converting them one at a time
+        """
+        codes = []
+        for fields in _read_markers(java_objects, *AztecCode._fields):
+            code = AztecCode()
+            code._set_fields(fields)
+            codes.append(code)
+        return codes
 
 
 class AztecCodeDetector(JavaWrapper):
@@ -471,8 +597,17 @@ class AztecCodeDetector(JavaWrapper):
             self.java_obj.process(image)
         except Py4JError as exc:
             raise TypeError("Expected image to be GrayU8 or GrayF32") from exc
-        self.detections = [AztecCode(x) for x in self.java_obj.getDetections()]
-        self.failures = [AztecCode(x) for x in self.java_obj.getFailures()]
+        self.detections = AztecCode.from_java_list(self.java_obj.getDetections())
+        self.failures = AztecCode.from_java_list(self.java_obj.getFailures())
+
+    async def detect_async(self, image, executor=None):
+        """
+        Awaitable version of detect(). Returns the detections, which are also stored in 'detections'
+        """
+        def detect():
+            self.detect(image)
+            return self.detections
+        return await run_async(detect, executor=executor, owner=self)
 
     def get_image_type(self):
         return ImageType(self.java_obj.getImageType())
@@ -1080,20 +1215,18 @@ class SceneRecognition(JavaWrapper):
     def __init__(self, java_object=None):
         JavaWrapper.__init__(self, java_object)
 
-    def learn_model(self, image_files):
+    def learn_model(self, image_files, num_threads: int = 0, prefetch: int = 8):
         """
         Learns a model from a set of images saved to disk. Does not have to be the images which you will query, but
-        in some applications that's a good idea.
-        """
-        # Convert the python list of strings into a java list of strings
-        java_list = ListConverter().convert(image_files, pbg.gateway._gateway_client)
+        in some applications that's a good idea. Images are decoded in background threads while the model learns.
 
-        # Create a Java iterator that will load the images from disk
-        java_imageType = self.java_obj.getImageType()
-        java_iterator = pbg.gateway.jvm.boofcv.io.image.ImageFileListIterator(java_list, java_imageType)
-
-        # Learn the model from the images
-        self.java_obj.learnModel(java_iterator)
+        :param image_files: List of image paths or a glob pattern
+        :param num_threads: Number of threads which decode images. See BatchImageLoader
+        :param prefetch: Most images which are decoded ahead of the model. See BatchImageLoader
+        """
+        # The loader is a Java iterator so the images never need to pass through Python
+        with BatchImageLoader(image_files, self.java_obj.getImageType(), num_threads, prefetch) as loader:
+            self.java_obj.learnModel(loader.java_obj)
 
     def add_image(self, id, image):
         self.java_obj.addImage(id, image)
@@ -0,0 +1,282 @@
+import bisect
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from py4j import protocol as proto
+
+# Upper bounds, in seconds, of the buckets in the round trip latency histograms
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_package_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+class BridgeStats:
+    """
+    Statistics on how PyBoof talks to Java. Gateway calls are attributed to the outermost PyBoof function which made
+    them. Commands which Py4J and PyBoof send in the background, e.g. releasing garbage collected objects and the
+    daemon heartbeat, are not counted. Non-gateway time is the wall time which wasn't spent in a gateway call. It
+    includes time spent in Python and idle time, e.g. waiting on I/O or sleeping, since the two can't be told apart.
+
+    Only the composite entry points in PyBoofEntryPoint, e.g. detectDescribeMmap(), report how long Java spent
+    computing. The round trip of those calls is split into Java time and transport, which is everything else. Every
+    other call, e.g. QrCodeDetector.detect(), can't be split and its whole round trip is counted as unattributed.
+
+    Java's counters live in the memory mapped file. When memory mapped files are disabled they are not available,
+    so every call is unattributed and bytes_from_java is empty. See 'java_counters' in to_dict()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.start_time = time.perf_counter()
+            self.stop_time = None
+            # function name -> [calls, transport seconds, java seconds, unattributed seconds, histogram counts]
+            self.functions = {}
+            # False once a call is made on a channel which doesn't have Java's counters
+            self.java_counters = True
+            # MmapType -> bytes
+            self.bytes_to_java = {}
+            self.bytes_from_java = {}
+
+    def record_call(self, function, round_trip, java_time):
+        """
+        :param java_time: Seconds Java reported computing during the call. 0 if the call doesn't report it and None
+                          if Java's counters are not available
+        """
+        with self._lock:
+            entry = self.functions.get(function)
+            if entry is None:
+                entry = [0, 0.0, 0.0, 0.0, [0] * (len(LATENCY_BUCKETS) + 1)]
+                self.functions[function] = entry
+            entry[0] += 1
+            if java_time is None:
+                self.java_counters = False
+                entry[3] += round_trip
+            elif java_time > 0.0:
+                entry[1] += max(0.0, round_trip - java_time)
+                entry[2] += java_time
+            else:
+                entry[3] += round_trip
+            entry[4][bisect.bisect_left(LATENCY_BUCKETS, round_trip)] += 1
+
+    def record_bytes(self, to_java, mmap_type, num_bytes):
+        with self._lock:
+            counts = self.bytes_to_java if to_java else self.bytes_from_java
+            counts[mmap_type] = counts.get(mmap_type, 0) + num_bytes
+
+    def to_dict(self):
+        """
+        Returns everything that's been collected as a dictionary of plain Python types
+        """
+        with self._lock:
+            end = self.stop_time if self.stop_time is not None else time.perf_counter()
+            wall = end - self.start_time
+            transport = sum(e[1] for e in self.functions.values())
+            java = sum(e[2] for e in self.functions.values())
+            unattributed = sum(e[3] for e in self.functions.values())
+            return {
+                "wall_seconds": wall,
+                "non_gateway_seconds": max(0.0, wall - transport - java - unattributed),
+                "transport_seconds": transport,
+                "java_seconds": java,
+                "unattributed_seconds": unattributed,
+                "java_counters": self.java_counters,
+                "gateway_calls": sum(e[0] for e in self.functions.values()),
+                "functions": {name: {"gateway_calls": e[0], "transport_seconds": e[1], "java_seconds": e[2],
+                                     "unattributed_seconds": e[3],
+                                     "latency_buckets": list(LATENCY_BUCKETS) + [float("inf")],
+                                     "latency_counts": list(e[4])}
+                              for name, e in self.functions.items()},
+                "bytes_to_java": {_mmap_type_name(k): v for k, v in self.bytes_to_java.items()},
+                "bytes_from_java": {_mmap_type_name(k): v for k, v in self.bytes_from_java.items()},
+            }
+
+    def to_prometheus(self, prefix="pyboof"):
+        """
+        Returns the statistics in Prometheus' text exposition format
+        """
+        d = self.to_dict()
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help_text))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+
+        metric("seconds_total", "counter", "Wall time split by where it was spent")
+        for part in ("non_gateway", "transport", "java", "unattributed"):
+            lines.append('{}_seconds_total{{part="{}"}} {}'.format(prefix, part, d[part + "_seconds"]))
+
+        metric("gateway_calls_total", "counter", "Py4J round trips by PyBoof function")
+        for name, f in d["functions"].items():
+            lines.append('{}_gateway_calls_total{{function="{}"}} {}'.format(prefix, name, f["gateway_calls"]))
+
+        metric("bytes_total", "counter", "Bytes moved through the memory mapped file by payload type")
+        for direction in ("to_java", "from_java"):
+            for mmap_type, count in d["bytes_" + direction].items():
+                lines.append('{}_bytes_total{{direction="{}",type="{}"}} {}'.
+                             format(prefix, direction, mmap_type, count))
+
+        metric("round_trip_seconds", "histogram", "Py4J round trip latency by PyBoof function")
+        for name, f in d["functions"].items():
+            cumulative = 0
+            for bound, count in zip(f["latency_buckets"], f["latency_counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append('{}_round_trip_seconds_bucket{{function="{}",le="{}"}} {}'.
+                             format(prefix, name, le, cumulative))
+            lines.append('{}_round_trip_seconds_sum{{function="{}"}} {}'.
+                         format(prefix, name,
+                                f["transport_seconds"] + f["java_seconds"] + f["unattributed_seconds"]))
+            lines.append('{}_round_trip_seconds_count{{function="{}"}} {}'.format(prefix, name, f["gateway_calls"]))
+        return "\n".join(lines) + "\n"
+
+
+def _mmap_type_name(mmap_type):
+    from pyboof import MmapType
+    for name, value in vars(MmapType).items():
+        if value == mmap_type and not name.startswith("_"):
+            return name
+    return str(mmap_type)
+
+
+# PyBoof functions which talk to Java in the background
+_BACKGROUND_FUNCTIONS = ("__init__._send_heartbeats",)
+
+
+def _api_function():
+    """
+    Name of the outermost PyBoof function on the call stack. None if there isn't one or the call is made in the
+    background
+    """
+    name = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(_package_dir) and not code.co_filename.endswith("stats.py"):
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            name = "{}.{}".format(module, getattr(code, "co_qualname", code.co_name))
+            if name in _BACKGROUND_FUNCTIONS:
+                return None
+        frame = frame.f_back
+    return name
+
+
+def _read_counters(channel):
+    """
+    Returns (compute nanos, bytes written, last type) from the channel's region header, or None if Java doesn't
+    update the channel's header
+    """
+    import pyboof
+    if channel is None:
+        return 0, 0, 0
+    if isinstance(channel, pyboof.HeapChannel):
+        # Only payloads are copied between the heap slots, so the counters Java keeps never reach Python
+        return None
+    nanos, written = struct.unpack_from('=qq', channel.mm, pyboof.MMAP_COMPUTE_NANOS_OFFSET)
+    last_type = struct.unpack_from('=H', channel.mm, pyboof.MMAP_LAST_TYPE_OFFSET)[0]
+    return nanos, written, last_type
+
+
+_active = None
+_original_send = None
+_RELEASE_COMMAND = proto.MEMORY_COMMAND_NAME + proto.MEMORY_DEL_SUBCOMMAND_NAME
+
+
+def _instrumented_send(command, *args, **kwargs):
+    from pyboof import pbg
+    collector = _active
+    # Py4J releases objects which Python garbage collected, which can happen inside of any call
+    if collector is None or command.startswith(_RELEASE_COMMAND):
+        return _original_send(command, *args, **kwargs)
+    function = _api_function()
+    if function is None:
+        return _original_send(command, *args, **kwargs)
+    channel = pbg.peek_mmap_channel()
+
+    if channel is not None and channel.pending_write is not None:
+        # Python has finished writing a payload and Java is about to be told to read it
+        slot, num_bytes = channel.pending_write
+        channel.pending_write = None
+        mmap_type = struct.unpack_from('=H', channel.mm, channel.offset(slot))[0]
+        collector.record_bytes(True, mmap_type, num_bytes)
+
+    before = _read_counters(channel)
+    start = time.perf_counter()
+    try:
+        return _original_send(command, *args, **kwargs)
+    finally:
+        round_trip = time.perf_counter() - start
+        after = _read_counters(channel)
+        if before is None or after is None:
+            collector.record_call(function, round_trip, None)
+        else:
+            collector.record_call(function, round_trip, (after[0] - before[0]) * 1e-9)
+            if after[1] > before[1]:
+                collector.record_bytes(False, after[2], after[1] - before[1])
+
+
+_global_stats = BridgeStats()
+
+
+def enable_stats(collector: BridgeStats = None) -> BridgeStats:
+    """
+    Starts collecting statistics on every call to Java. This slows down each gateway call slightly, so it's off
+    by default.
+
+    :param collector: Where statistics are stored. If None then the global collector is used
+    """
+    global _active, _original_send
+    from pyboof import pbg
+    client = pbg.gateway._gateway_client
+    # The gateway is replaced if PyBoof is initialized again
+    if client.__dict__.get("send_command") is not _instrumented_send:
+        _original_send = client.send_command
+        client.send_command = _instrumented_send
+    _active = collector if collector is not None else _global_stats
+    return _active
+
+
+def disable_stats():
+    global _active, _original_send
+    from pyboof import pbg
+    _active = None
+    if pbg._gateway is not None:
+        pbg._gateway._gateway_client.__dict__.pop("send_command", None)
+    _original_send = None
+
+
+def reset_stats():
+    _global_stats.reset()
+
+
+def stats() -> dict:
+    """
+    Statistics collected by the global collector since it was last reset. See enable_stats()
+    """
+    return _global_stats.to_dict()
+
+
+@contextmanager
+def collect_stats():
+    """
+    Collects statistics for the calls made inside the block. The yielded BridgeStats can be read after the block
+    exits. Only one collector is active at a time
+    """
+    previous = _active
+    collector = BridgeStats()
+    enable_stats(collector)
+    try:
+        yield collector
+    finally:
+        collector.stop_time = time.perf_counter()
+        if previous is None:
+            disable_stats()
+        else:
+            enable_stats(previous)
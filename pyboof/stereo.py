@@ -3,9 +3,11 @@ import os
 import pyboof
 from pyboof import ClassSingleBand_to_dtype
 from pyboof import JavaConfig
+from pyboof import JavaStatic
 from pyboof import JavaWrapper
 from pyboof import dtype_to_Class_SingleBand
 from pyboof import pbg
+from pyboof.aio import run_async
 import numpy as np
 
 
@@ -62,20 +64,20 @@ class DisparityError:
     """
     Error functions which can be used with block-matching stereo disparity approaches
     """
-    SAD = pbg.gateway.jvm.boofcv.factory.disparity.DisparityError.SAD
-    CENSUS = pbg.gateway.jvm.boofcv.factory.disparity.DisparityError.CENSUS
-    NCC = pbg.gateway.jvm.boofcv.factory.disparity.DisparityError.NCC
-    values = pbg.gateway.jvm.boofcv.factory.disparity.DisparityError.values()
+    SAD = JavaStatic("boofcv.factory.disparity.DisparityError")
+    CENSUS = JavaStatic("boofcv.factory.disparity.DisparityError")
+    NCC = JavaStatic("boofcv.factory.disparity.DisparityError")
+    values = JavaStatic("boofcv.factory.disparity.DisparityError", "values", call=True)
 
 
 class DisparitySgmError:
     """
     Error functions which can be used with SGM stereo disparity
     """
-    ABSOLUTE_DIFFERENCE = pbg.gateway.jvm.boofcv.factory.disparity.DisparitySgmError.ABSOLUTE_DIFFERENCE
-    CENSUS = pbg.gateway.jvm.boofcv.factory.disparity.DisparitySgmError.CENSUS
-    MUTUAL_INFORMATION = pbg.gateway.jvm.boofcv.factory.disparity.DisparitySgmError.MUTUAL_INFORMATION
-    values = pbg.gateway.jvm.boofcv.factory.disparity.DisparitySgmError.values()
+    ABSOLUTE_DIFFERENCE = JavaStatic("boofcv.factory.disparity.DisparitySgmError")
+    CENSUS = JavaStatic("boofcv.factory.disparity.DisparitySgmError")
+    MUTUAL_INFORMATION = JavaStatic("boofcv.factory.disparity.DisparitySgmError")
+    values = JavaStatic("boofcv.factory.disparity.DisparitySgmError", "values", call=True)
 
 
 class StereoRectification:
@@ -183,16 +185,32 @@ class StereoDisparity(JavaWrapper):
         """
         self.java_obj.process(image_left, image_right)
 
-    def get_disparity_image(self):
+    async def process_async(self, image_left, image_right, executor=None):
+        """
+        Awaitable version of process(). Returns the disparity image
+        """
+        def process():
+            self.process(image_left, image_right)
+            return self.get_disparity_image()
+        return await run_async(process, executor=executor, owner=self)
+
+    def get_disparity_image(self, pool=None):
         """
         Returns the disparity image.
 
         For pixel level precision a GrayU8 image is returned.  For sub-pixel a GrayF32 is returned.  Disparity
         values have a range of 0 to max-min-1 disparity.  Invalid values are any value above max-min.
 
+        :param pool: If not None the disparity is copied into an image from this ImagePool, which can be kept after
+                     the next call to process(). Otherwise the algorithm's own image is returned
         :return: BoofCV GrayU8 or GrayF32
         """
-        return self.java_obj.getDisparity()
+        disparity = self.java_obj.getDisparity()
+        if pool is None:
+            return disparity
+        output = pool.acquire(disparity.getImageType(), disparity.getWidth(), disparity.getHeight())
+        output.setTo(disparity)
+        return output
 
     def get_border_x(self):
         return self.java_obj.get_border_x()
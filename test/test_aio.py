@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import asyncio
+import threading
+import unittest
+
+import pyboof as pb
+import numpy as np
+
+
+class TestAsync(unittest.TestCase):
+    def test_image_round_trip(self):
+        async def round_trip(value):
+            image = np.full((40, 50), value, dtype=np.uint8)
+            boof = await pb.ndarray_to_boof_async(image)
+            return await pb.boof_to_ndarray_async(boof)
+
+        async def main():
+            return await asyncio.gather(*[round_trip(v) for v in range(10)])
+
+        found = asyncio.run(main())
+        for value, image in enumerate(found):
+            self.assertTrue(np.all(image == value))
+
+    def test_detect_async(self):
+        detector = pb.FactoryFiducial(np.uint8).qrcode()
+        image = pb.ndarray_to_boof(np.zeros((60, 80), dtype=np.uint8))
+
+        async def main():
+            return await asyncio.gather(*[detector.detect_async(image) for _ in range(4)])
+
+        for detections in asyncio.run(main()):
+            self.assertEqual([], detections)
+
+    @staticmethod
+    def _track_in_flight(executor):
+        """
+        Records the most jobs which were submitted to the executor's threads and not yet finished
+        """
+        lock = threading.Lock()
+        counts = {"now": 0, "peak": 0}
+        submit = executor._executor.submit
+
+        def finished(_):
+            with lock:
+                counts["now"] -= 1
+
+        def tracked(*args, **kwargs):
+            with lock:
+                counts["now"] += 1
+                counts["peak"] = max(counts["peak"], counts["now"])
+            future = submit(*args, **kwargs)
+            future.add_done_callback(finished)
+            return future
+
+        executor._executor.submit = tracked
+        return counts
+
+    def test_backpressure(self):
+        executor = pb.AsyncExecutor(max_workers=1, max_pending=2)
+        counts = self._track_in_flight(executor)
+        release = threading.Event()
+
+        def job(i):
+            release.wait(5)
+            return i
+
+        async def main():
+            tasks = [asyncio.ensure_future(executor.run(job, i)) for i in range(8)]
+            # Give every task a chance to submit its job before any of them can finish
+            await asyncio.sleep(0.05)
+            self.assertEqual(2, counts["now"])
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        self.assertEqual(list(range(8)), asyncio.run(main()))
+        self.assertEqual(2, counts["peak"])
+        executor.shutdown()
+
+    def test_cancel_running_job(self):
+        executor = pb.AsyncExecutor(max_workers=1, max_pending=2)
+        counts = self._track_in_flight(executor)
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait(5)
+            return -1
+
+        async def main():
+            running = asyncio.ensure_future(executor.run(blocking))
+            queued = asyncio.ensure_future(executor.run(blocking))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            running.cancel()
+            queued.cancel()
+            await asyncio.gather(running, queued, return_exceptions=True)
+
+            # The queued job never started so its permit is returned, but the running one keeps its permit
+            later = [asyncio.ensure_future(executor.run(lambda i=i: i)) for i in range(3)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(2, counts["now"])
+            release.set()
+            return await asyncio.gather(*later)
+
+        self.assertEqual([0, 1, 2], asyncio.run(main()))
+        self.assertEqual(2, counts["peak"])
+        executor.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
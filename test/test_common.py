@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
 
+import os
+import pickle
+import struct
+import threading
 import unittest
 
 from pyboof import pbg
@@ -21,6 +25,88 @@ class JavaData(unittest.TestCase):
         self.assertEqual(4, mat_f.getNumCols())
         self.assertTrue(pb.is_java_class(mat_f.getClass(), "org.ejml.data.FMatrixRMaj"))
 
+    def test_public_fields_cached(self):
+        a = pb.JavaWrapper(pbg.gateway.jvm.georegression.struct.point.Point2D_F64(1.0, 2.0))
+        b = pb.JavaWrapper(pbg.gateway.jvm.georegression.struct.point.Point2D_F64(3.0, 4.0))
+        self.assertEqual({"x", "y"}, set(a.java_fields))
+        self.assertIs(a.java_fields, b.java_fields)
+        self.assertEqual(3.0, b.x)
+
+
+class JavaConfigSerialization(unittest.TestCase):
+
+    def test_to_dict_update(self):
+        config = pb.ConfigDisparityBM()
+        self.assertIs(config, config.update({"disparityMin": 7, "errorType": "NCC"}))
+        self.assertEqual(7, config.disparityMin)
+
+        values = config.to_dict()
+        self.assertEqual("NCC", values["errorType"])
+        self.assertEqual(config.disparityRange, values["disparityRange"])
+        self.assertEqual({"disparityMin": 7, "errorType": "NCC"}, config.to_dict(changed_only=True))
+
+    def test_yaml(self):
+        config = pb.ConfigDisparityBM()
+        config.disparityMin = 3
+        found = pb.ConfigDisparityBM.from_yaml(config.to_yaml())
+        self.assertEqual(3, found.disparityMin)
+        self.assertEqual(config.to_dict(), found.to_dict())
+
+    def test_pickle(self):
+        config = pb.ConfigDisparityBM.from_dict({"disparityRange": 40})
+        found = pickle.loads(pickle.dumps(config))
+        self.assertIs(pb.ConfigDisparityBM, type(found))
+        self.assertEqual(40, found.disparityRange)
+        self.assertEqual(config.to_dict(), found.to_dict())
+
+    def test_unknown_field(self):
+        with self.assertRaises(Exception):
+            pb.ConfigDisparityBM().update({"notAField": 1})
+
+
+class FieldSnapshot(unittest.TestCase):
+
+    def test_all_primitive_fields(self):
+        java_list = pbg.gateway.jvm.java.util.ArrayList()
+        for i in range(5):
+            java_list.add(pbg.gateway.jvm.georegression.struct.point.Point2D_F64(i, 2.0 * i))
+
+        found = pb.snapshot_fields(java_list)
+        self.assertEqual(5, len(found))
+        self.assertTrue(np.array_equal(np.arange(5), found["x"]))
+        self.assertTrue(np.array_equal(2.0 * np.arange(5), found["y"]))
+
+    def test_nested_fields(self):
+        pairs = np.array([[1, 2, 3, 4], [5, 6, 7, 8]], dtype=np.float64)
+        java_list = pb.p2b_list_AssociatedPair(pairs)
+
+        found = pb.snapshot_fields(java_list, ["p2.x", "p1.y"])
+        self.assertEqual(("p2.x", "p1.y"), found.dtype.names)
+        self.assertEqual([(3.0, 2.0), (7.0, 6.0)], found.tolist())
+
+    def test_empty(self):
+        found = pb.snapshot_fields(pbg.gateway.jvm.java.util.ArrayList(), ["x"])
+        self.assertEqual(0, len(found))
+
+    def test_indexed_fields(self):
+        java_list = pbg.gateway.jvm.java.util.ArrayList()
+        for i in range(3):
+            polygon = pbg.gateway.jvm.georegression.struct.shapes.Polygon2D_F64(2)
+            polygon.set(1, i, 2.0 * i)
+            java_list.add(polygon)
+
+        found = pb.snapshot_fields(java_list, ["vertexes[1].x", "vertexes[1].y"])
+        self.assertEqual([(0.0, 0.0), (1.0, 2.0), (2.0, 4.0)], found.tolist())
+
+    def test_values(self):
+        java_list = pbg.gateway.jvm.java.util.ArrayList()
+        for i in range(2):
+            java_list.add(pbg.gateway.jvm.georegression.struct.point.Point2D_F64(i, 0.5))
+
+        found = pb.snapshot_values(java_list, ["x", "y"])
+        self.assertEqual([[b"0.0", b"0.5"], [b"1.0", b"0.5"]], found)
+        self.assertEqual([], pb.snapshot_values(pbg.gateway.jvm.java.util.ArrayList(), ["x"]))
+
 
 class ArrayTransfer(unittest.TestCase):
 
@@ -93,5 +179,130 @@ class ArrayTransfer(unittest.TestCase):
         for i in range(len(pyfound)):
             self.assertEqual(np.float32(pyarray[i]), pyfound[i])
 
+    def test_mmap_array_java_to_python_F64(self):
+        pyarray = [1.0, 0.0, 1.059e3, -102.034, -9.3243e-200]
+        jarray  = pb.mmap_array_python_to_java(pyarray, pb.MmapType.ARRAY_F64)
+        pyfound = pb.mmap_array_java_to_python(jarray , pb.MmapType.ARRAY_F64)
+
+        self.assertEqual(5, len(pyfound))
+        for i in range(len(pyfound)):
+            self.assertEqual(pyarray[i], pyfound[i])
+
+    def test_mmap_region_header(self):
+        magic, version, byte_order_mark, num_slots, slot_bytes = \
+            struct.unpack_from(pb.MMAP_REGION_HEADER, pbg.mmap_file, 0)
+        self.assertEqual(pb.MMAP_MAGIC, magic)
+        self.assertEqual(pb.MMAP_PROTOCOL_VERSION, version)
+        self.assertEqual(pb.MMAP_BYTE_ORDER_MARK, byte_order_mark)
+        self.assertEqual(pbg.mmap_channel.num_slots, num_slots)
+        self.assertEqual(pbg.mmap_channel.slot_bytes, slot_bytes)
+
+
+class MmapChannelSlots(unittest.TestCase):
+
+    def test_lease_release(self):
+        channel = pbg.mmap_channel
+        self.assertTrue(channel.num_slots >= 3)
+        slot_a = channel.lease()
+        slot_b = channel.lease()
+        self.assertNotEqual(slot_a, slot_b)
+        self.assertNotEqual(pb.MMAP_DEFAULT_SLOT, slot_a)
+        self.assertNotEqual(pb.MMAP_DEFAULT_SLOT, slot_b)
+        channel.release(slot_a)
+        channel.release(slot_b)
+
+        with channel.leased() as slot:
+            self.assertNotEqual(pb.MMAP_DEFAULT_SLOT, slot)
+
+    def test_slots_do_not_overwrite(self):
+        array_a = [1, 2, 3]
+        array_b = [5, 6, 7, 8]
+        with pbg.mmap_channel.leased() as slot_a, pbg.mmap_channel.leased() as slot_b:
+            jarray_a = pb.mmap_array_python_to_java(array_a, pb.MmapType.ARRAY_S32, slot_a)
+            jarray_b = pb.mmap_array_python_to_java(array_b, pb.MmapType.ARRAY_S32, slot_b)
+
+            pbg.mmap_channel.java_mmap.write_primitive_array(slot_a, jarray_a, pb.MmapType.ARRAY_S32, 0)
+            pbg.mmap_channel.java_mmap.write_primitive_array(slot_b, jarray_b, pb.MmapType.ARRAY_S32, 0)
+
+            # The first slot is still intact after writing into the second
+            offset = pbg.mmap_channel.offset(slot_a) + struct.calcsize(pb.MMAP_ARRAY_HEADER)
+            found = pb.mmap_view(np.int32, (3,), offset)
+            self.assertEqual(array_a, found.tolist())
+
+
+class MmapChannelThreads(unittest.TestCase):
+
+    def test_each_thread_has_a_channel(self):
+        main_channel = pbg.mmap_channel
+        found = []
+        thread = threading.Thread(target=lambda: found.append(pbg.mmap_channel))
+        thread.start()
+        thread.join()
+        self.assertIsNot(main_channel, found[0])
+        self.assertIs(main_channel, pbg.mmap_channel)
+
+    def test_concurrent_conversions(self):
+        errors = []
+
+        def convert(value):
+            try:
+                for i in range(20):
+                    image = np.full((50, 60), value, dtype=np.uint8)
+                    found = pb.boof_to_ndarray(pb.ndarray_to_boof(image))
+                    if not np.array_equal(image, found):
+                        errors.append(value)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=convert, args=(v,)) for v in range(1, 5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], errors)
+
+    def test_use_mmap_channel(self):
+        channel = pb.create_mmap_channel(1, 2, 4)
+        with pb.use_mmap_channel(channel):
+            self.assertIs(channel, pbg.mmap_channel)
+            jarray = pb.mmap_array_python_to_java([1, 2, 3], pb.MmapType.ARRAY_S32)
+            self.assertEqual([1, 2, 3], pb.mmap_array_java_to_python(jarray, pb.MmapType.ARRAY_S32).tolist())
+        self.assertIsNot(channel, pbg.mmap_channel)
+
+class MmapSharedMemory(unittest.TestCase):
+
+    def test_file_is_unlinked(self):
+        # The channel keeps working without a name on disk, including when it grows
+        channel = pb.create_mmap_channel(1, 2, 8)
+        if os.name != 'nt':
+            self.assertEqual(0, os.fstat(channel.fid.fileno()).st_nlink)
+        with pb.use_mmap_channel(channel):
+            original = np.arange(300000, dtype=np.int32)
+            jarray = pb.mmap_array_python_to_java(original, pb.MmapType.ARRAY_S32)
+            found = pb.mmap_array_java_to_python(jarray, pb.MmapType.ARRAY_S32)
+        self.assertTrue(np.array_equal(original, found))
+
+
+class HeapChannelTransfer(unittest.TestCase):
+
+    def test_image_grows(self):
+        channel = pb.create_heap_channel(2, 16)
+        with pb.use_mmap_channel(channel):
+            # Larger than the initial slot so both sides need to grow
+            original = np.random.uniform(0, 100, size=(600, 500, 3)).astype(np.float32)
+            boof = pb.ndarray_to_boof(original)
+            found = pb.boof_to_ndarray(boof)
+        self.assertTrue(np.array_equal(original, found))
+        self.assertTrue(channel.slot_bytes >= original.nbytes)
+
+    def test_lists(self):
+        with pb.use_mmap_channel(pb.create_heap_channel()):
+            points = np.random.uniform(0, 100, size=(50, 2))
+            found = pb.b2p_list_point2D(pb.p2b_list_point2D(points), np.double, as_ndarray=True)
+            self.assertTrue(np.array_equal(points, found))
+
+            jarray = pb.mmap_array_python_to_java([1, 2, 3], pb.MmapType.ARRAY_S32)
+            self.assertEqual([1, 2, 3], pb.mmap_array_java_to_python(jarray, pb.MmapType.ARRAY_S32).tolist())
+
 if __name__ == '__main__':
     unittest.main()
@@ -28,6 +28,41 @@ class TestMemMapFunctions(unittest.TestCase):
             for j in range(len(a)):
                 self.assertEqual(a[j],b[j])
 
+    def test_desc_F64_ndarray(self):
+        original = np.random.uniform(-1, 1, size=(50, 64))
+
+        java_list = pb.p2b_list_descF64(original)
+        found = pb.b2p_list_descF64(java_list, as_ndarray=True)
+
+        self.assertEqual(np.float64, found.dtype)
+        self.assertTrue(np.array_equal(original, found))
+
+    def test_desc_F32_ndarray(self):
+        original = np.random.uniform(-1, 1, size=(50, 64)).astype(np.float32)
+
+        java_list = pb.p2b_list_descF32(original)
+        found = pb.b2p_list_descF32(java_list)
+
+        self.assertEqual(np.float32, found.dtype)
+        self.assertTrue(np.array_equal(original, found))
+
+    def test_desc_B_ndarray(self):
+        bits = np.random.randint(0, 2, size=(20, 100)).astype(np.uint8)
+        original = np.packbits(bits, axis=1, bitorder='little')
+
+        java_list = pb.p2b_list_descB(original, num_bits=100)
+        self.assertEqual(100, java_list.get(0).size())
+        self.assertEqual(bool(bits[3, 37]), java_list.get(3).isBitTrue(37))
+
+        found = pb.b2p_list_descB(java_list)
+        self.assertEqual((20, 13), found.shape)
+        self.assertTrue(np.array_equal(original, found))
+
+    def test_desc_empty(self):
+        java_list = pb.p2b_list_descF64(np.zeros((0, 64)))
+        self.assertEqual(0, java_list.size())
+        self.assertEqual(0, len(pb.b2p_list_descF64(java_list, as_ndarray=True)))
+
 # Mostly tests to see if it can load an not crash
 class TestFactoryDenseDescribe(unittest.TestCase):
     def test_createSurf_fast(self):
@@ -71,6 +106,51 @@ class TestFactoryDenseDescribe(unittest.TestCase):
         self.assertTrue(len(describer.locations) > 10)
         self.assertTrue(len(describer.descriptions) > 10)
 
+    def test_detect_ndarray(self):
+        image = np.random.randint(0, 255, size=(120, 100), dtype=np.uint8)
+
+        factory = pb.FactoryDenseDescribe(dtype=np.uint8)
+        describer = factory.createSurf(None)
+        describer.detect(image, as_ndarray=True)
+        self.assertEqual(np.int32, describer.locations.dtype)
+        self.assertEqual(len(describer.locations), len(describer.descriptions))
+
+        # Same results when the image is already in Java
+        expected = describer.descriptions
+        describer.detect(pb.ndarray_to_boof(image), as_ndarray=True)
+        self.assertTrue(np.array_equal(expected, describer.descriptions))
+
+
+class TestDetectDescribePointFeatures(unittest.TestCase):
+    def test_detect_surf(self):
+        image = np.random.randint(0, 255, size=(120, 100), dtype=np.uint8)
+
+        detector = pb.FactoryDetectDescribe(np.uint8).createSurf()
+        locations, descs = detector.detect(image, as_ndarray=True)
+        self.assertTrue(len(locations) > 0)
+        self.assertEqual((len(locations), 64), descs.shape)
+        self.assertEqual(len(locations), len(detector.get_scales()))
+        self.assertEqual(len(locations), len(detector.get_orientations()))
+
+        # The list format is still the default
+        found_locations, found_descs = detector.detect(pb.ndarray_to_boof(image))
+        self.assertEqual(tuple(locations[0]), found_locations[0])
+        self.assertEqual(tuple(descs[0]), found_descs[0])
+
+    def test_detect_converts_dtype(self):
+        image = np.random.randint(0, 255, size=(120, 100), dtype=np.uint8)
+
+        # The detector takes GrayF32 so the uint8 ndarray is converted
+        detector = pb.FactoryDetectDescribe(np.float32).createSurf()
+        locations, descs = detector.detect(image, as_ndarray=True)
+        expected_locations, expected_descs = detector.detect(image.astype(np.float32), as_ndarray=True)
+        self.assertTrue(np.array_equal(expected_locations, locations))
+        self.assertTrue(np.array_equal(expected_descs, descs))
+
+        # Descriptors are tuples in the list format no matter their type
+        found_locations, found_descs = detector.detect(image)
+        self.assertIsInstance(found_descs[0], tuple)
+
 
 if __name__ == '__main__':
     unittest.main()
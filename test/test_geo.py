@@ -298,5 +298,51 @@ class TestMemMapFunctions(unittest.TestCase):
             self.assertEqual(a[1], b[1])
             self.assertEqual(a[2], b[2])
 
+    def test_p2b_b2p_list_point2D_ndarray(self):
+        original = np.random.uniform(-100, 100, size=(500, 2))
+
+        java_list = pb.p2b_list_point2D(original)
+        self.assertEqual(500, java_list.size())
+        found = pb.b2p_list_point2D(java_list, np.double, as_ndarray=True)
+
+        self.assertEqual((500, 2), found.shape)
+        self.assertTrue(np.array_equal(original, found))
+
+    def test_p2b_b2p_list_point3D_ndarray(self):
+        original = np.random.uniform(-100, 100, size=(200, 3)).astype(np.float32)
+
+        java_list = pb.p2b_list_point3D(original)
+        found = pb.b2p_list_point3D(java_list, float, as_ndarray=True)
+
+        self.assertEqual(np.float32, found.dtype)
+        self.assertTrue(np.array_equal(original, found))
+
+    def test_p2b_b2p_list_AssociatedPair_ndarray(self):
+        original = np.random.uniform(-100, 100, size=(100, 4))
+
+        java_list = pb.p2b_list_AssociatedPair(original)
+        found = pb.b2p_list_AssociatedPair(java_list, as_ndarray=True)
+        self.assertTrue(np.array_equal(original, found))
+
+        # The list format is still the default
+        found = pb.b2p_list_AssociatedPair(java_list)
+        self.assertEqual(((original[1, 0], original[1, 1]), (original[1, 2], original[1, 3])), found[1])
+
+    def test_wrong_shape(self):
+        java_list = pbg.gateway.jvm.java.util.ArrayList()
+        with self.assertRaises(ValueError):
+            pb.mmap_list_python_to_Point2D(np.zeros((10, 3)), java_list, np.double)
+        with self.assertRaises(ValueError):
+            pb.mmap_list_python_to_Point3D(np.zeros((10, 2)), java_list, np.double)
+        with self.assertRaises(ValueError):
+            pb.mmap_list_python_to_AssociatedPair(np.zeros((10, 6)), java_list)
+        with self.assertRaises(ValueError):
+            pb.mmap_list_python_to_Point2D(np.zeros(8), java_list, np.double)
+
+        # Empty lists are fine
+        pb.mmap_list_python_to_Point2D([], java_list, np.double)
+        self.assertEqual(0, java_list.size())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 
+import os
+import tempfile
 import unittest
 
 from pyboof import pbg
@@ -88,6 +90,39 @@ class TestBImage(unittest.TestCase):
         self.assertEqual(100, found[1])
         self.assertEqual(3, found[2])
 
+    def test_slice_read(self):
+        original = np.random.randint(0, 256, size=(30, 40, 3), dtype=np.uint8)
+        for family in (pb.Family.PLANAR, pb.Family.INTERLEAVED):
+            b_image = pb.BImage(pb.ndarray_to_boof(original, family=family))
+            self.assertTrue(np.array_equal(original[5:20, 3:17], b_image[5:20, 3:17]))
+            self.assertTrue(np.array_equal(original[..., 1], b_image[..., 1]))
+            self.assertTrue(np.array_equal(original[-4:, 7, ::-1], b_image[-4:, 7, ::-1]))
+            self.assertTrue(np.array_equal(original[2:29:3, ::5], b_image[2:29:3, ::5]))
+            self.assertEqual((0, 40, 3), b_image[10:10].shape)
+
+    def test_slice_write(self):
+        for family in (pb.Family.PLANAR, pb.Family.INTERLEAVED):
+            expected = np.zeros((30, 40, 3), dtype=np.float32)
+            b_image = pb.BImage(pb.ndarray_to_boof(expected, family=family))
+            patch = np.random.uniform(size=(5, 6, 3)).astype(np.float32)
+            b_image[2:7, 10:16] = patch
+            expected[2:7, 10:16] = patch
+            b_image[..., 2] = 7
+            expected[..., 2] = 7
+            b_image[0:30:2, 1] = 3
+            expected[0:30:2, 1] = 3
+            self.assertTrue(np.array_equal(expected, pb.boof_to_ndarray(b_image.java_obj)))
+
+    def test_slice_subimage(self):
+        original = np.random.randint(0, 1000, size=(30, 40), dtype=np.int32)
+        boof = pb.ndarray_to_boof(original)
+        b_image = pb.BImage(boof.subimage(5, 6, 25, 16))
+        self.assertTrue(np.array_equal(original[6:16, 5:25], b_image[:, :]))
+
+        b_image[2:4, 1:3] = -1
+        original[8:10, 6:8] = -1
+        self.assertTrue(np.array_equal(original, pb.boof_to_ndarray(boof)))
+
 
 class TestMemMapFunctions(unittest.TestCase):
 
@@ -148,6 +183,39 @@ class TestMemMapFunctions(unittest.TestCase):
         self.assertAlmostEqual(np_img[0, 0], pb_img.get(0, 0))
         self.assertAlmostEqual(np_img[20, 10], pb_img.get(10, 20))
 
+    def test_mmap_boof_to_numpy_U8_view(self):
+        pb_img = pb.create_single_band(100, 120, dtype=np.uint8)
+        pb.fill_uniform(pb_img, 0, 200)
+        np_img = pb.mmap_boof_to_numpy_U8(pb_img, copy=False)
+
+        # The view references the memory mapped file and can't be modified
+        self.assertFalse(np_img.flags.owndata)
+        self.assertFalse(np_img.flags.writeable)
+        self.assertEqual(np_img.shape[0], pb_img.getHeight())
+        self.assertEqual(np_img.shape[1], pb_img.getWidth())
+
+        self.assertEqual(np_img[0, 0], pb_img.get(0, 0))
+        self.assertEqual(np_img[20, 10], pb_img.get(10, 20))
+
+    def test_boof_to_ndarray_copy(self):
+        pb_img = pb.create_single_band(100, 120, dtype=np.uint8)
+        pb.fill_uniform(pb_img, 0, 200)
+        np_copy = pb.boof_to_ndarray(pb_img)
+        np_view = pb.boof_to_ndarray(pb_img, copy=False)
+
+        self.assertTrue(np_copy.flags.writeable)
+        self.assertTrue((np_copy == np_view).all())
+
+    def test_mmap_grows_for_large_images(self):
+        # Larger than the initial size of a slot. Java grows the slots on the way in and the way out
+        height = pbg.mmap_size // 3000 + 10
+        np_gray = np.random.randint(0, 256, size=(height, 3000), dtype=np.uint8)
+        pb_gray = pb.mmap_numpy_to_boof_U8(np_gray)
+        self.assertTrue(pbg.mmap_size >= np_gray.size)
+
+        found = pb.mmap_boof_to_numpy_U8(pb_gray)
+        self.assertTrue(np.array_equal(np_gray, found))
+
     def test_mmap_boof_PU8_to_numpy_IU8(self):
         pb_img = pb.create_planar(100, 120, 3,dtype=np.uint8)
         pb.fill_uniform(pb_img, -2, 2)
@@ -163,5 +231,242 @@ class TestMemMapFunctions(unittest.TestCase):
         self.assertEqual(np_img[20, 10, 1], pb_img.getBand(1).get(10, 20))
         self.assertEqual(np_img[20, 10, 2], pb_img.getBand(2).get(10, 20))
 
+    def test_round_trip_all_dtypes(self):
+        for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.int32, np.int64, np.float32, np.float64):
+            for shape in ((30, 40), (30, 40, 3)):
+                original = (np.random.uniform(0, 100, size=shape)).astype(dtype)
+                for family in (None, pb.Family.PLANAR):
+                    if family is not None and len(shape) == 2:
+                        continue
+                    boof = pb.ndarray_to_boof(original, family=family)
+                    self.assertEqual(np.dtype(dtype), np.dtype(pb.get_dtype(boof)))
+                    found = pb.boof_to_ndarray(boof)
+                    self.assertEqual(np.dtype(dtype), found.dtype)
+                    self.assertTrue(np.array_equal(original, found), "{} {} {}".format(dtype, shape, family))
+
+    def test_family_of_new_image(self):
+        original = np.random.uniform(0, 100, size=(30, 40, 2)).astype(np.float32)
+        planar = pb.ndarray_to_boof(original, family=pb.Family.PLANAR)
+        interleaved = pb.ndarray_to_boof(original)
+        self.assertEqual(pb.Family.PLANAR, planar.getImageType().getFamily().ordinal())
+        self.assertEqual(pb.Family.INTERLEAVED, interleaved.getImageType().getFamily().ordinal())
+        self.assertAlmostEqual(float(original[20, 10, 1]), planar.getBand(1).get(10, 20))
+
+    def test_into_storage(self):
+        original = np.random.randint(0, 5000, size=(30, 40), dtype=np.uint16)
+        storage = pb.create_single_band(5, 5, np.uint16)
+        found = pb.ndarray_to_boof(original, storage)
+        self.assertEqual(40, storage.getWidth())
+        self.assertEqual(30, storage.getHeight())
+        self.assertEqual(int(original[20, 10]), found.get(10, 20))
+
+    def test_subimage(self):
+        original = np.random.randint(-1000, 1000, size=(30, 40), dtype=np.int16)
+        boof = pb.ndarray_to_boof(original)
+        sub = boof.subimage(5, 6, 25, 16)
+        self.assertTrue(np.array_equal(original[6:16, 5:25], pb.boof_to_ndarray(sub)))
+
+    def test_converted_to_gray(self):
+        bgr = np.random.randint(0, 256, size=(30, 40, 3), dtype=np.uint8)
+        gray = pb.create_single_band(40, 30, np.uint8)
+        pb.ndarray_to_boof_converted(bgr, gray, channel_order="BGR")
+
+        # Same as converting in Java
+        expected = pb.create_single_band(40, 30, np.uint8)
+        pb.convert_boof_image(pb.ndarray_to_boof(bgr), expected)
+        self.assertTrue(np.array_equal(pb.boof_to_ndarray(expected), pb.boof_to_ndarray(gray)))
+
+        image_type = pb.create_ImageType(pb.Family.SINGLE_BAND, np.float32)
+        found = pb.ndarray_to_boof_converted(bgr, image_type=image_type, channel_order="BGR",
+                                             gray_weights=pb.GrayWeights.LUMA)
+        luma = 0.299 * bgr[:, :, 2] + 0.587 * bgr[:, :, 1] + 0.114 * bgr[:, :, 0]
+        self.assertTrue(np.allclose(luma, pb.boof_to_ndarray(found), atol=1e-3))
+
+    def test_converted_to_planar(self):
+        bgra = np.random.randint(0, 256, size=(30, 40, 4), dtype=np.uint8)
+        planar = pb.create_planar(40, 30, 4, np.float32)
+        pb.ndarray_to_boof_converted(bgra, planar, channel_order="BGRA")
+        found = pb.boof_to_ndarray(planar)
+        self.assertEqual(np.float32, found.dtype)
+        self.assertTrue(np.array_equal(bgra[:, :, [2, 1, 0, 3]], found))
+
+
+class TestImageCache(unittest.TestCase):
+
+    def test_upload_once(self):
+        cache = pb.ImageCache()
+        image = np.random.randint(0, 256, size=(20, 30), dtype=np.uint8)
+        first = cache.upload(image)
+        second = cache.upload(image.copy())
+        self.assertTrue(first.equals(second))
+        self.assertEqual(1, cache.stats()["hits"])
+        self.assertTrue(np.array_equal(image, pb.boof_to_ndarray(first)))
+
+        # Different contents or family is a different image
+        image[0, 0] += 1
+        self.assertFalse(first.equals(cache.upload(image)))
+        self.assertEqual(2, len(cache))
+
+    def test_explicit_key(self):
+        cache = pb.ImageCache()
+        cache.upload(np.zeros((10, 10), dtype=np.float32), key="frame")
+        self.assertTrue("frame" in cache)
+        cache.put("frame", np.ones((10, 10), dtype=np.float32))
+        self.assertEqual(1.0, cache.get("frame").get(5, 5))
+        self.assertTrue(cache.remove("frame"))
+        self.assertIsNone(cache.get("frame"))
+
+    def test_least_recently_used_evicted(self):
+        # Room for two 1000 byte images
+        cache = pb.ImageCache(2500 / (1024 * 1024))
+        images = [np.full((10, 100), i, dtype=np.uint8) for i in range(3)]
+        cache.upload(images[0], key="a")
+        cache.upload(images[1], key="b")
+        cache.get("a")
+        cache.upload(images[2], key="c")
+        self.assertTrue("a" in cache)
+        self.assertFalse("b" in cache)
+        self.assertEqual(1, cache.stats()["evictions"])
+        self.assertEqual(2000, cache.stats()["bytes"])
+
+
+class TestImagePool(unittest.TestCase):
+
+    def test_reuse(self):
+        pool = pb.ImagePool()
+        frame = np.random.randint(0, 256, size=(30, 40, 3), dtype=np.uint8)
+        first = pb.ndarray_to_boof(frame, pool=pool)
+        pool.release(first)
+        for i in range(5):
+            with pool.borrowed(frame) as boof:
+                self.assertTrue(first.equals(boof))
+                self.assertTrue(np.array_equal(frame, pb.boof_to_ndarray(boof)))
+        stats = pool.stats()
+        self.assertEqual(1, stats["allocated"])
+        self.assertEqual(5, stats["reused"])
+        self.assertEqual(1, stats["idle"])
+
+    def test_type_and_shape(self):
+        pool = pb.ImagePool(max_idle=1)
+        gray_type = pb.create_ImageType(pb.Family.SINGLE_BAND, np.uint8)
+        a = pool.acquire(gray_type, 20, 10)
+        b = pool.acquire(gray_type, 20, 10)
+        pool.release(a)
+        pool.release(b)
+        # Only one is kept and different shapes are not mixed
+        self.assertEqual(1, pool.stats()["discarded"])
+        self.assertFalse(a.equals(pool.acquire(gray_type, 10, 20)))
+        self.assertTrue(a.equals(pool.acquire(gray_type, 20, 10)))
+
+    def test_allocators(self):
+        pool = pb.ImagePool()
+        gray = pb.create_single_band(20, 10, np.uint8, pool)
+        pool.release(gray)
+        self.assertTrue(gray.equals(pb.create_single_band(20, 10, np.uint8, pool)))
+
+        planar = pb.ndarray_to_boof(np.zeros((10, 20, 3), dtype=np.uint8), family=pb.Family.PLANAR)
+        converted = pb.convert_boof_image(planar, image_type=pb.create_ImageType(pb.Family.SINGLE_BAND,
+                                                                                np.uint8), pool=pool)
+        self.assertEqual(20, converted.getWidth())
+        self.assertEqual(2, pool.stats()["allocated"])
+
+
+class TestBatchImageLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.images = []
+        for i in range(5):
+            npimg = np.random.randint(0, 256, size=(20 + i, 30, 3), dtype=np.uint8)
+            path = os.path.join(self.directory.name, "image{:02d}.png".format(i))
+            pbg.gateway.jvm.boofcv.io.image.UtilImageIO.saveImage(pb.ndarray_to_boof(npimg), path)
+            self.images.append(npimg)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_order_and_contents(self):
+        image_type = pb.create_ImageType(pb.Family.INTERLEAVED, np.uint8, 3)
+        pattern = os.path.join(self.directory.name, "*.png")
+        with pb.BatchImageLoader(pattern, image_type, num_threads=3, prefetch=2) as loader:
+            self.assertEqual(5, len(loader))
+            found = list(loader.ndarrays())
+        self.assertEqual(5, len(found))
+        for expected, npimg in zip(self.images, found):
+            self.assertTrue(np.array_equal(expected, npimg))
+
+    def test_resize(self):
+        image_type = pb.create_ImageType(pb.Family.SINGLE_BAND, np.uint8)
+        pattern = os.path.join(self.directory.name, "*.png")
+        loader = pb.BatchImageLoader(pattern, image_type, resize=(16, 12))
+        count = 0
+        for boof_image in loader:
+            self.assertEqual(16, boof_image.getWidth())
+            self.assertEqual(12, boof_image.getHeight())
+            count += 1
+        self.assertEqual(5, count)
+        self.assertIsNone(loader.next_ndarray())
+
+
+class TestFrameSource(unittest.TestCase):
+
+    video_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "example", "mosaic",
+                              "airplane01.mjpeg")
+
+    def setUp(self):
+        generator = pb.QrCodeGenerator(pixels_per_module=5)
+        generator.set_message("frame source")
+        self.boof_gray = generator.generate()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_image_sequence(self):
+        for i in range(3):
+            path = os.path.join(self.directory.name, "frame{:02d}.png".format(i))
+            pbg.gateway.jvm.boofcv.io.image.UtilImageIO.saveImage(self.boof_gray, path)
+
+        detector = pb.FactoryFiducial(np.uint8).qrcode()
+        with pb.open_frame_source(self.directory.name, detector.get_image_type()) as source:
+            for frame in source:
+                detector.detect(frame)
+                self.assertEqual(1, len(detector.detections))
+                self.assertEqual("frame source", detector.detections[0].message)
+            self.assertEqual(2, source.frame_number())
+            self.assertIsNone(source.next_ndarray())
+
+    def test_mjpeg(self):
+        # An MJPEG file is JPEG images one after another
+        path = os.path.join(self.directory.name, "video.mjpeg")
+        frame_path = os.path.join(self.directory.name, "frame.jpg")
+        pbg.gateway.jvm.boofcv.io.image.UtilImageIO.saveImage(self.boof_gray, frame_path)
+        with open(frame_path, "rb") as f:
+            jpeg = f.read()
+        with open(path, "wb") as f:
+            f.write(jpeg * 4)
+
+        image_type = pb.create_ImageType(pb.Family.SINGLE_BAND, np.uint8)
+        with pb.open_frame_source(path, image_type) as source:
+            self.assertEqual(-1, source.frame_number())
+            npimg = source.next_ndarray()
+            self.assertEqual((self.boof_gray.getHeight(), self.boof_gray.getWidth()), npimg.shape)
+            self.assertEqual(0, source.frame_number())
+            self.assertEqual(3, len(list(source)))
+            self.assertEqual(3, source.frame_number())
+            self.assertIsNone(source.next_ndarray())
+
+    @unittest.skipUnless(os.path.exists(video_path), "example data has not been downloaded")
+    def test_example_video(self):
+        image_type = pb.create_ImageType(pb.Family.PLANAR, np.uint8, 3)
+        with pb.open_frame_source(self.video_path, image_type) as source:
+            npimg = source.next_ndarray()
+            self.assertEqual(3, npimg.ndim)
+            self.assertEqual(3, npimg.shape[2])
+            total = 1 + sum(1 for _ in source)
+            self.assertTrue(total > 1)
+            self.assertEqual(total - 1, source.frame_number())
+
+
 if __name__ == '__main__':
     unittest.main()
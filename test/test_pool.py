@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import os
+import unittest
+
+import pyboof as pb
+import numpy as np
+
+
+# Jobs need to be top level functions so that they can be sent to the workers
+def image_mean(value):
+    image = pb.ndarray_to_boof(np.full((30, 40), value, dtype=np.uint8))
+    return float(pb.boof_to_ndarray(image).mean())
+
+
+def worker_java_port(value):
+    from pyboof import pbg
+    return pbg.gateway.gateway_parameters.port
+
+
+def crash_worker(value):
+    import os
+    os._exit(1)
+
+
+class TestJvmPool(unittest.TestCase):
+    def test_map(self):
+        with pb.JvmPool(num_workers=2) as pool:
+            found = list(pool.map(image_mean, range(6)))
+        self.assertEqual([float(x) for x in range(6)], found)
+
+    # Workers must not launch a JVM on the default port when they import PyBoof, even if the parent isn't lazy
+    def test_not_lazy_environment(self):
+        previous = os.environ.get("PYBOOF_LAZY")
+        os.environ["PYBOOF_LAZY"] = "0"
+        try:
+            with pb.JvmPool(num_workers=2) as pool:
+                ports = set(pool.map(worker_java_port, range(8)))
+                self.assertEqual(2.0, pool.submit(image_mean, 2).result())
+        finally:
+            if previous is None:
+                del os.environ["PYBOOF_LAZY"]
+            else:
+                os.environ["PYBOOF_LAZY"] = previous
+        self.assertNotIn(25333, ports)
+
+    def test_worker_crash(self):
+        with pb.JvmPool(num_workers=1, max_retries=1) as pool:
+            with self.assertRaises(Exception):
+                pool.submit(crash_worker, 0).result()
+            # The pool should have restarted
+            self.assertEqual(5.0, pool.submit(image_mean, 5).result())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -109,6 +109,33 @@ class ChecksFactoryFiducial(unittest.TestCase):
         pb.FactoryFiducial(np.uint8).random_dots(config_detector)
 
 
+class ChecksQrCode(unittest.TestCase):
+
+    def test_detect(self):
+        generator = pb.QrCodeGenerator(pixels_per_module=5)
+        generator.set_message("bulk read")
+        detector = pb.FactoryFiducial(np.uint8).qrcode()
+        detector.detect(generator.generate())
+
+        self.assertEqual(1, len(detector.detections))
+        found = detector.detections[0]
+        self.assertEqual("bulk read", found.message)
+        self.assertFalse(found.failure_cause)
+        self.assertEqual(4, len(found.bounds.vertexes))
+
+        # Converting a single object must give the same results as the bulk conversion
+        expected = pb.QrCode(detector.java_obj.getDetections().get(0))
+        for name in ["version", "message", "byteEncoding", "totalBitErrors", "bitsTransposed", "error_level",
+                     "mask_pattern", "mode", "failure_cause"]:
+            self.assertEqual(getattr(expected, name), getattr(found, name))
+        self.assertTrue(np.array_equal(expected.corrected, found.corrected))
+        java_code = detector.java_obj.getDetections().get(0)
+        for name, java_name in [("bounds", "bounds"), ("pp_right", "ppRight"), ("pp_corner", "ppCorner"),
+                                ("pp_down", "ppDown")]:
+            expected_polygon = pb.Polygon2D(getattr(java_code, java_name))
+            self.assertEqual(expected_polygon.convert_tuple(), getattr(found, name).convert_tuple())
+
+
 class ChecksFactorySceneRecognition(unittest.TestCase):
     """
     Test factory function calls to see if they crash.
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import unittest
+
+import pyboof as pb
+from pyboof.stats import BridgeStats
+import numpy as np
+
+
+class TestStats(unittest.TestCase):
+    def test_collect_stats(self):
+        image = np.zeros((100, 120), dtype=np.uint8)
+        with pb.collect_stats() as collector:
+            boof = pb.ndarray_to_boof(image)
+            pb.boof_to_ndarray(boof)
+
+        d = collector.to_dict()
+        self.assertTrue(d["gateway_calls"] >= 2)
+        self.assertIn("image.ndarray_to_boof", d["functions"])
+        self.assertTrue(d["bytes_to_java"]["IMAGE_U8"] >= 100 * 120)
+        self.assertTrue(d["bytes_from_java"]["IMAGE_U8"] >= 100 * 120)
+        self.assertAlmostEqual(d["wall_seconds"],
+                               d["non_gateway_seconds"] + d["transport_seconds"] + d["java_seconds"] +
+                               d["unattributed_seconds"], places=6)
+
+        # Calls outside of the block are not counted
+        pb.ndarray_to_boof(image)
+        self.assertEqual(d["gateway_calls"], collector.to_dict()["gateway_calls"])
+
+    def test_background_calls(self):
+        with pb.collect_stats() as collector:
+            # Calls which aren't made by PyBoof, e.g. Py4J's or the user's, are not counted
+            pb.pbg.gateway.jvm.java.lang.System.nanoTime()
+        self.assertEqual(0, collector.to_dict()["gateway_calls"])
+        self.assertNotIn("unknown", collector.to_dict()["functions"])
+
+    def test_attribution(self):
+        collector = BridgeStats()
+        collector.record_call("a", 0.5, 0.25)
+        collector.record_call("b", 0.5, 0.0)
+        d = collector.to_dict()
+        self.assertAlmostEqual(0.25, d["java_seconds"])
+        self.assertAlmostEqual(0.25, d["transport_seconds"])
+        self.assertAlmostEqual(0.5, d["unattributed_seconds"])
+        self.assertTrue(d["java_counters"])
+
+        # Without Java's counters the call can't be split
+        collector.record_call("c", 0.5, None)
+        d = collector.to_dict()
+        self.assertAlmostEqual(1.0, d["unattributed_seconds"])
+        self.assertFalse(d["java_counters"])
+
+    def test_prometheus(self):
+        with pb.collect_stats() as collector:
+            pb.ndarray_to_boof(np.zeros((10, 12), dtype=np.uint8))
+        text = collector.to_prometheus()
+        self.assertIn('pyboof_bytes_total{direction="to_java",type="IMAGE_U8"}', text)
+        self.assertIn('le="+Inf"', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
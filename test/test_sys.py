@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 
+import os
+import subprocess
+import sys
+import threading
 import unittest
 
 import pyboof as pb
 import numpy as np
 
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
 class SystemTests(unittest.TestCase):
     # Call init_pyboof again and see if everything is reset properly
     def test_restart_jvm(self):
@@ -12,6 +19,42 @@ class SystemTests(unittest.TestCase):
         pb.init_pyboof()
         pb.FactoryFiducial(np.uint8).qrcode()
 
+    # The JVM should only be launched once something needs it
+    def test_lazy_start(self):
+        pb.init_pyboof(lazy=True)
+        self.assertIsNone(pb.pbg.java_pid)
+        self.assertIsNone(pb.pbg._gateway)
+
+        pb.FactoryFiducial(np.uint8).qrcode()
+        self.assertIsNotNone(pb.pbg._gateway)
+        self.assertIsNotNone(pb.pbg.mmap_file)
+
+    # Importing PyBoof must not launch the JVM, e.g. by looking up Java enums in class definitions
+    def test_import_is_lazy(self):
+        env = dict(os.environ)
+        env.pop("PYBOOF_LAZY", None)
+        code = "import pyboof, sys; sys.exit(0 if pyboof.pbg._gateway is None and pyboof.pbg.java_pid is None else 3)"
+        result = subprocess.run([sys.executable, "-c", code], env=env, cwd=project_dir)
+        self.assertEqual(0, result.returncode)
+
+    # Signal handlers can only be installed by the main thread, so a lazy start from a worker thread must still work
+    def test_lazy_start_worker_thread(self):
+        pb.init_pyboof(lazy=True)
+        errors = []
+
+        def worker():
+            try:
+                pb.FactoryFiducial(np.uint8).qrcode()
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual([], errors)
+        self.assertIsNotNone(pb.pbg._gateway)
+        self.assertIsNone(pb.pbg.lazy_args)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file